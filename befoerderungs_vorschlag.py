@@ -6,15 +6,55 @@
     License: MIT
 """
 
-from datetime import datetime
-from datetime import timedelta
+from __future__ import annotations
+
+from datetime import date, datetime
 import sys
-import pandas as pd
 from pathlib import Path
 import argparse
 import logging
 import re
 import enum
+import codecs
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import csv
+import functools
+import glob
+import hashlib
+import heapq
+import html
+import http.server
+import importlib
+import io
+import os
+import sqlite3
+import json
+import math
+import mmap
+import threading
+import time
+import urllib.parse
+from typing import NamedTuple
+
+
+class _Nachladen():
+    """Platzhalter für ein Modul, das erst beim ersten Zugriff importiert wird. Der Import von pandas und numpy
+       dauert länger als die Prüfung eines kleinen Exports mit der CSV-Engine (siehe pruefe_csv()).
+       Nach dem ersten Zugriff ersetzt das Modul den Platzhalter im Namensraum dieses Moduls."""
+    def __init__(self, modul:str, alias:str):
+        self._modul = modul
+        self._alias = alias
+
+    def __getattr__(self, name:str):
+        modul = importlib.import_module(self._modul)
+        globals()[self._alias] = modul
+        return getattr(modul, name)
+
+np = _Nachladen("numpy", "np")
+pd = _Nachladen("pandas", "pd")
 
 # Logger für Konsole erstellen:
 logger = logging.getLogger(__name__)
@@ -24,22 +64,100 @@ ch.setFormatter(logFormatter)
 if not logger.handlers:
     logger.addHandler(ch)
 
-# globale Variable
-global now
-now = datetime.now() # Just for Debugging :) Wird später überschrieben.
+
+def _speicher_spitze() -> int | None:
+    """Höchster Speicherbedarf (RSS) des Prozesses seit dem Start in Bytes, None ohne das Modul resource (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    spitze = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return spitze if sys.platform == "darwin" else spitze * 1024  # Linux: KiB, macOS: Bytes
+
+
+class Profiler():
+    """Laufzeit und Anzahl Aufrufe je Phase sowie der höchste Speicherbedarf für den Modus --profile (siehe main()).
+       Zeiten verschachtelter Phasen sind in der äußeren Phase enthalten (z.B. 'merkmale' in 'pruefung').
+       Solange der Profiler nicht aktiv ist, kostet eine Messung nur die Abfrage von `aktiv`. Der Speicherbedarf wird
+       vom Betriebssystem abgefragt (siehe _speicher_spitze()) und nicht mitgeschrieben, das würde die Zeiten verfälschen."""
+    def __init__(self):
+        self.aktiv = False
+        self.phasen = {}
+        self._start = 0.0
+
+    def starten(self):
+        self.phasen = {}
+        profil_zaehler.clear()
+        self._start = time.perf_counter()
+        self.aktiv = True
+
+    def erfassen(self, phase:str, sekunden:float, aufrufe:int=1):
+        eintrag = self.phasen.setdefault(phase, [0.0, 0])
+        eintrag[0] += sekunden
+        eintrag[1] += aufrufe
+
+    @contextlib.contextmanager
+    def messen(self, phase:str):
+        """Misst den Block 'with profiler.messen(phase): ...'."""
+        if not self.aktiv:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.erfassen(phase, time.perf_counter() - start)
+
+    def beenden(self, **angaben) -> dict:
+        """Beendet die Messung. Liefert den Bericht mit den 'angaben', Phasen (längste zuerst) und Zählern."""
+        gesamt = time.perf_counter() - self._start
+        spitze = _speicher_spitze()
+        self.aktiv = False
+        phasen = sorted(self.phasen.items(), key=lambda eintrag: -eintrag[1][0])
+        return {**angaben,
+                "gesamt_s": round(gesamt, 4),
+                "speicher_spitze_mb": round(spitze / 1e6, 2) if spitze is not None else None,
+                "phasen": {phase: {"sekunden": round(sekunden, 4), "aufrufe": aufrufe} for phase, (sekunden, aufrufe) in phasen},
+                "zaehler": dict(profil_zaehler)}
+
+profiler = Profiler()
+
+def profiliert(funktion):
+    """Decorator: erfasst Laufzeit und Aufrufe der Funktion, wenn der Profiler aktiv ist."""
+    @functools.wraps(funktion)
+    def wrapper(*args, **kwargs):
+        if not profiler.aktiv:
+            return funktion(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return funktion(*args, **kwargs)
+        finally:
+            profiler.erfassen(funktion.__name__, time.perf_counter() - start)
+    return wrapper
 
 
 class meta():
-    """ Abstracte Klasse für Zeitabschnitte"""
-    def __init__(self, name:str, von:datetime.date, bis:(datetime.date, None)):
-        self.name = name
+    """ Abstracte Klasse für Zeitabschnitte.
+        Ohne __dict__ (__slots__). Die Bezeichnung wird zusätzlich als Code gespeichert (Position im Enum bzw.
+        in der Reihenfolge der Dienstgrade, -1 = unbekannt), damit die Prüfungen Ganzzahlen vergleichen."""
+    __slots__ = ("name", "code", "von", "bis")
+    # Bezeichnung -> Code, wird je abgeleiteter Klasse festgelegt
+    CODES = {}
+
+    def __init__(self, name:str, von:date, bis:(date, None)):
+        self.name = sys.intern(name) if isinstance(name, str) else name
+        self.code = self.CODES.get(name, -1)
         self.von = von
         self.bis = bis
 
 class Lehrgang(meta):
     """" Definiert einen Lehrgang / Fortbildung"""
-    def __init__(self, name:str, von:datetime.date, bis:(datetime.date, None), bestanden):
+    __slots__ = ("bestanden",)
+
+    def __init__(self, name:str, von:date, bis:(date, None), bestanden, code:int | None=None):
         meta.__init__(self, name, von, bis)
+        # abweichende Schreibweisen werden über die Aliastabelle zugeordnet, siehe Lehrgangsnamen
+        self.code = Lehrgangsnamen.standard().code(name) if code is None else code
         self.bestanden = bestanden
     class status(enum.StrEnum):
         BESTANDEN = "Bestanden"
@@ -64,14 +182,20 @@ class LehrgangEnum(enum.StrEnum):
     MASCH = "Maschinistenlehrgang"
     TH = "Technische Hilfeleistung"
 
+Lehrgang.CODES = {lehrgang.value: i for i, lehrgang in enumerate(LehrgangEnum)}
+
 class Amt(meta):
     """" Definiert ein Amt / Dienststellung"""
-    def __init__(self, name:str, von:datetime.date, bis:(datetime.date, None)):
+    __slots__ = ()
+
+    def __init__(self, name:str, von:date, bis:(date, None)):
         meta.__init__(self, name, von, bis)
 
 class Dienstgrad(meta):
     """" Definiert einen Dienstgrad"""
-    def __init__(self, name:str, von:datetime.date, bis:(datetime.date, None)):
+    __slots__ = ()
+
+    def __init__(self, name:str, von:date, bis:(date, None)):
         meta.__init__(self, name, von, bis)
 
     # Reihenfolge der Dienstgrade mit den entsp Abkürzungen für männlich, weiblich
@@ -83,10 +207,15 @@ class Dienstgrad(meta):
     Reihenfolge_M_alt = ("FMA", "FM", "OFM", "HFM", "1.HFM", "LM", "OLM", "HLM", "1.HLM", "BM",  "OBM",  "HBM",  "1.HBM")
     Reihenfolge_M = Reihenfolge_M_neu
     Reihenfolge_W = Reihenfolge_W_neu
+    # ein Code je Abkürzung aus allen Reihenfolgen
+    CODES = {name: i for i, name in enumerate(dict.fromkeys(Reihenfolge_M_neu + Reihenfolge_W_neu +
+                                                            Reihenfolge_M_alt + Reihenfolge_W_alt))}
 
 class Abteilung(meta):
     """Definiert eine Abteilungszugehörigkeit"""
-    def __init__(self, name:str, von:datetime.date, bis:(datetime.date, None)):
+    __slots__ = ()
+
+    def __init__(self, name:str, von:date, bis:(date, None)):
         meta.__init__(self, name, von, bis)
 
 class AbteilungEnum(enum.StrEnum):
@@ -97,9 +226,24 @@ class AbteilungEnum(enum.StrEnum):
     AA = "Altersabteilung, Ehrenabteilung"
     PASSIV = "Fördernde Mitglieder"
 
+Abteilung.CODES = {abteilung.value: i for i, abteilung in enumerate(AbteilungEnum)}
+
+class Beurlaubung(meta):
+    """Definiert eine Beurlaubung. Die Tage von 'von' bis einschließlich 'bis' zählen nicht als Dienstzeit.
+       'name' ist der Eintrag 'Beurlaubung von' des Exports, 'grund' der Grund."""
+    __slots__ = ("grund",)
+    CODES = Abteilung.CODES
+
+    def __init__(self, name:str, von:date, bis:(date, None), grund:str | None=None):
+        meta.__init__(self, name, von, bis)
+        self.grund = grund
+
 class Person():
     """Person samt Daten, deren Voraussetungen überprüft werden sollen."""
-    def __init__(self, Vorname:str, Nachname:str, Geburtsdatum:datetime.date, Geschlecht, PersonalNr:str, Einstellungsdatum:(datetime.date,float)=float('Nan')):
+    __slots__ = ("Vorname", "Nachname", "Geburtsdatum", "Geschlecht", "Einstellungsdatum", "PersonalNr",
+                 "Abteilungen", "Dienstgrade", "Amter", "Lehrgange", "Beurlaubungen", "Dienstzeiten", "Profil")
+
+    def __init__(self, Vorname:str, Nachname:str, Geburtsdatum:date, Geschlecht, PersonalNr:str, Einstellungsdatum:(date,float)=float('Nan')):
         self.Vorname = Vorname
         self.Nachname = Nachname
         self.Geburtsdatum = Geburtsdatum
@@ -110,68 +254,199 @@ class Person():
         self.Dienstgrade = []
         self.Amter = []
         self.Lehrgange = []
+        self.Beurlaubungen = []
+        # vorberechnete Dienstzeiten in Tagen, Schlüssel (Abteilung, Lehrgang), siehe DienstJahre()
+        self.Dienstzeiten = {}
+        # Merkmale für die check_* Funktionen, siehe PersonProfile.von()
+        self.Profil = None
 
 
-def AnzTage(input:(Lehrgang, Amt, Dienstgrad, Abteilung)):
-    global now
+def AnzTage(input:(Lehrgang, Amt, Dienstgrad, Abteilung), stichtag:date):
+    """Dauer in Tagen, ein offenes Ende zählt bis zum Stichtag."""
     if input.bis is None:
-        ende = now
+        ende = stichtag
     else:
         ende = input.bis
     return (ende-input.von).days
 
-def AnzTage2(inputlist:list):
-    """Berechnet die Anzahl der Tage ohne zeitliche Überschneidungen für eine von meta abgeleitete Liste.
-       Zum Beispiel die Dauer aller Elemente in der Liste Abteilungen."""
-    global now
-    #Sortiere nach Beginn
-    sortedlist = sorted(inputlist, key=lambda x: x.von)
-    # falls die früheste Mitgliedschaft durchgängig bis jetzt ist:
-    if sortedlist[0].bis == now:
-        dauer = (sortedlist[0].bis - sortedlist[0].von).days
-    else:
-        dauer=0
-        # Alle Mitgliedschaften aufaddieren und doppelte Zeiträume berücksichtigen
-        for idx, element in enumerate(sortedlist):
-            if idx>0 and element.von <= sortedlist[idx-1].bis:
-                # Die Mitgliedschaft startet, bevor die vorherige endet. -> Beginn verschieben.
-                element.von = sortedlist[idx-1].bis + timedelta(days=1)
-            dauer += (element.bis - element.von).days
-    logger.debug(f"    Gesamtdauer ohne Überschneidungen (in {', '.join(e.name for e in sortedlist)}): {dauer} Tage.")
+# Wertebereich der Tage im Intervallindex, offene Zeitabschnitte enden bei _TAG_MAX
+_TAG_MIN = -2**31
+_TAG_MAX = 2**31 - 1
+# Versatz je Person in den Suchschlüsseln des Intervallindex (größer als der Wertebereich der Tage)
+_SPANNE = 2**32
+
+def _zeitabschnitte(person:np.ndarray, von:np.ndarray, bis:np.ndarray) -> tuple:
+    """Zerlegt die Zeitabschnitte aller Personen in einem Durchlauf über sortierte Arrays in disjunkte Abschnitte (start, bis].
+       Jeder Zeitabschnitt zählt ab dem Tag nach dem bisher spätesten Ende der Person (laufendes Maximum),
+       vollständig überdeckte Zeitabschnitte entfallen. Die Eingaben werden nicht verändert.
+       Ergebnis: (person, start, bis), sortiert nach Person und Beginn."""
+    if len(person) == 0:
+        return person, von, bis
+    # Sortieren nach Person, Beginn und Ende
+    order = np.lexsort((bis, von, person))
+    person, von, bis = person[order], von[order], bis[order]
+
+    # Laufendes Maximum der Enddaten je Person. Der Versatz je Person verhindert einen Übertrag zwischen Personen.
+    basis = min(von.min(), bis.min()) - 1
+    spanne = max(von.max(), bis.max()) - basis + 1
+    versatz = person.astype(np.int64) * spanne
+    laufend = np.maximum.accumulate(bis - basis + versatz) - versatz + basis
+    vorher = np.empty_like(laufend)
+    vorher[1:] = laufend[:-1]
+    erster = np.empty(len(person), dtype=bool)
+    erster[0] = True
+    erster[1:] = person[1:] != person[:-1]
+    vorher[erster] = basis
+
+    start = np.maximum(von, vorher + 1)
+    ok = bis > start
+    return person[ok], start[ok], bis[ok]
+
+def _ohne_urlaub(person:np.ndarray, start:np.ndarray, bis:np.ndarray, urlaub:tuple) -> tuple:
+    """Schneidet die Beurlaubungen (person, von, bis) aus den disjunkten Abschnitten (start, bis] heraus.
+       Alle Grenzen werden als Ereignisse je Person sortiert. Zwischen zwei Ereignissen wird gezählt, wenn ein Abschnitt,
+       aber keine Beurlaubung läuft (kumulierte Summen der Ereignisse, die je Person wieder bei 0 enden)."""
+    u_person, u_von, u_bis = urlaub
+    gueltig = u_bis >= u_von
+    u_person, u_von, u_bis = u_person[gueltig], u_von[gueltig], u_bis[gueltig]
+    eins, null = np.ones(len(person), dtype=np.int64), np.zeros(len(u_person), dtype=np.int64)
+    p = np.concatenate((person, person, u_person, u_person))
+    x = np.concatenate((start, bis, u_von - 1, u_bis))
+    dienst = np.concatenate((eins, -eins, null, null))
+    beurlaubt = np.concatenate((0 * eins, 0 * eins, null + 1, null - 1))
+    order = np.lexsort((x, p))
+    p, x = p[order], x[order]
+    dienst, beurlaubt = np.cumsum(dienst[order]), np.cumsum(beurlaubt[order])
+    zaehlt = (p[1:] == p[:-1]) & (x[1:] > x[:-1]) & (dienst[:-1] > 0) & (beurlaubt[:-1] == 0)
+    return p[:-1][zaehlt], x[:-1][zaehlt], x[1:][zaehlt]
+
+
+class Intervallindex():
+    """Sortierte, disjunkte Zeitabschnitte (von, bis] je Person mit Präfixsummen der Tage.
+       Ein Abschnitt umfasst die Tage nach 'von' bis einschließlich 'bis'. Überlappende Zeitabschnitte werden über das
+       laufende Maximum der Enddaten zerlegt (siehe _zeitabschnitte()), Beurlaubungen herausgeschnitten.
+       Abfragen wie 'Dienstzeit bis Tag t' oder 'Dienstzeit zwischen Tag a und b' benötigen je Person eine
+       binäre Suche (O(log n)) statt einer erneuten Vereinigung der Zeitabschnitte."""
+    def __init__(self, person:np.ndarray, von:np.ndarray, bis:np.ndarray, anzahl:int, urlaub:tuple | None=None):
+        self.anzahl = anzahl
+        person, von, bis = _zeitabschnitte(person.astype(np.int64), np.clip(von, _TAG_MIN, _TAG_MAX),
+                                           np.clip(bis, _TAG_MIN, _TAG_MAX))
+        if urlaub is not None and len(urlaub[0]) and len(person):
+            person, von, bis = _ohne_urlaub(person, von, bis, tuple(np.clip(w, _TAG_MIN, _TAG_MAX) for w in urlaub))
+        self.von = von
+        self.bis = bis
+        self.grenzen = np.searchsorted(person, np.arange(anzahl + 1))
+        self.summe = np.concatenate(([0], np.cumsum(bis - von)))
+        # Suchschlüssel: je Person aufsteigende Enddaten, die Personen nacheinander
+        self._schluessel = person * _SPANNE + (bis - _TAG_MIN)
+
+    def tage_bis(self, t, personen:np.ndarray | None=None) -> np.ndarray:
+        """Tage je Person bis einschließlich Tag t (ein Tag für alle oder ein Tag je Person).
+           Mit 'personen' (aufsteigende Indizes) nur für diese Personen."""
+        if personen is None:
+            personen = np.arange(self.anzahl, dtype=np.int64)
+        t = np.clip(np.broadcast_to(np.asarray(t, dtype=np.int64), personen.shape), _TAG_MIN, _TAG_MAX)
+        # k: erster Abschnitt der Person, der nach t endet
+        k = np.searchsorted(self._schluessel, personen * _SPANNE + (t - _TAG_MIN), side="right")
+        tage = self.summe[k] - self.summe[self.grenzen[personen]]
+        angebrochen = np.flatnonzero(k < self.grenzen[personen + 1])
+        tage[angebrochen] += np.maximum(t[angebrochen] - self.von[k[angebrochen]], 0)
+        return tage
+
+    def tage(self, a, b) -> np.ndarray:
+        """Tage je Person nach Tag a bis einschließlich Tag b (0, falls b <= a)."""
+        return self.tage_bis(b) - self.tage_bis(np.minimum(a, b))
+
+def _vereinigte_tage_liste(abschnitte:list, beginn:int | None=None, urlaub:list=()) -> int:
+    """Wie Intervallindex.tage_bis() für die Zeitabschnitte (von, bis) einer Person, ohne numpy.
+       Die Tage der Beurlaubungen in 'urlaub' (von, bis) zählen nicht."""
+    # Beurlaubungen als vereinigte Lücken (von - 1, bis]
+    luecken = []
+    for von, bis in sorted(u for u in urlaub if u[1] >= u[0]):
+        if luecken and von - 1 <= luecken[-1][1]:
+            luecken[-1] = (luecken[-1][0], max(luecken[-1][1], bis))
+        else:
+            luecken.append((von - 1, bis))
+    tage = 0
+    laufend = None
+    for von, bis in sorted(abschnitte):
+        start = von if laufend is None else max(von, laufend + 1)
+        if beginn is not None:
+            start = max(start, beginn)
+        if bis > start:
+            tage += bis - start - sum(max(min(bis, l_bis) - max(start, l_von), 0) for l_von, l_bis in luecken)
+        laufend = bis if laufend is None else max(laufend, bis)
+    return tage
+
+def _tage_aus_liste(inputlist:list, stichtag:date, beginn:datetime | None=None, urlaub:list=()) -> int:
+    """Anzahl der Tage ohne Überschneidungen bis zum Stichtag für eine von meta abgeleitete Liste (optional erst ab
+       'beginn'), ohne die Tage der Beurlaubungen in 'urlaub'."""
+    tag = stichtag.toordinal()
+    return _vereinigte_tage_liste([(e.von.toordinal(), min(e.bis.toordinal(), tag)) for e in inputlist],
+                                  None if beginn is None else beginn.toordinal(),
+                                  [(u.von.toordinal(), u.bis.toordinal()) for u in urlaub])
+
+def AnzTage2(inputlist:list, stichtag:date, urlaub:list=()):
+    """Berechnet die Anzahl der Tage ohne zeitliche Überschneidungen bis zum Stichtag für eine von meta abgeleitete Liste.
+       Zum Beispiel die Dauer aller Elemente in der Liste Abteilungen, ohne die Tage der Beurlaubungen in 'urlaub'.
+       Die Elemente der Liste werden dabei nicht verändert."""
+    dauer = _tage_aus_liste(inputlist, stichtag, urlaub=urlaub)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("    Gesamtdauer ohne Überschneidungen (in %s): %s Tage.", ', '.join(e.name for e in inputlist), dauer)
     return dauer
 
-def AnzJahre(input:list):
-    return AnzTage2(input)/365
+def AnzJahre(input:list, stichtag:date, urlaub:list=()):
+    return AnzTage2(input, stichtag, urlaub)/365
 
-def AnzDienstJahreAbt(Abteilungen:list, abteilung:AbteilungEnum):
+def AnzDienstJahreAbt(Abteilungen:list, abteilung:AbteilungEnum, stichtag:date, urlaub:list=()):
     """ Filter die Anzahl der Dienstjahre für eine besimmte Abteilung aus den hinterlegten Abteilungen
-    und berechnet die Dauer der Dienstzeit ohne Überlappung."""
-    listAbt = list(filter(lambda x: x.name == abteilung.value, Abteilungen))
+    und berechnet die Dauer der Dienstzeit ohne Überlappung und ohne Beurlaubungen."""
+    code = Abteilung.CODES[abteilung.value]
+    listAbt = list(filter(lambda x: x.code == code, Abteilungen))
     if len(listAbt) == 0:
         return 0
-    return AnzTage2(listAbt)/365
+    return AnzTage2(listAbt, stichtag, urlaub)/365
 
-def AnzDienstJahreFF(Abteilungen:list):
+def AnzDienstJahreFF(Abteilungen:list, stichtag:date):
     """ Filter die Anzahl der Dienstjahre Abteilung 'Einsatzabteilung FF' aus den hinterlegten Abteilungen
     und berechnet die Dauer der Dienstzeit ohne Überlappung."""
-    return AnzDienstJahreAbt(Abteilungen, AbteilungEnum.FF)
+    return AnzDienstJahreAbt(Abteilungen, AbteilungEnum.FF, stichtag)
 
-def AnzDienstJahreJF(Abteilungen:list):
+def AnzDienstJahreJF(Abteilungen:list, stichtag:date):
     """ Filter die Anzahl der Dienstjahre Abteilung 'Jugendfeuerwehr' aus den hinterlegten Abteilungen
     und berechnet die Dauer der Dienstzeit ohne Überlappung."""
-    return AnzDienstJahreAbt(Abteilungen, AbteilungEnum.JF)
-
-def AnzDienstJahreFFnachLehrgang(person:Person, lehrgang:LehrgangEnum):
+    return AnzDienstJahreAbt(Abteilungen, AbteilungEnum.JF, stichtag)
+
+def DienstJahre(person:Person, abteilung:AbteilungEnum | None, lehrgang:LehrgangEnum | None=None,
+                stichtag:date | None=None):
+    """Dienstjahre einer Person in der Abteilung (None = alle Abteilungen), optional erst ab Ende des Lehrgangs.
+       Beurlaubungen zählen nicht. Verwendet die vorberechneten Werte aus `Person.Dienstzeiten`, falls vorhanden,
+       sonst werden sie aus den Zeitabschnitten bis zum Stichtag berechnet."""
+    key = (abteilung, lehrgang)
+    if key in person.Dienstzeiten:
+        return person.Dienstzeiten[key] / 365
+    if stichtag is None:
+        raise ValueError(f"Dienstzeit {key} von {person.PersonalNr} ist nicht vorberechnet, dafür wird ein Stichtag benötigt.")
+    if lehrgang is None:
+        if abteilung is None:
+            return AnzJahre(person.Abteilungen, stichtag, person.Beurlaubungen) if person.Abteilungen else 0
+        return AnzDienstJahreAbt(person.Abteilungen, abteilung, stichtag, person.Beurlaubungen)
+    return AnzDienstJahreFFnachLehrgang(person, lehrgang, stichtag)
+
+def AnzDienstJahreFFnachLehrgang(person:Person, lehrgang:LehrgangEnum, stichtag:date):
     """ Filter die Anzahl der Dienstjahre Abteilung 'Einsatzabteilung FF' aus den hinterlegten Abteilungen
-        und berechnet die Dauer der Dienstzeit nach dem Ende des Lehrgangs ohne Überlappung.
+        und berechnet die Dauer der Dienstzeit nach dem Ende des Lehrgangs ohne Überlappung und ohne Beurlaubungen.
         'Mindestdienstzeit nach Abschluss der xxx Ausbildung"""
-    global now
-    # Filtere Abteilungen nach 'Einsatzabteilung FF' und sortiere nach Beginn
-    listAbt = filter(lambda x: x.name == AbteilungEnum.FF.value, person.Abteilungen)
-    listAbt = sorted(listAbt, key=lambda x: x.von)
+    key = (AbteilungEnum.FF, lehrgang)
+    if key in person.Dienstzeiten:
+        return person.Dienstzeiten[key] / 365
+    # Filtere Abteilungen nach 'Einsatzabteilung FF'
+    ff = Abteilung.CODES[AbteilungEnum.FF.value]
+    listAbt = list(filter(lambda x: x.code == ff, person.Abteilungen))
 
     #Suche Lehrgangsende
-    listLehrgange = filter(lambda x: (x.name == lehrgang.value and x.bestanden == Lehrgang.status.BESTANDEN), person.Lehrgange)
+    code = Lehrgang.CODES[lehrgang.value]
+    listLehrgange = filter(lambda x: (x.code == code and x.bestanden == Lehrgang.status.BESTANDEN), person.Lehrgange)
     listLehrgange = sorted(listLehrgange, key=lambda x: x.bis)
 
     if len(listAbt) == 0 or len(listLehrgange) == 0:
@@ -179,400 +454,2950 @@ def AnzDienstJahreFFnachLehrgang(person:Person, lehrgang:LehrgangEnum):
         return 0
 
     start = listLehrgange[-1].bis
-
-    # falls die früheste Mitgliedschaft durchgängig bis jetzt ist:
-    if listAbt[0].bis == now:
-        # und der Lehrgang schon davor beendet war ???
-        if start > listAbt[0].von:
-            dauer = (listAbt[0].bis - start).days
-        else:
-            dauer = (listAbt[0].bis - listAbt[0].von).days
-    else:
-        dauer=0
-        # Alle Mitgliedschaften aufaddieren und doppelte Zeiträume berücksichtigen
-        for idx, element in enumerate(listAbt):
-            if element.bis < start:
-                #Mitgliedschaft war ohne Lehrgang beendet
-                continue
-            if idx>0 and element.von <= listAbt[idx-1].bis:
-                # Die Mitgliedschaft startet, bevor die vorherige endet. -> Beginn verschieben.
-                element.von = listAbt[idx-1].bis + timedelta(days=1)
-            if element.von < start:
-                dauer = (element.bis - start).days
-            else:
-                dauer += (element.bis - element.von).days
-    logger.debug(f"    Anzahl Dienstjahre in Einsatzabteilng nach Datum {start.strftime('%d.%m.%Y')}: {dauer/365}")
+    dauer = _tage_aus_liste(listAbt, stichtag, beginn=start, urlaub=person.Beurlaubungen)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"    Anzahl Dienstjahre in Einsatzabteilng nach Datum {start.strftime('%d.%m.%Y')}: {dauer/365}")
     return dauer / 365
 
 
 def HatFortb(inputlist, name:LehrgangEnum):
     """Prüft, ob in der inputlist ein Element vom Typ Lehrgang mit passendem Namen und dem Status Bestanden vorhanden ist."""
+    code = Lehrgang.CODES[name.value]
     for lehrgang in inputlist:
-        if lehrgang.name == name.value and lehrgang.bestanden == 'Bestanden':
-            logger.debug(f"    Lehrgang '{lehrgang.name}' hat Status '{lehrgang.bestanden}'")
+        if lehrgang.code == code and lehrgang.bestanden == Lehrgang.status.BESTANDEN:
+            logger.debug("    Lehrgang '%s' hat Status '%s'", lehrgang.name, lehrgang.bestanden)
             return True
     return False
 
 def AnzTechLehrgange(lehrgange:list):
     """Prüft die Anzahl der hinterlegten technischen Lehrgänge."""
-    techLehrgange = [LehrgangEnum.AGT, LehrgangEnum.FUNKER, LehrgangEnum.MASCH, LehrgangEnum.TH]
-    listLehrgange = list(filter(lambda x: (x.name in techLehrgange and x.bestanden == Lehrgang.status.BESTANDEN),lehrgange))
+    techLehrgange = {Lehrgang.CODES[lg.value] for lg in (LehrgangEnum.AGT, LehrgangEnum.FUNKER, LehrgangEnum.MASCH, LehrgangEnum.TH)}
+    listLehrgange = list(filter(lambda x: (x.code in techLehrgange and x.bestanden == Lehrgang.status.BESTANDEN),lehrgange))
     return len(listLehrgange)
 
 
-def check_FM(person:Person):
+class Lehrgangsnamen():
+    """Ordnet die Lehrgangsbezeichnungen aus FeuerON einem Lehrgang zu (Code wie Lehrgang.CODES, -1 = unbekannt).
+       Reihenfolge: Bezeichnung aus LehrgangEnum, Aliastabelle, Muster (reguläre Ausdrücke). Verglichen wird die
+       normalisierte Bezeichnung (Groß-/Kleinschreibung, Leerzeichen und Bindestriche egal).
+       Jede Bezeichnung wird nur einmal aufgelöst. Nicht zugeordnete Bezeichnungen werden in `unbekannt` gezählt."""
+    # Abweichende Schreibweisen -> Lehrgang (Name oder Bezeichnung aus LehrgangEnum)
+    ALIASE = {
+        "Truppführerlehrgang": "TF",
+        "Truppmann Teil 1": "TM1",
+        "Truppmann Teil 2": "TM2",
+        "Grundausbildungslehrgang": "GA",
+        "Atemschutzgeräteträger": "AGT",
+        "Sprechfunker": "FUNKER",
+        "Maschinist": "MASCH",
+        "Maschinist für Löschfahrzeuge": "MASCH",
+        "Technische Hilfe": "TH",
+    }
+    # Muster für die normalisierte Bezeichnung (vollständige Übereinstimmung)
+    MUSTER = {
+        r"truppführer(in)? ?(lehrgang)?": "TF",
+        r"truppmann(ausbildung)? (teil )?(1|i)": "TM1",
+        r"truppmann(ausbildung)? (teil )?(2|ii)": "TM2",
+        r"gruppenführer(in)? (teil )?(1|i)": "GF1",
+        r"gruppenführer(in)? (teil )?(2|ii)": "GF2",
+        r"zugführer(in)? (teil )?(1|i)": "ZF1",
+        r"zugführer(in)? (teil )?(2|ii)": "ZF2",
+        r"(lehrgang )?atemschutz(geräteträger)? ?(lehrgang)?": "AGT",
+        r"(lehrgang )?sprechfunker ?(lehrgang)?": "FUNKER",
+        r"(lehrgang )?maschinist(en)? ?(lehrgang)?.*": "MASCH",
+        r"(lehrgang )?technische hilfeleistung.*": "TH",
+    }
+    _standard = None
+
+    def __init__(self, aliase:dict | None=None, muster:dict | None=None):
+        self._aliase = {self._schluessel(lehrgang.value): Lehrgang.CODES[lehrgang.value] for lehrgang in LehrgangEnum}
+        for name, ziel in {**self.ALIASE, **(aliase or {})}.items():
+            self._aliase[self._schluessel(name)] = self._code_von(ziel)
+        # eigene Muster vor den mitgelieferten prüfen
+        self._muster = [(re.compile(m, re.IGNORECASE), self._code_von(ziel))
+                        for m, ziel in {**(muster or {}), **self.MUSTER}.items()]
+        inhalt = repr((sorted(self._aliase.items()), [(m.pattern, code) for m, code in self._muster]))
+        self.version = hashlib.sha256(inhalt.encode("utf-8")).hexdigest()[:16]
+        self._codes = {}
+        self.unbekannt = collections.Counter()
+
+    @classmethod
+    def standard(cls) -> "Lehrgangsnamen":
+        """Gemeinsame Instanz mit den mitgelieferten Aliasen und Mustern."""
+        if cls._standard is None:
+            cls._standard = cls()
+        return cls._standard
+
+    @classmethod
+    def aus_json(cls, datei:str):
+        """Zusätzliche Aliase und Muster aus einer JSON-Datei, z.B.
+           {"aliase": {"TF-Lehrgang Kreis X": "TF"}, "muster": {"truppführer.*": "TF"}}
+           Ziel ist der Name ('TF') oder die Bezeichnung ('Truppführer') aus LehrgangEnum."""
+        with open(datei, encoding="utf-8") as fp:
+            daten = json.load(fp)
+        return cls(daten.get("aliase"), daten.get("muster"))
+
+    @staticmethod
+    def _schluessel(name:str) -> str:
+        return " ".join(str(name).replace("-", " ").split()).casefold()
+
+    @staticmethod
+    def _code_von(ziel:str) -> int:
+        if ziel in LehrgangEnum.__members__:
+            return Lehrgang.CODES[LehrgangEnum[ziel].value]
+        if ziel in Lehrgang.CODES:
+            return Lehrgang.CODES[ziel]
+        raise ValueError(f"Unbekannter Lehrgang '{ziel}' in der Aliastabelle.")
+
+    def code(self, name:str) -> int:
+        """Code des Lehrgangs zur Bezeichnung 'name' (-1, falls nicht zugeordnet)."""
+        code = self._codes.get(name)
+        if code is None:
+            schluessel = self._schluessel(name)
+            code = self._aliase.get(schluessel)
+            if code is None:
+                code = next((c for m, c in self._muster if m.fullmatch(schluessel)), -1)
+            self._codes[name] = code
+            if code >= 0 and name not in Lehrgang.CODES:
+                logger.debug("Lehrgang '%s' wird als '%s' gewertet.", name, PersonProfile.LEHRGAENGE[code].value)
+        return code
+
+    def codes(self, namen:pd.Series) -> np.ndarray:
+        """Codes für eine Spalte mit Bezeichnungen (Kategorie) und Zählung der nicht zugeordneten Einträge."""
+        kategorien = namen.cat.categories
+        codes = np.array([self.code(name) for name in kategorien] + [-1], dtype=np.int8)
+        je_eintrag = codes[namen.cat.codes.to_numpy()]
+        anzahl = np.bincount(namen.cat.codes.to_numpy()[je_eintrag < 0], minlength=len(kategorien))
+        for name, n in zip(kategorien, anzahl[:len(kategorien)]):
+            if n:
+                self.unbekannt[name] += int(n)
+        return je_eintrag
+
+    def melde_unbekannte(self):
+        """Nicht zugeordnete Bezeichnungen mit Anzahl der Einträge (häufigste zuerst) ins Log schreiben."""
+        if self.unbekannt:
+            liste = ", ".join(f"'{name}' ({n})" for name, n in self.unbekannt.most_common())
+            logger.warning(f"Nicht zugeordnete Lehrgangsbezeichnungen (werden nicht gewertet): {liste}")
+
+
+# Zähler für die Auswertung der Personenprofile, siehe PersonProfile und main()
+profil_zaehler = collections.Counter()
+
+class PersonProfile():
+    """Merkmale einer Person, die von den check_* Funktionen benötigt werden. Wird einmal je Person erstellt:
+         - bestandene Lehrgänge als Bitmaske (ein Bit je LehrgangEnum) und spätester Abschluss je Lehrgang
+         - Dienstjahre FF/JF und Dienstjahre FF nach jedem bestandenen Lehrgang
+         - Anzahl der technischen Lehrgänge
+       Die Dienstjahre stammen aus `Person.Dienstzeiten`, ohne vorberechnete Werte zählen sie bis zum Stichtag."""
+    BIT = {lehrgang: 1 << Lehrgang.CODES[lehrgang.value] for lehrgang in LehrgangEnum}
+    LEHRGAENGE = tuple(LehrgangEnum)  # Code -> LehrgangEnum
+    TECHNISCH = (LehrgangEnum.AGT, LehrgangEnum.FUNKER, LehrgangEnum.MASCH, LehrgangEnum.TH)
+    TECHNISCH_MASKE = sum(1 << Lehrgang.CODES[lehrgang.value] for lehrgang in TECHNISCH)
+
+    def __init__(self, person:Person, stichtag:date | None=None):
+        self.PersonalNr = person.PersonalNr
+        self.anzLehrgange = len(person.Lehrgange)
+        self.bestanden = 0
+        self.abschluss = {}
+        self.anzTech = 0
+        for lg in person.Lehrgange:
+            if lg.bestanden != Lehrgang.status.BESTANDEN or lg.code < 0:
+                continue
+            bit = 1 << lg.code
+            self.bestanden |= bit
+            if bit & self.TECHNISCH_MASKE:
+                self.anzTech += 1
+            lehrgang = self.LEHRGAENGE[lg.code]
+            if lehrgang not in self.abschluss or lg.bis > self.abschluss[lehrgang]:
+                self.abschluss[lehrgang] = lg.bis
+        self.dienstjahre = {(AbteilungEnum.FF, None): DienstJahre(person, AbteilungEnum.FF, stichtag=stichtag),
+                            (AbteilungEnum.JF, None): DienstJahre(person, AbteilungEnum.JF, stichtag=stichtag)}
+        for lehrgang in self.abschluss:
+            self.dienstjahre[(AbteilungEnum.FF, lehrgang)] = DienstJahre(person, AbteilungEnum.FF, lehrgang, stichtag)
+        profil_zaehler["profile"] += 1
+        profil_zaehler["dienstzeit_werte"] += len(self.dienstjahre)
+
+    @classmethod
+    def von(cls, person:Person, stichtag:date | None=None) -> "PersonProfile":
+        """Profil der Person; wird beim ersten Aufruf erstellt und an der Person zwischengespeichert."""
+        if person.Profil is None:
+            person.Profil = cls(person, stichtag)
+        return person.Profil
+
+    def hat(self, *lehrgaenge:LehrgangEnum) -> bool:
+        """Prüft, ob alle angegebenen Lehrgänge bestanden sind."""
+        maske = 0
+        for lehrgang in lehrgaenge:
+            maske |= self.BIT[lehrgang]
+        profil_zaehler["lehrgang_abfragen"] += len(lehrgaenge)
+        profil_zaehler["lehrgang_vergleiche_gespart"] += len(lehrgaenge) * self.anzLehrgange
+        return self.bestanden & maske == maske
+
+    def hat_eines(self, *lehrgaenge:LehrgangEnum) -> bool:
+        """Prüft, ob mindestens einer der angegebenen Lehrgänge bestanden ist."""
+        maske = 0
+        for lehrgang in lehrgaenge:
+            maske |= self.BIT[lehrgang]
+        profil_zaehler["lehrgang_abfragen"] += len(lehrgaenge)
+        profil_zaehler["lehrgang_vergleiche_gespart"] += len(lehrgaenge) * self.anzLehrgange
+        return self.bestanden & maske != 0
+
+    def jahre(self, abteilung:AbteilungEnum, lehrgang:LehrgangEnum | None=None) -> float:
+        """Dienstjahre in der Abteilung, optional nach Abschluss des Lehrgangs (0, falls nicht bestanden)."""
+        profil_zaehler["dienstzeit_abfragen"] += 1
+        return self.dienstjahre.get((abteilung, lehrgang), 0)
+
+
+@profiliert
+def check_FM(person:Person, stichtag:date | None=None):
     """Checks für Feuerwehrfrau-/mann (alt. FF/FM):
          - Mindestdienstzeit 1 Jahr
          - abgeschlossene MGA-QS1 ODER Truppmannausbildung Teil 1 ODER Grundausbildungslehrgang"""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.QS1) or
-             HatFortb(person.Lehrgange, LehrgangEnum.TM1) or
-             HatFortb(person.Lehrgange, LehrgangEnum.GA))
-    cond2 = (AnzDienstJahreFF(person.Abteilungen) >= 1 or
-             AnzDienstJahreJF(person.Abteilungen) >= 2)
-    #logger.debug(f"  check_FM(): cond1: {cond1}, cond2: {cond2}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = p.hat_eines(LehrgangEnum.QS1, LehrgangEnum.TM1, LehrgangEnum.GA)
+    cond2 = (p.jahre(AbteilungEnum.FF) >= 1 or
+             p.jahre(AbteilungEnum.JF) >= 2)
+    #logger.debug("  check_FM(): cond1: %s, cond2: %s", cond1, cond2)
     return cond1 and cond2
 
-def check_OFM(person:Person):
+@profiliert
+def check_OFM(person:Person, stichtag:date | None=None):
     """Checks für Oberfeuerwehrfrau-/mann (alt. OFF/OFM):
          - Mindestdienstzeit 2 Jahre
          - abgeschlossene MGA-QS1 UND MGA-QS2 ODER Truppmannausbildung Teil 1 und 2 ODER Grundausbildungslehrgang"""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.QS2) or
-             HatFortb(person.Lehrgange, LehrgangEnum.TM2) or
-             HatFortb(person.Lehrgange, LehrgangEnum.GA))
-    cond2 = AnzDienstJahreFF(person.Abteilungen) >= 2
-    #logger.debug(f"  check_OFM(): cond1: {cond1}, cond2: {cond2}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = p.hat_eines(LehrgangEnum.QS2, LehrgangEnum.TM2, LehrgangEnum.GA)
+    cond2 = p.jahre(AbteilungEnum.FF) >= 2
+    #logger.debug("  check_OFM(): cond1: %s, cond2: %s", cond1, cond2)
     return cond1 and cond2
 
-def check_HFM(person:Person):
+@profiliert
+def check_HFM(person:Person, stichtag:date | None=None):
     """Checks für Hauptfeuerwehrfrau-/mann (alt. HFF/HFM):
          - Mindestdienstzeit 5 oder 10 Jahre
          - Mind 3 jährige Dienstzeit nach Abschluss TF bzw. QS3
            oder
          - Mind. 10 jährige Dienstzeit nach Abschluss TM2 und zusätzlich 2 techn. Lehrgänge """
-    cond1 = AnzDienstJahreFF(person.Abteilungen) >= 5
-    cond2 = (HatFortb(person.Lehrgange, LehrgangEnum.QS3) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.QS3) >= 3)
-    cond3 = (HatFortb(person.Lehrgange, LehrgangEnum.TF) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.TF) >= 3)
-    cond4 = (HatFortb(person.Lehrgange, LehrgangEnum.TM2) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.TM2) >= 3 and
-             AnzTechLehrgange(person.Lehrgange)>=2)
-    logger.debug(f"  check_HFM(): cond1: {cond1}, cond2: {cond2}, cond3: {cond3}, cond4: {cond4}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = p.jahre(AbteilungEnum.FF) >= 5
+    cond2 = (p.hat(LehrgangEnum.QS3) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.QS3) >= 3)
+    cond3 = (p.hat(LehrgangEnum.TF) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.TF) >= 3)
+    cond4 = (p.hat(LehrgangEnum.TM2) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.TM2) >= 3 and
+             p.anzTech>=2)
+    logger.debug("  check_HFM(): cond1: %s, cond2: %s, cond3: %s, cond4: %s", cond1, cond2, cond3, cond4)
     return cond1 and (cond2 or cond3 or cond4)
 
-def check_EHFM(person:Person):
+@profiliert
+def check_EHFM(person:Person, stichtag:date | None=None):
     """Checks für Erster Hauptfeuerwehrfrau-/mann (alt. EHFF/EHFM):
          - Mind 10 Jahre Dienstzeit nach abgeschl. QS3 oder TF
            oder
          - Mind. 20 Jahre Dienstzeit nach abgeschl. TM Teil 2 und zusätzlich 2 techn. Lehrgänge """
-    cond1 = AnzDienstJahreFF(person.Abteilungen) >= 10
-    cond2 = (HatFortb(person.Lehrgange, LehrgangEnum.QS3) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.QS3) >= 10)
-    cond3 = (HatFortb(person.Lehrgange, LehrgangEnum.TF) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.TF) >= 10)
-    cond4 = (HatFortb(person.Lehrgange, LehrgangEnum.TM2) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.TM2) >= 20 and
-             AnzTechLehrgange(person.Lehrgange)>=2)
-    logger.debug(f"  check_EHFM(): cond1: {cond1}, cond2: {cond2}, cond3: {cond3}, cond4: {cond4}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = p.jahre(AbteilungEnum.FF) >= 10
+    cond2 = (p.hat(LehrgangEnum.QS3) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.QS3) >= 10)
+    cond3 = (p.hat(LehrgangEnum.TF) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.TF) >= 10)
+    cond4 = (p.hat(LehrgangEnum.TM2) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.TM2) >= 20 and
+             p.anzTech>=2)
+    logger.debug("  check_EHFM(): cond1: %s, cond2: %s, cond3: %s, cond4: %s", cond1, cond2, cond3, cond4)
     return cond1 and (cond2 or cond3 or cond4)
 
-def check_BM(person:Person):
+@profiliert
+def check_BM(person:Person, stichtag:date | None=None):
     """Checks für Brandmeister(in) (alt. LM):
          - Mindestdienstzeit 5 Jahre
          - Lehrgänge mind. GF1 und GF2 """
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.GF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.GF2) and
-             AnzDienstJahreFF(person.Abteilungen)>=5)
-    logger.debug(f"  check_BM(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.GF1, LehrgangEnum.GF2) and
+             p.jahre(AbteilungEnum.FF)>=5)
+    logger.debug("  check_BM(): cond1: %s", cond1)
     return cond1
 
-def check_OBM(person:Person):
+@profiliert
+def check_OBM(person:Person, stichtag:date | None=None):
     """ Checks für Oberbrandmeister(in) (alt. OLM):
           - Lehrgänge mind. GF1 und GF2.
           - Mindestdienstzeit 6 Jahre nach Abschluss der vorgeschriebenen Ausbildung."""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.GF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.GF2) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.GF2) >= 6)
-    logger.debug(f"  check_OBM(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.GF1, LehrgangEnum.GF2) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.GF2) >= 6)
+    logger.debug("  check_OBM(): cond1: %s", cond1)
     return cond1
 
-def check_HBM(person:Person):
+@profiliert
+def check_HBM(person:Person, stichtag:date | None=None):
     """ Checks für Hauptbrandmeister(in) (alt. HLM):
           - Lehrgänge mind. GF1 und GF2.
           - Mindestdienstzeit 12 Jahre nach Abschluss der vorgeschriebenen Ausbildung."""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.GF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.GF2) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.GF2) >= 12)
-    logger.debug(f"  check_HBM(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.GF1, LehrgangEnum.GF2) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.GF2) >= 12)
+    logger.debug("  check_HBM(): cond1: %s", cond1)
     return cond1
 
-def check_EHBM(person:Person):
+@profiliert
+def check_EHBM(person:Person, stichtag:date | None=None):
     """ Checks für Erste(r) Hauptbrandmeister(in) (alt. EHLM):
           - Lehrgänge mind. GF1 und GF2.
           - Mindestdienstzeit 18 Jahre nach Abschluss der vorgeschriebenen Ausbildung."""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.GF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.GF2) and
-             AnzDienstJahreFFnachLehrgang(person, LehrgangEnum.GF2) >= 18)
-    logger.debug(f"  check_EHBM(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.GF1, LehrgangEnum.GF2) and
+             p.jahre(AbteilungEnum.FF, LehrgangEnum.GF2) >= 18)
+    logger.debug("  check_EHBM(): cond1: %s", cond1)
     return cond1
 
-def check_BrI(person:Person):
+@profiliert
+def check_BrI(person:Person, stichtag:date | None=None):
     """ Checks für Brandinspektor(in) (alt. BM):
           - Lehrgänge mind. GF1 und GF2.
           - mindest Dienstjahre 9
         TODO: Voraussetzungen in Stützpunkt/ Schwerpunktwehr und Bemerkungen beachten!"""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.GF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.GF2) and
-             AnzDienstJahreFF(person.Abteilungen) >= 9)
-    logger.debug(f"  check_BrI(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.GF1, LehrgangEnum.GF2) and
+             p.jahre(AbteilungEnum.FF) >= 9)
+    logger.debug("  check_BrI(): cond1: %s", cond1)
     return cond1
 
-def check_OBrI(person:Person):
+@profiliert
+def check_OBrI(person:Person, stichtag:date | None=None):
     """ Checks für Oberbrandinspektor(in) (alt. OBM):
           - Mind 10 Dienstjahre
           - Lehrgänge mind. ZF1 und ZF2.
         TODO: Leiter einer Feuerwehr?"""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.ZF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.ZF2) and
-             AnzDienstJahreFF(person.Abteilungen) >= 10)
-    logger.debug(f"  check_OBrI(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.ZF1, LehrgangEnum.ZF2) and
+             p.jahre(AbteilungEnum.FF) >= 10)
+    logger.debug("  check_OBrI(): cond1: %s", cond1)
     return cond1
 
-def check_HBrI(person:Person):
+@profiliert
+def check_HBrI(person:Person, stichtag:date | None=None):
     """ Checks für Hauptbrandinspektor(in) (alt. HBM):
           - Mind 11 Dienstjahre
           - Lehrgänge mind. ZF1 und ZF2, Leiter einer Feuerwehr
         TODO: Verbandsführer?"""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.ZF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.ZF2) and
-             HatFortb(person.Lehrgange, LehrgangEnum.LFW) and
-             AnzDienstJahreFF(person.Abteilungen) >= 11)
-    logger.debug(f"  check_HBrI(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.ZF1, LehrgangEnum.ZF2, LehrgangEnum.LFW) and
+             p.jahre(AbteilungEnum.FF) >= 11)
+    logger.debug("  check_HBrI(): cond1: %s", cond1)
     return cond1
 
-def check_EHBrI(person:Person):
+@profiliert
+def check_EHBrI(person:Person, stichtag:date | None=None):
     """ Checks für Erste(r) Hauptbrandinspektor(in) (alt. EHBM):
           - Mind 12 Dienstjahre
           - Lehrgänge mind. ZF1 und ZF2, Leiter einer Feuerwehr
         TODO: Verbandsführer?"""
-    cond1 = (HatFortb(person.Lehrgange, LehrgangEnum.ZF1) and
-             HatFortb(person.Lehrgange, LehrgangEnum.ZF2) and
-             HatFortb(person.Lehrgange, LehrgangEnum.LFW) and
-             AnzDienstJahreFF(person.Abteilungen) >= 12)
-    logger.debug(f"  check_EHBrI(): cond1: {cond1}")
+    p = PersonProfile.von(person, stichtag)
+    cond1 = (p.hat(LehrgangEnum.ZF1, LehrgangEnum.ZF2, LehrgangEnum.LFW) and
+             p.jahre(AbteilungEnum.FF) >= 12)
+    logger.debug("  check_EHBrI(): cond1: %s", cond1)
     return cond1
 
-def check_GemBrI(person:Person):
+@profiliert
+def check_GemBrI(person:Person, stichtag:date | None=None):
     """TODO: nicht genutzt"""
     pass
 
 
 
-def get_index_match(iterable, pattern):
-    """helper für Suche nach regulärem Ausdruck"""
-    for index, item in enumerate(iterable):
-        m = re.match(pattern, item, re.IGNORECASE)
-        if m:
-            return index, m.groups()
-    return -1, None
-
-def build_table_fom_csv(inputfile):
-    """Personendaten aus CSV Datei auslesen.
-       Die CSV Datei ist kompatibel zu dem Datenexport aus FeuerON.
-       Auslesen von Grundlegenden Personendaten, Lehrgängen, Ämtern, Dienstgraden und Abteilungszugehörigkeiten"""
+# Zuordnung der check_* Funktionen zu den Dienstgraden. Der Key entspricht den Elementen von Dienstgrad.Reihenfolge_M.
+# Die Funktionen dienen als Referenz für das Regelwerk (siehe REGELN_NEU), das alle Personen auf einmal prüft.
+# Ohne vorberechnete Dienstzeiten (Person.Dienstzeiten) benötigen sie den Stichtag: check(person, stichtag).
+dg_checkfunktions = {"FM": check_FM,
+                     "OFM": check_OFM,
+                     "HFM": check_HFM,
+                     "EHFM": check_EHFM,
+                     "BM": check_BM,
+                     "OBM": check_OBM,
+                     "HBM": check_HBM,
+                     "EHBM": check_EHBM,
+                     "BrI": check_BrI,
+                     "OBrI": check_OBrI,
+                     "HBrI": check_HBrI,
+                     "EHBrI": check_EHBrI,
+                     "GemBrI": check_GemBrI,}
+
+
+class Regel(NamedTuple):
+    """Eine Alternative der Beförderungsvoraussetzungen für einen Dienstgrad. Alle Angaben müssen erfüllt sein.
+         - lehrgaenge: alle Lehrgänge bestanden
+         - einer_von: mindestens einer der Lehrgänge bestanden
+         - jahreFF / jahreJF: Mindestdienstzeit in der Einsatzabteilung / Jugendfeuerwehr
+         - nach: (Lehrgang, Jahre) Mindestdienstzeit FF nach Abschluss des (bestandenen) Lehrgangs
+         - techLehrgaenge: Mindestanzahl technischer Lehrgänge"""
+    lehrgaenge: tuple = ()
+    einer_von: tuple = ()
+    jahreFF: float = 0
+    jahreJF: float = 0
+    nach: tuple = ()
+    techLehrgaenge: int = 0
+
+    @classmethod
+    def aus_dict(cls, r:dict) -> "Regel":
+        """Regel aus einem dict (z.B. JSON), Lehrgänge über die Namen von LehrgangEnum:
+           {"lehrgaenge": ["GF1", "GF2"], "jahreFF": 5} oder {"nach": ["GF2", 6]}"""
+        return cls(lehrgaenge=tuple(LehrgangEnum[l] for l in r.get("lehrgaenge", ())),
+                   einer_von=tuple(LehrgangEnum[l] for l in r.get("einer_von", ())),
+                   jahreFF=r.get("jahreFF", 0),
+                   jahreJF=r.get("jahreJF", 0),
+                   nach=(LehrgangEnum[r["nach"][0]], r["nach"][1]) if "nach" in r else (),
+                   techLehrgaenge=r.get("techLehrgaenge", 0))
+
+
+# Voraussetzungen nach neuer Verordnung, entsprechen den Funktionen check_FM ... check_EHBrI.
+# Mehrere Regeln je Dienstgrad sind ODER-verknüpft. Ein Dienstgrad ohne Regel ist nie erfüllt.
+_L = LehrgangEnum
+REGELN_NEU = {
+    "FM": (Regel(einer_von=(_L.QS1, _L.TM1, _L.GA), jahreFF=1),
+           Regel(einer_von=(_L.QS1, _L.TM1, _L.GA), jahreJF=2)),
+    "OFM": (Regel(einer_von=(_L.QS2, _L.TM2, _L.GA), jahreFF=2),),
+    "HFM": (Regel(jahreFF=5, nach=(_L.QS3, 3)),
+            Regel(jahreFF=5, nach=(_L.TF, 3)),
+            Regel(jahreFF=5, nach=(_L.TM2, 3), techLehrgaenge=2)),
+    "EHFM": (Regel(jahreFF=10, nach=(_L.QS3, 10)),
+             Regel(jahreFF=10, nach=(_L.TF, 10)),
+             Regel(jahreFF=10, nach=(_L.TM2, 20), techLehrgaenge=2)),
+    "BM": (Regel(lehrgaenge=(_L.GF1, _L.GF2), jahreFF=5),),
+    "OBM": (Regel(lehrgaenge=(_L.GF1, _L.GF2), nach=(_L.GF2, 6)),),
+    "HBM": (Regel(lehrgaenge=(_L.GF1, _L.GF2), nach=(_L.GF2, 12)),),
+    "EHBM": (Regel(lehrgaenge=(_L.GF1, _L.GF2), nach=(_L.GF2, 18)),),
+    "BrI": (Regel(lehrgaenge=(_L.GF1, _L.GF2), jahreFF=9),),
+    "OBrI": (Regel(lehrgaenge=(_L.ZF1, _L.ZF2), jahreFF=10),),
+    "HBrI": (Regel(lehrgaenge=(_L.ZF1, _L.ZF2, _L.LFW), jahreFF=11),),
+    "EHBrI": (Regel(lehrgaenge=(_L.ZF1, _L.ZF2, _L.LFW), jahreFF=12),),
+    "GemBrI": (),
+}
+del _L
+
+
+class Regelwerk():
+    """Tabelle der Beförderungsvoraussetzungen samt Reihenfolge der Dienstgrade.
+       Die Regeln werden einmal in Bitmasken und Schwellwerte übersetzt und anschließend für alle Personen
+       auf einmal als boolesche Spalten ausgewertet (siehe auswerten())."""
+    def __init__(self, name:str, reihenfolge_m:tuple, reihenfolge_w:tuple, regeln:dict):
+        self.name = name
+        self.reihenfolge_m = tuple(reihenfolge_m)
+        self.reihenfolge_w = tuple(reihenfolge_w)
+        self.regeln = regeln
+        # Position des Dienstgrads in der Reihenfolge (männliche und weibliche Abkürzungen)
+        self.position = {dg: i for i, dg in enumerate(self.reihenfolge_m)}
+        self.position.update({dg: i for i, dg in enumerate(self.reihenfolge_w)})
+        self._kompiliert = {dg: tuple(self._kompiliere(regel) for regel in regeln.get(dg, ()))
+                            for dg in self.reihenfolge_m}
+        # Fingerabdruck der Regeln, z.B. für den Ergebniscache
+        inhalt = repr((self.reihenfolge_m, self.reihenfolge_w, sorted(regeln.items())))
+        self.version = hashlib.sha256(inhalt.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _kompiliere(regel:Regel):
+        alle = 0
+        for lehrgang in regel.lehrgaenge + regel.nach[:1]:
+            alle |= PersonProfile.BIT[lehrgang]
+        eines = 0
+        for lehrgang in regel.einer_von:
+            eines |= PersonProfile.BIT[lehrgang]
+        return alle, eines, regel
+
+    @classmethod
+    def neu(cls):
+        """Neue Dienstgrade mit den Voraussetzungen nach neuer Verordnung."""
+        return cls("neu", Dienstgrad.Reihenfolge_M_neu, Dienstgrad.Reihenfolge_W_neu, REGELN_NEU)
+
+    @classmethod
+    def alt(cls):
+        """Alte Dienstgrade, geprüft werden die Voraussetzungen des Dienstgrads an gleicher Position der neuen Verordnung.
+           Entspricht dem bisherigen Vorgehen, bis auf die neuen Dienstgrade umgestellt ist."""
+        regeln = {dg_alt: REGELN_NEU[dg_neu]
+                  for dg_alt, dg_neu in zip(Dienstgrad.Reihenfolge_M_alt, Dienstgrad.Reihenfolge_M_neu)
+                  if dg_neu in REGELN_NEU}
+        return cls("alt", Dienstgrad.Reihenfolge_M_alt, Dienstgrad.Reihenfolge_W_alt, regeln)
+
+    @classmethod
+    def aus_json(cls, datei:Path):
+        """Regelwerk aus einer JSON-Datei laden. Lehrgänge werden über die Namen von LehrgangEnum angegeben:
+           {"name": "...", "reihenfolge_m": [...], "reihenfolge_w": [...],
+            "regeln": {"BM": [{"lehrgaenge": ["GF1", "GF2"], "jahreFF": 5}], "OBM": [{"nach": ["GF2", 6]}], ...}}"""
+        with open(datei, "r", encoding="utf-8") as fp:
+            daten = json.load(fp)
+        regeln = {dg: tuple(Regel.aus_dict(r) for r in alternativen) for dg, alternativen in daten["regeln"].items()}
+        return cls(daten.get("name", Path(datei).stem), daten["reihenfolge_m"], daten["reihenfolge_w"], regeln)
+
+    @classmethod
+    def laden(cls, name:str):
+        """'alt', 'neu' oder Pfad zu einer JSON-Datei."""
+        match name:
+            case "alt":
+                return cls.alt()
+            case "neu":
+                return cls.neu()
+            case _:
+                return cls.aus_json(Path(name))
+
+    @staticmethod
+    def _statisch(merkmale:"Merkmale", alle:int, eines:int, regel:Regel) -> np.ndarray:
+        """Vom Stichtag unabhängiger Teil einer Regel: Lehrgänge und Anzahl technischer Lehrgänge."""
+        ok = (merkmale.bestanden & alle) == alle
+        if eines:
+            ok &= (merkmale.bestanden & eines) != 0
+        if regel.techLehrgaenge:
+            ok &= merkmale.anzTech >= regel.techLehrgaenge
+        return ok
+
+    @classmethod
+    def _erfuellt_alle(cls, merkmale:"Merkmale", kompiliert:tuple) -> np.ndarray:
+        """Vektorisierte Auswertung der (ODER-verknüpften) kompilierten Regeln für alle Personen."""
+        erfuellt = np.zeros(len(merkmale.bestanden), dtype=bool)
+        for alle, eines, regel in kompiliert:
+            ok = cls._statisch(merkmale, alle, eines, regel)
+            if regel.jahreFF:
+                ok &= merkmale.jahre[(AbteilungEnum.FF, None)] >= regel.jahreFF
+            if regel.jahreJF:
+                ok &= merkmale.jahre[(AbteilungEnum.JF, None)] >= regel.jahreJF
+            if regel.nach:
+                ok &= merkmale.jahre[(AbteilungEnum.FF, regel.nach[0])] >= regel.nach[1]
+            erfuellt |= ok
+        return erfuellt
+
+    def auswerten(self, merkmale:"Merkmale") -> pd.DataFrame:
+        """Prüft alle Dienstgrade für alle Personen. Ergebnis: Personen x Dienstgrade (bool)."""
+        spalten = {}
+        for dg, kompiliert in self._kompiliert.items():
+            with profiler.messen(f"regel {dg}"):
+                spalten[dg] = self._erfuellt_alle(merkmale, kompiliert)
+        matrix = pd.DataFrame(spalten)
+        logger.debug(f"Regelwerk '{self.name}': {matrix.shape[0]} Personen x {matrix.shape[1]} Dienstgrade geprüft")
+        return matrix
+
+    @staticmethod
+    def _erfuellt(profil:PersonProfile, kompiliert:tuple) -> bool:
+        """Skalare Auswertung der Regeln eines Dienstgrads für ein Personenprofil (wie in auswerten())."""
+        for alle, eines, regel in kompiliert:
+            if (profil.bestanden & alle == alle
+                    and (not eines or profil.bestanden & eines)
+                    and profil.anzTech >= regel.techLehrgaenge
+                    and (not regel.jahreFF or profil.jahre(AbteilungEnum.FF) >= regel.jahreFF)
+                    and (not regel.jahreJF or profil.jahre(AbteilungEnum.JF) >= regel.jahreJF)
+                    and (not regel.nach or profil.jahre(AbteilungEnum.FF, regel.nach[0]) >= regel.nach[1])):
+                return True
+        return False
+
+    def befoerderung(self, profil:PersonProfile, dienstgrad:str) -> list | None:
+        """Erfüllte Dienstgrade oberhalb von 'dienstgrad' für eine Person (vgl. befoerderungen()).
+           Für einen unbekannten Dienstgrad wird nichts geprüft (None)."""
+        position = self.position.get(dienstgrad, -1)
+        if position < 0:
+            return None
+        return [dg for dg in self.reihenfolge_m[position + 1:] if self._erfuellt(profil, self._kompiliert[dg])]
+
+    def protokoll(self, profil:PersonProfile, dienstgrad:str) -> list:
+        """Einzelne Bedingungen der Regeln für die Dienstgrade oberhalb von 'dienstgrad' (vgl. befoerderung()):
+           [(Dienstgrad, erfüllt, [[(Bedingung, Istwert, erfüllt), ...] je Regel]), ...].
+           Für einen unbekannten Dienstgrad wird nichts geprüft (leere Liste)."""
+        position = self.position.get(dienstgrad, -1)
+        if position < 0:
+            return []
+        return [(dg, self._erfuellt(profil, self._kompiliert[dg]),
+                 [self._bedingungen(profil, regel) for alle, eines, regel in self._kompiliert[dg]])
+                for dg in self.reihenfolge_m[position + 1:]]
+
+    @staticmethod
+    def _bedingungen(profil:PersonProfile, regel:Regel) -> list:
+        """Bedingungen einer Regel mit Istwert, wie in _erfuellt() geprüft (ein Lehrgang aus 'nach' muss bestanden sein)."""
+        bedingungen = []
+        for lehrgang in regel.lehrgaenge + tuple(l for l in regel.nach[:1] if l not in regel.lehrgaenge):
+            ok = profil.hat(lehrgang)
+            bedingungen.append((f"{lehrgang.name} bestanden", "ja" if ok else "nein", ok))
+        if regel.einer_von:
+            bestanden = [lehrgang.name for lehrgang in regel.einer_von if profil.hat(lehrgang)]
+            bedingungen.append((f"einer von {', '.join(lehrgang.name for lehrgang in regel.einer_von)} bestanden",
+                                ", ".join(bestanden) or "keiner", bool(bestanden)))
+        if regel.techLehrgaenge:
+            bedingungen.append((f"mind. {regel.techLehrgaenge} technische Lehrgänge", str(profil.anzTech),
+                                profil.anzTech >= regel.techLehrgaenge))
+        for abteilung, jahre in ((AbteilungEnum.FF, regel.jahreFF), (AbteilungEnum.JF, regel.jahreJF)):
+            if jahre:
+                ist = profil.jahre(abteilung)
+                bedingungen.append((f"mind. {jahre} Dienstjahre {abteilung.name}", f"{ist:.2f}", ist >= jahre))
+        if regel.nach:
+            lehrgang, jahre = regel.nach
+            ist = profil.jahre(AbteilungEnum.FF, lehrgang)
+            bedingungen.append((f"mind. {jahre} Dienstjahre FF nach {lehrgang.name}", f"{ist:.2f}", ist >= jahre))
+        return bedingungen
+
+    def befoerderungen(self, dienstgrade:np.ndarray, matrix:pd.DataFrame) -> list:
+        """Erfüllte Dienstgrade oberhalb des aktuellen Dienstgrads je Person.
+           Für unbekannte Dienstgrade wird nichts geprüft (None)."""
+        position = np.array([self.position.get(dg, -1) for dg in dienstgrade])
+        oberhalb = np.arange(matrix.shape[1])[None, :] > position[:, None]
+        erfuellt = matrix.to_numpy() & oberhalb
+        namen = np.array(matrix.columns, dtype=object)
+        return [list(namen[zeile]) if pos >= 0 else None for zeile, pos in zip(erfuellt, position)]
+
+
+class ExportSchemaFehler(ValueError):
+    """Der Spaltenkopf der CSV-Datei passt nicht zum erwarteten FeuerON-Exportformat."""
+
+
+class AbschnittEnum(enum.StrEnum):
+    """Abschnitte des FeuerON-Exports, die aus nummerierten Spaltengruppen bestehen.
+       Die Beurlaubung ('Beurlaubung von', 'Von', 'Bis', 'Grund') steht ohne lfd. Nr. am Ende des Exports und ist optional."""
+    ABTEILUNG = "Art/Abteilung"
+    DIENSTGRAD = "Abk. Dienstgrad"
+    DIENSTSTELLUNG = "Dienststellung"
+    LEHRGANG = "Lehrgangsbezeichnung"
+    BEURLAUBUNG = "Beurlaubung von"
+
+
+class SlotSpalten(NamedTuple):
+    """Spaltenpositionen eines nummerierten Eintrags, z.B. 'Lehrgangsbezeichnung 3', 'Von 3', 'Bis 3', 'Status 3'."""
+    name: int
+    von: int
+    bis: int
+    status: int | None = None
+
+
+class ExportSchema():
+    """Einmalig kompiliertes Spaltenlayout eines FeuerON-Exports.
+       Der Spaltenkopf wird nur einmal ausgewertet. Danach werden alle Zeilen über die Positionen in
+       `abschnitte` (Abschnitt -> lfd. Nr. -> SlotSpalten) gelesen.
+       Doppelte Spaltennamen ('Von 1', 'Von 1.1', ...) werden wie von pandas umbenannt erkannt."""
+    STAMMDATEN = ("Vorname", "Nachname", "Geburtsdatum", "Geschlecht", "Einstellungsdatum", "Personal-Nr.")
+    # Stammdaten, die nicht in jedem Export enthalten sein müssen
+    OPTIONAL = ("Organisation",)
+
+    def __init__(self, columnNames):
+        self.columnNames = tuple(str(c) for c in columnNames)
+        fehlend = [name for name in self.STAMMDATEN if name not in self.columnNames]
+        if fehlend:
+            raise ExportSchemaFehler(f"Spalten fehlen im Export: {', '.join(fehlend)}")
+        self.stammdaten = {name: self.columnNames.index(name) for name in self.STAMMDATEN}
+        self.optional = {name: self.columnNames.index(name) for name in self.OPTIONAL if name in self.columnNames}
+        self.abschnitte = {}
+
+        # Startspalten aller Abschnitte suchen, um die Suche nach 'Von n'/'Bis n' auf den Abschnitt zu begrenzen.
+        namensspalten = {}
+        for abschnitt in AbschnittEnum:
+            if abschnitt == AbschnittEnum.BEURLAUBUNG:
+                continue
+            pattern = re.compile(fr'{re.escape(abschnitt.value)} ([0-9]+)', re.IGNORECASE)
+            spalten = {}
+            for index, name in enumerate(self.columnNames):
+                m = pattern.fullmatch(name)
+                if m:
+                    spalten.setdefault(int(m.group(1)), index)
+            if not spalten:
+                raise ExportSchemaFehler(f"Abschnitt '{abschnitt.value} <n>' fehlt im Export.")
+            namensspalten[abschnitt] = spalten
+        starts = sorted(min(spalten.values()) for spalten in namensspalten.values())
+
+        for abschnitt, spalten in namensspalten.items():
+            beginn = min(spalten.values())
+            ende = next((s for s in starts if s > beginn), len(self.columnNames))
+            slots = {}
+            for lfd_nr, idx_name in sorted(spalten.items()):
+                von = self._suche(f'Von {lfd_nr}', idx_name, ende, abschnitt)
+                bis = self._suche(f'Bis {lfd_nr}', idx_name, ende, abschnitt)
+                status = None
+                if abschnitt == AbschnittEnum.LEHRGANG:
+                    status = self._suche(f'Status {lfd_nr}', idx_name, ende, abschnitt)
+                slots[lfd_nr] = SlotSpalten(name=idx_name, von=von, bis=bis, status=status)
+            self.abschnitte[abschnitt] = slots
+            logger.debug(f"  Schema {abschnitt.value}: {len(slots)} Einträge, Spalten {beginn}-{ende - 1}")
+
+        # Beurlaubung: ein Eintrag ohne lfd. Nr., die Spalten 'Von', 'Bis' und 'Grund' folgen auf 'Beurlaubung von'
+        self.abschnitte[AbschnittEnum.BEURLAUBUNG] = {}
+        if AbschnittEnum.BEURLAUBUNG.value in self.columnNames:
+            beginn = self.columnNames.index(AbschnittEnum.BEURLAUBUNG.value)
+            ende = len(self.columnNames)
+            self.abschnitte[AbschnittEnum.BEURLAUBUNG][1] = SlotSpalten(
+                name=beginn, von=self._suche("Von", beginn, ende, AbschnittEnum.BEURLAUBUNG),
+                bis=self._suche("Bis", beginn, ende, AbschnittEnum.BEURLAUBUNG),
+                status=self._suche("Grund", beginn, ende, AbschnittEnum.BEURLAUBUNG))
+
+    def _suche(self, spaltenname:str, beginn:int, ende:int, abschnitt:AbschnittEnum) -> int:
+        """Position der ersten Spalte 'spaltenname' bzw. 'spaltenname.<k>' im Bereich [beginn, ende)."""
+        pattern = re.compile(fr'{re.escape(spaltenname)}(\.[0-9]+)?', re.IGNORECASE)
+        for index in range(beginn, ende):
+            if pattern.fullmatch(self.columnNames[index]):
+                return index
+        raise ExportSchemaFehler(f"Spalte '{spaltenname}' fehlt im Abschnitt '{abschnitt.value}'.")
+
+    def slots(self, abschnitt:AbschnittEnum):
+        """Spaltenpositionen des Abschnitts in der Reihenfolge der lfd. Nr."""
+        return self.abschnitte[abschnitt].items()
+
+
+class DatumsFehler(ValueError):
+    """Ungültige Datumsangaben im Export. `fundstellen` enthält je ungültigem Datum (Zeile, Spalte, Wert)."""
+    def __init__(self, fundstellen:list):
+        self.fundstellen = fundstellen
+        liste = "; ".join(f"Zeile {zeile}, Spalte '{spalte}': '{wert}'" for zeile, spalte, wert in fundstellen[:10])
+        weitere = f" (und {len(fundstellen) - 10} weitere)" if len(fundstellen) > 10 else ""
+        super().__init__(f"{len(fundstellen)} ungültige Datumsangaben im Export: {liste}{weitere}")
+
+
+# Bereits umgewandelte Datums-Strings (auch über Blöcke und Dateien hinweg). Ungültige Werte werden als NaT gespeichert.
+_datum_cache = {}
+
+@profiliert
+def parse_dates(werte) -> tuple:
+    """Wandelt Datums-Strings (dd.mm.yyyy oder dd.mm.yy) vektorisiert um. Jeder verschiedene Wert wird nur
+       einmal geparst. Ergebnis: (datetime64[D]-Array mit NaT für leere Werte, Maske der ungültigen Werte)
+       Daten außerhalb des Bereichs von pandas (z.B. 31.12.9999 als offenes Ende) werden wie in der CSV-Engine
+       umgewandelt (siehe _datum())."""
+    codes, eindeutig = pd.factorize(np.asarray(werte, dtype=object))
+    neu = [wert for wert in eindeutig if wert not in _datum_cache]
+    if neu:
+        texte = pd.Series(neu, dtype=object).astype(str).str.strip()
+        daten = pd.to_datetime(texte, format="%d.%m.%Y", errors="coerce")
+        kurz = daten.isna()
+        if kurz.any():
+            daten[kurz] = pd.to_datetime(texte[kurz], format="%d.%m.%y", errors="coerce")
+        # in Tagen, damit kein Datum beim Umwandeln der Einheit überläuft (pandas 2: ns, pandas 3: us)
+        tage = daten.to_numpy().astype("datetime64[D]")
+        for j in np.flatnonzero(np.isnat(tage)):
+            datum = _datum(texte.iat[j])
+            if datum is not None:
+                tage[j] = np.datetime64(datum, "D")
+        _datum_cache.update(zip(neu, tage))
+    tabelle = np.array([_datum_cache[wert] for wert in eindeutig] + [np.datetime64("NaT")], dtype="datetime64[D]")
+    # Code -1 (leerer Wert) zeigt auf das angehängte NaT
+    daten = tabelle[codes]
+    return daten, np.isnat(daten) & (codes >= 0)
+
+
+def _datumsspalte(df:pd.DataFrame, werte:np.ndarray, zeilen:np.ndarray, spalten:np.ndarray, fundstellen:list) -> np.ndarray:
+    """Datumswerte aus den Spalten 'spalten' der Zeilen 'zeilen' umwandeln (siehe parse_dates).
+       Ungültige Werte werden mit Zeilennummer der CSV-Datei und Spaltenname in 'fundstellen' gesammelt."""
+    daten, ungueltig = parse_dates(werte)
+    for j in np.flatnonzero(ungueltig):
+        # +2: Kopfzeile und Zählung ab 1; der Index läuft beim Einlesen in Blöcken weiter
+        fundstellen.append((int(df.index[zeilen[j]]) + 2, df.columns[spalten[j]], werte[j]))
+    return daten
+
+
+def _wide_to_long(df:pd.DataFrame, schema:ExportSchema, abschnitt:AbschnittEnum, fundstellen:list) -> pd.DataFrame:
+    """Formt die nummerierten Spaltengruppen eines Abschnitts in eine lange Tabelle um (eine Zeile je Eintrag).
+       Wie im Export endet ein Abschnitt beim ersten leeren Eintrag. Eine Beurlaubung ist durch ihren Beginn bestimmt.
+       Spalten: person (Zeilenindex im Export), slot (lfd. Nr.), name (Kategorie), von, bis (NaT = offen),
+       status (Lehrgang: Status, Beurlaubung: Grund). Ungültige Datumsangaben werden in 'fundstellen' gesammelt."""
+    slots = [slot for lfd_nr, slot in schema.slots(abschnitt)]
+    lfd_nrs = np.fromiter((lfd_nr for lfd_nr, slot in schema.slots(abschnitt)), dtype=np.int16)
+    n, k = len(df), len(slots)
+
+    namen = df.iloc[:, [s.name for s in slots]].to_numpy(dtype=object)
+    vorhanden = namen if abschnitt != AbschnittEnum.BEURLAUBUNG else df.iloc[:, [s.von for s in slots]].to_numpy(dtype=object)
+    # Nur Einträge vor der ersten Lücke zählen (wie bisher beim zeilenweisen Einlesen).
+    maske = np.logical_and.accumulate(pd.notna(vorhanden), axis=1).ravel()
+
+    def spalte(positionen):
+        return df.iloc[:, positionen].to_numpy(dtype=object).ravel()[maske]
+
+    person = np.repeat(np.arange(n, dtype=np.int32), k)[maske]
+
+    def datum(positionen):
+        return _datumsspalte(df, spalte(positionen), person, np.tile(positionen, n)[maske], fundstellen)
+
+    tabelle = pd.DataFrame({
+        "person": person,
+        "slot": np.tile(lfd_nrs, n)[maske],
+        "name": pd.Categorical(namen.ravel()[maske]),
+        "von": datum([s.von for s in slots]),
+        "bis": datum([s.bis for s in slots]),
+        "status": pd.Categorical(spalte([s.status for s in slots])
+                                 if abschnitt in (AbschnittEnum.LEHRGANG, AbschnittEnum.BEURLAUBUNG)
+                                 else np.full(maske.sum(), None, dtype=object)),
+    })
+    logger.debug(f"  {abschnitt.value}: {len(tabelle)} Einträge, {len(tabelle['name'].cat.categories)} verschiedene Bezeichnungen")
+    return tabelle
+
+
+# Tag 0 der Tabellen (1970-01-01) als Ordinalzahl für date.fromordinal()
+_EPOCHE = date(1970, 1, 1).toordinal()
+# Fehlendes Datum in den kompakten Spalten des Rosters
+KEIN_DATUM = -2**31  # kleinster int32 Wert
+
+# Ein date Objekt je Tag, das von allen Einträgen mit diesem Datum geteilt wird (date ist unveränderlich)
+_datum_objekte = {}
+
+def _zu_datum(tag:int, ersatz):
+    """Tag aus den kompakten Spalten des Rosters in date umwandeln; KEIN_DATUM wird durch 'ersatz' ersetzt."""
+    if tag == KEIN_DATUM:
+        return ersatz
+    datum = _datum_objekte.get(tag)
+    if datum is None:
+        datum = _datum_objekte[tag] = date.fromordinal(int(tag) + _EPOCHE)
+    return datum
+
+
+class Roster():
+    """Spaltenorientierte Personendaten eines FeuerON-Exports.
+       Stammdaten liegen in `stamm` (eine Zeile je Person), Abteilungen, Dienstgrade, Dienststellungen,
+       Lehrgänge und Beurlaubungen als lange Tabellen in `tabellen` (eine Zeile je Eintrag, sortiert nach Person und lfd. Nr.).
+       `Person` Objekte werden erst bei Bedarf erzeugt."""
+    def __init__(self, stamm:pd.DataFrame, tabellen:dict, lehrgangsnamen:Lehrgangsnamen | None=None):
+        self.stamm = stamm
+        self.tabellen = tabellen
+        self.lehrgangsnamen = lehrgangsnamen or Lehrgangsnamen.standard()
+        # Je Abschnitt die Zeilenbereiche der Personen, damit eine Person ohne Suche gelesen werden kann.
+        self._grenzen = {abschnitt: np.searchsorted(tabelle["person"].to_numpy(), np.arange(len(stamm) + 1))
+                         for abschnitt, tabelle in tabellen.items()}
+        # Für die `Person` Objekte: Bezeichnung und Status als Codes der Kategorien, Datum als Tag (int32).
+        # Objekte (date, str) werden erst in _eintraege() erzeugt.
+        self._spalten = {abschnitt: (tabelle["name"].cat.codes.to_numpy(),
+                                     np.append(tabelle["name"].cat.categories.to_numpy(dtype=object), None),
+                                     _tage(tabelle["von"], KEIN_DATUM).astype(np.int32),
+                                     _tage(tabelle["bis"], KEIN_DATUM).astype(np.int32),
+                                     tabelle["status"].cat.codes.to_numpy(),
+                                     np.append(tabelle["status"].cat.categories.to_numpy(dtype=object), None))
+                         for abschnitt, tabelle in tabellen.items()}
+        self._dienstzeiten = None
+        self._merkmale = None
+        self._stammspalten = None
+
+    @classmethod
+    def from_dataframe(cls, df:pd.DataFrame, schema:ExportSchema | None=None, lehrgangsnamen:Lehrgangsnamen | None=None):
+        """Formt den breiten FeuerON-Export in einem Durchlauf je Abschnitt in lange Tabellen um.
+           Ein bereits kompiliertes Schema (z.B. beim Einlesen in Blöcken) kann übergeben werden.
+           Die Lehrgangstabelle erhält zusätzlich die Spalte 'code' (siehe Lehrgangsnamen)."""
+        lehrgangsnamen = lehrgangsnamen or Lehrgangsnamen.standard()
+        if schema is None:
+            schema = ExportSchema(df.columns.values)
+        spalten = {name: df.iloc[:, idx] for name, idx in schema.stammdaten.items()}
+        fundstellen = []
+        zeilen = np.arange(len(df))
+
+        def datum(name):
+            werte = spalten[name].to_numpy(dtype=object)
+            return _datumsspalte(df, werte, zeilen, np.full(len(df), schema.stammdaten[name]), fundstellen)
+
+        with profiler.messen("parse Stammdaten"):
+            stamm = pd.DataFrame({"Vorname": spalten["Vorname"].to_numpy(),
+                                  "Nachname": spalten["Nachname"].to_numpy(),
+                                  "Geburtsdatum": datum("Geburtsdatum"),
+                                  "Geschlecht": spalten["Geschlecht"].to_numpy(),
+                                  "Einstellungsdatum": datum("Einstellungsdatum"),
+                                  "PersonalNr": spalten["Personal-Nr."].to_numpy(),
+                                  "Organisation": pd.Categorical(df.iloc[:, schema.optional["Organisation"]].to_numpy()
+                                                                 if "Organisation" in schema.optional else [None] * len(df))})
+        tabellen = {}
+        for abschnitt in AbschnittEnum:
+            with profiler.messen(f"parse {abschnitt.value}"):
+                tabellen[abschnitt] = _wide_to_long(df, schema, abschnitt, fundstellen)
+        if fundstellen:
+            raise DatumsFehler(sorted(fundstellen))
+
+        return cls.aus_tabellen(stamm, tabellen, lehrgangsnamen)
+
+    @classmethod
+    def aus_tabellen(cls, stamm:pd.DataFrame, tabellen:dict, lehrgangsnamen:Lehrgangsnamen):
+        """Roster aus den umgeformten Tabellen (siehe from_dataframe() und RosterSnapshot). Die Codes der Lehrgänge
+           werden hier mit den Lehrgangsnamen bestimmt. Lehrgänge ohne Status meldet die Datenprüfung (siehe Datenpruefung)."""
+        lehrgange = tabellen[AbschnittEnum.LEHRGANG]
+        with profiler.messen("parse Lehrgangsnamen"):
+            lehrgange["code"] = lehrgangsnamen.codes(lehrgange["name"])
+        return cls(stamm, tabellen, lehrgangsnamen)
+
+    def __len__(self):
+        return len(self.stamm)
+
+    def auswahl(self, zeilen:np.ndarray) -> "Roster":
+        """Roster mit den Personen 'zeilen' (aufsteigend) aus den bereits umgeformten Tabellen, z.B. für die
+           geänderten Zeilen eines Blocks (siehe ErgebnisCache.pruefe()). Die Lehrgangscodes werden übernommen."""
+        neu = np.full(len(self), -1, dtype=np.int32)
+        neu[zeilen] = np.arange(len(zeilen), dtype=np.int32)
+        stamm = self.stamm.iloc[zeilen].reset_index(drop=True)
+        tabellen = {}
+        for abschnitt, tabelle in self.tabellen.items():
+            person = neu[tabelle["person"].to_numpy()]
+            behalten = person >= 0
+            teil = tabelle.loc[behalten].reset_index(drop=True)
+            teil["person"] = person[behalten]
+            tabellen[abschnitt] = teil
+        return Roster(stamm, tabellen, self.lehrgangsnamen)
+
+    def personen(self, stichtag:datetime):
+        """Erzeugt nacheinander die `Person` Objekte aller Zeilen zum Stichtag."""
+        for i in range(len(self)):
+            yield self.person(i, stichtag)
+
+    def dienstzeiten(self, stichtag:datetime) -> "Dienstzeiten":
+        """Dienstzeiten aller Personen zum Stichtag (wird je Stichtag nur einmal berechnet)."""
+        if self._dienstzeiten is None or self._dienstzeiten.stichtag != stichtag:
+            with profiler.messen("dienstzeiten"):
+                self._dienstzeiten = Dienstzeiten(self, stichtag)
+        return self._dienstzeiten
+
+    def merkmale(self, stichtag:datetime) -> "Merkmale":
+        """Spaltenorientierte Personenprofile zum Stichtag (wird je Stichtag nur einmal berechnet)."""
+        if self._merkmale is None or self._merkmale.stichtag != stichtag:
+            with profiler.messen("merkmale"):
+                self._merkmale = Merkmale(self, stichtag)
+        return self._merkmale
+
+    def _eintraege(self, abschnitt:AbschnittEnum, i:int, stichtag:date):
+        """Einträge (name, von, bis, status) der i-ten Person in einem Abschnitt; offene Einträge enden am Stichtag."""
+        beginn, ende = self._grenzen[abschnitt][i], self._grenzen[abschnitt][i + 1]
+        namen, namenskategorien, von, bis, status, statuskategorien = self._spalten[abschnitt]
+        for j in range(beginn, ende):
+            yield (namenskategorien[namen[j]], _zu_datum(von[j], None), _zu_datum(bis[j], stichtag),
+                   statuskategorien[status[j]])
+
+    def person(self, i:int, stichtag:datetime) -> Person:
+        """Erzeugt das `Person` Objekt der i-ten Zeile des Exports mit den Dienstzeiten zum Stichtag."""
+        if self._stammspalten is None:
+            # Stammdaten einmal als Objekt-Arrays, der Zugriff je Person über pandas (.iat) ist deutlich langsamer
+            self._stammspalten = {spalte: self.stamm[spalte].to_numpy(dtype=object) for spalte in
+                                  ("Vorname", "Nachname", "Geburtsdatum", "Geschlecht", "PersonalNr", "Einstellungsdatum")}
+        s = self._stammspalten
+        tag = stichtag.date() if isinstance(stichtag, datetime) else stichtag
+        p = Person(Vorname=s["Vorname"][i],
+                   Nachname=s["Nachname"][i],
+                   Geburtsdatum=None if pd.isna(s["Geburtsdatum"][i]) else s["Geburtsdatum"][i].date(),
+                   Geschlecht=s["Geschlecht"][i],
+                   PersonalNr=s["PersonalNr"][i],)
+        if pd.notna(s["Einstellungsdatum"][i]):
+            p.Einstellungsdatum = s["Einstellungsdatum"][i].date()
+        logger.debug("Lese Datensatz: %s", p.PersonalNr)
+
+        p.Abteilungen = sorted((Abteilung(name=name, von=von, bis=bis)
+                                for name, von, bis, status in self._eintraege(AbschnittEnum.ABTEILUNG, i, tag)),
+                               key=lambda abt: abt.bis)
+        p.Dienstgrade = [Dienstgrad(name=name, von=von, bis=bis)
+                         for name, von, bis, status in self._eintraege(AbschnittEnum.DIENSTGRAD, i, tag)]
+        if len(p.Dienstgrade)==0:
+            logger.warning("Kein Dienstgrad eingetragen für %s,%s. Schreibe %s von %s bis %s", p.Nachname, p.Vorname,
+                           Dienstgrad.Reihenfolge_M_neu[0], tag.strftime('%d.%m.%Y'), tag.strftime('%d.%m.%Y'))
+            p.Dienstgrade.append(Dienstgrad(name=Dienstgrad.Reihenfolge_M_neu[0], von=tag, bis=tag))
+        p.Dienstgrade = sorted(p.Dienstgrade, key=lambda dg: dg.bis)
+        p.Amter = [Amt(name=name, von=von, bis=bis)
+                   for name, von, bis, status in self._eintraege(AbschnittEnum.DIENSTSTELLUNG, i, tag)]
+        p.Lehrgange = [Lehrgang(name=name, von=von, bis=bis, bestanden=status, code=self.lehrgangsnamen.code(name))
+                       for name, von, bis, status in self._eintraege(AbschnittEnum.LEHRGANG, i, tag)]
+        p.Beurlaubungen = [Beurlaubung(name=name, von=von, bis=bis, grund=grund)
+                           for name, von, bis, grund in self._eintraege(AbschnittEnum.BEURLAUBUNG, i, tag)]
+        p.Dienstzeiten = self.dienstzeiten(stichtag).fuer(i)
+        return p
+
+
+def _tag(datum:date) -> int:
+    """Datum als Anzahl Tage (wie in den Tabellen des Rosters)."""
+    return date(datum.year, datum.month, datum.day).toordinal() - _EPOCHE
+
+def _tage(werte:pd.Series, ersatz:int) -> np.ndarray:
+    """Datumsspalte als Anzahl Tage (int64); NaT wird durch 'ersatz' ersetzt."""
+    tage = werte.to_numpy(dtype="datetime64[D]")
+    return np.where(np.isnat(tage), ersatz, tage.astype(np.int64))
+
+def _mindest_tage(jahre:float) -> int:
+    """Kleinste Anzahl Tage, für die tage/365 >= jahre gilt (gleiche Rechnung wie in den Prüfungen)."""
+    tage = math.ceil(jahre * 365)
+    while tage > 0 and (tage - 1) / 365 >= jahre:
+        tage -= 1
+    while tage / 365 < jahre:
+        tage += 1
+    return tage
+
+# Kein bestandener Lehrgang / kein Termin im betrachteten Zeitraum
+KEIN_ABSCHLUSS = -2**63  # kleinster int64 Wert
+KEIN_TAG = 2**63 - 1     # größter int64 Wert
+
+def _lehrgang_ende(roster:"Roster", tag:int) -> dict:
+    """Spätestes Ende je bestandenem Lehrgang und Person (KEIN_ABSCHLUSS, falls nicht bestanden).
+       Ein Lehrgang ohne Enddatum endet am Stichtag 'tag'."""
+    lg = roster.tabellen[AbschnittEnum.LEHRGANG]
+    person = lg["person"].to_numpy(dtype=np.int64)
+    bis = _tage(lg["bis"], tag)
+    codes = lg["code"].to_numpy()
+    bestanden = lg["status"].astype(object).to_numpy() == Lehrgang.status.BESTANDEN
+    ende = {}
+    for lehrgang in LehrgangEnum:
+        m = bestanden & (codes == Lehrgang.CODES[lehrgang.value])
+        ende[lehrgang] = np.full(len(roster), KEIN_ABSCHLUSS, dtype=np.int64)
+        np.maximum.at(ende[lehrgang], person[m], bis[m])
+    return ende
+
+
+class Dienstzeiten():
+    """Dienstzeiten aller Personen eines Rosters zu einem Stichtag.
+       `index[abteilung]` ist der Intervallindex der Zeitabschnitte in der Abteilung (None = alle Abteilungen) ohne
+       Beurlaubungen; offene Mitgliedschaften und Beurlaubungen laufen weiter, Abfragen enden am Stichtag.
+       `tage[(abteilung, lehrgang)]` enthält je Person die Tage bis zum Stichtag, bei angegebenem Lehrgang erst ab
+       dessen spätestem bestandenen Abschluss."""
+    def __init__(self, roster:"Roster", stichtag:datetime):
+        self.stichtag = stichtag
+        self.tage = {}
+        anzahl = len(roster)
+        tag = _tag(stichtag)
+
+        abt = roster.tabellen[AbschnittEnum.ABTEILUNG]
+        person = abt["person"].to_numpy(dtype=np.int64)
+        von = _tage(abt["von"], tag)
+        bis = _tage(abt["bis"], _TAG_MAX)
+        namen = abt["name"].astype(object).to_numpy()
+        urlaub = roster.tabellen[AbschnittEnum.BEURLAUBUNG]
+        urlaub = (urlaub["person"].to_numpy(dtype=np.int64), _tage(urlaub["von"], tag), _tage(urlaub["bis"], _TAG_MAX))
+
+        self.index = {None: Intervallindex(person, von, bis, anzahl, urlaub)}
+        for abteilung in (AbteilungEnum.FF, AbteilungEnum.JF):
+            m = namen == abteilung.value
+            self.index[abteilung] = Intervallindex(person[m], von[m], bis[m], anzahl, urlaub)
+        for abteilung, index in self.index.items():
+            self.tage[(abteilung, None)] = index.tage_bis(tag)
+
+        # nach einem Lehrgang: Tage bis zum Stichtag abzüglich der Tage bis zum Abschluss
+        ff = self.index[AbteilungEnum.FF]
+        for lehrgang, ende in _lehrgang_ende(roster, tag).items():
+            mit_abschluss = np.flatnonzero(ende != KEIN_ABSCHLUSS)
+            tage = np.zeros(anzahl, dtype=np.int64)
+            tage[mit_abschluss] = (self.tage[(AbteilungEnum.FF, None)][mit_abschluss]
+                                   - ff.tage_bis(np.minimum(ende[mit_abschluss], tag), mit_abschluss))
+            self.tage[(AbteilungEnum.FF, lehrgang)] = tage
+
+    def fuer(self, i:int) -> dict:
+        """Vorberechnete Dienstzeiten (in Tagen) der i-ten Person."""
+        return {key: int(werte[i]) for key, werte in self.tage.items()}
+
+
+class Merkmale():
+    """Spaltenorientierte Personenprofile (vgl. PersonProfile) aller Personen eines Rosters zum Stichtag.
+       Je Merkmal ein Array mit einem Wert je Person: bestandene Lehrgänge als Bitmaske, Dienstjahre,
+       Anzahl technischer Lehrgänge und aktueller Dienstgrad. Ohne 'dienstzeiten' werden die Dienstzeiten des
+       Rosters zum Stichtag verwendet (siehe Roster.dienstzeiten())."""
+    def __init__(self, roster:"Roster", stichtag:datetime, dienstzeiten:"Dienstzeiten | None"=None):
+        self.stichtag = stichtag
+        anzahl = len(roster)
+        tag = _tag(stichtag)
+        if dienstzeiten is None:
+            dienstzeiten = roster.dienstzeiten(stichtag)
+        self.jahre = {key: tage / 365 for key, tage in dienstzeiten.tage.items()}
+
+        lg = roster.tabellen[AbschnittEnum.LEHRGANG]
+        person = lg["person"].to_numpy(dtype=np.int64)
+        bestanden = lg["status"].astype(object).to_numpy() == Lehrgang.status.BESTANDEN
+        codes = lg["code"].to_numpy()
+        bits = np.where(codes >= 0, np.left_shift(1, codes.astype(np.int64)), 0)
+        self.bestanden = np.zeros(anzahl, dtype=np.int64)
+        np.bitwise_or.at(self.bestanden, person[bestanden], bits[bestanden])
+        technisch = bestanden & (bits & PersonProfile.TECHNISCH_MASKE != 0)
+        self.anzTech = np.bincount(person[technisch], minlength=anzahl)
+
+        # aktueller Dienstgrad: Eintrag mit dem spätesten Ende, bei gleichem Ende der mit der höheren lfd. Nr.
+        dg = roster.tabellen[AbschnittEnum.DIENSTGRAD]
+        dg_person = dg["person"].to_numpy(dtype=np.int64)
+        order = np.lexsort((dg["slot"].to_numpy(), _tage(dg["bis"], tag), dg_person))
+        letzter = np.ones(len(order), dtype=bool)
+        letzter[:-1] = dg_person[order][1:] != dg_person[order][:-1]
+        self.dienstgrad = np.full(anzahl, None, dtype=object)
+        self.dienstgrad[dg_person[order][letzter]] = dg["name"].astype(object).to_numpy()[order][letzter]
+        # ohne Dienstgrad gilt der niedrigste (gemeldet von der Datenprüfung, Befund.KEIN_DIENSTGRAD)
+        self.dienstgrad[pd.isna(self.dienstgrad)] = Dienstgrad.Reihenfolge_M_neu[0]
+
+
+    def mit_lehrgang(self, lehrgang:LehrgangEnum, tage_nach:np.ndarray) -> "Merkmale":
+        """Merkmale, als hätten alle Personen den Lehrgang zusätzlich bestanden (z.B. für die Lehrgangsplanung),
+           mit 'tage_nach' Tagen Dienstzeit FF nach dem Abschluss."""
+        merkmale = copy.copy(self)
+        bit = PersonProfile.BIT[lehrgang]
+        merkmale.bestanden = self.bestanden | bit
+        if bit & PersonProfile.TECHNISCH_MASKE:
+            merkmale.anzTech = self.anzTech + ((self.bestanden & bit) == 0)
+        merkmale.jahre = {**self.jahre, (AbteilungEnum.FF, lehrgang): tage_nach / 365}
+        return merkmale
+
+
+class Prognose():
+    """Frühester Termin je Person und Dienstgrad, zu dem die Voraussetzungen des Regelwerks erfüllt sind.
+       Die Dienstzeiten wachsen monoton mit dem Stichtag. Deshalb wird je Bedingung (z.B. 6 Jahre nach GF2)
+       der Termin per Intervallhalbierung für alle Personen gleichzeitig gelöst, jeder Schritt ist eine Abfrage
+       des Intervallindex (siehe Dienstzeiten).
+       Annahmen: offene Mitgliedschaften und Beurlaubungen laufen weiter, es kommen keine weiteren Lehrgänge hinzu."""
+    def __init__(self, roster:"Roster", regelwerk:Regelwerk, stichtag:datetime, jahre:int):
+        self.roster = roster
+        self.regelwerk = regelwerk
+        self.stichtag = stichtag
+        self.jahre = jahre
+        self._anzahl = len(roster)
+        self._beginn = _tag(stichtag)
+        self._ende = self._beginn + round(jahre * 365.25)
+
+        # Intervallindex je Abteilung, offene Mitgliedschaften und Beurlaubungen laufen weiter
+        self._index = roster.dienstzeiten(stichtag).index
+        self._lehrgang_ende = _lehrgang_ende(roster, self._beginn)
+        self._termine = {}
+
+    def _dienstzeit(self, t:np.ndarray, abteilung:AbteilungEnum, lehrgang:LehrgangEnum | None) -> np.ndarray:
+        """Dienstzeit in Tagen je Person zum Stichtag t (ein Tag je Person)."""
+        index = self._index[abteilung]
+        if lehrgang is None:
+            return index.tage_bis(t)
+        beginn = self._lehrgang_ende[lehrgang]
+        return np.where(beginn != KEIN_ABSCHLUSS, index.tage(beginn, t), 0)
+
+    def _termin(self, abteilung:AbteilungEnum, lehrgang:LehrgangEnum | None, jahre:float) -> np.ndarray:
+        """Frühester Tag je Person mit mindestens 'jahre' Dienstjahren (KEIN_TAG, falls nicht im Prognosezeitraum)."""
+        key = (abteilung, lehrgang, jahre)
+        if key in self._termine:
+            return self._termine[key]
+        ziel = _mindest_tage(jahre)
+        hi = np.full(self._anzahl, self._ende, dtype=np.int64)
+        erreicht = self._dienstzeit(hi, abteilung, lehrgang) >= ziel
+        lo = np.where(erreicht, self._beginn, self._ende)
+        while (lo < hi).any():
+            mitte = (lo + hi) // 2
+            ok = self._dienstzeit(mitte, abteilung, lehrgang) >= ziel
+            hi = np.where(ok, mitte, hi)
+            lo = np.where(ok, lo, mitte + 1)
+        self._termine[key] = np.where(erreicht, lo, KEIN_TAG)
+        return self._termine[key]
+
+    def termine(self) -> pd.DataFrame:
+        """Frühester Tag (als Anzahl Tage) je Person und Dienstgrad, KEIN_TAG falls nicht im Prognosezeitraum."""
+        merkmale = self.roster.merkmale(self.stichtag)
+        spalten = {}
+        for dg, kompiliert in self.regelwerk._kompiliert.items():
+            termin = np.full(self._anzahl, KEIN_TAG, dtype=np.int64)
+            for alle, eines, regel in kompiliert:
+                t = np.full(self._anzahl, self._beginn, dtype=np.int64)
+                if regel.jahreFF:
+                    t = np.maximum(t, self._termin(AbteilungEnum.FF, None, regel.jahreFF))
+                if regel.jahreJF:
+                    t = np.maximum(t, self._termin(AbteilungEnum.JF, None, regel.jahreJF))
+                if regel.nach:
+                    t = np.maximum(t, self._termin(AbteilungEnum.FF, regel.nach[0], regel.nach[1]))
+                t = np.where(Regelwerk._statisch(merkmale, alle, eines, regel), t, KEIN_TAG)
+                termin = np.minimum(termin, t)
+            spalten[dg] = termin
+        return pd.DataFrame(spalten)
+
+    def tabelle(self) -> pd.DataFrame:
+        """Prognosetabelle: je Person der früheste Termin für alle Dienstgrade oberhalb des aktuellen."""
+        merkmale = self.roster.merkmale(self.stichtag)
+        termine = self.termine()
+        position = np.array([self.regelwerk.position.get(dg, len(termine.columns)) for dg in merkmale.dienstgrad])
+        tabelle = pd.DataFrame({"Nachname": self.roster.stamm["Nachname"],
+                                "Vorname": self.roster.stamm["Vorname"],
+                                "akt. Dienstgrad": merkmale.dienstgrad})
+        for i, dg in enumerate(termine.columns):
+            werte = termine[dg].to_numpy()
+            gueltig = (werte != KEIN_TAG) & (position < i)
+            datum = np.where(gueltig, werte, 0).astype("datetime64[D]").astype(datetime)
+            tabelle[dg] = [d.strftime("%d.%m.%Y") if g else "" for d, g in zip(datum, gueltig)]
+        tabelle[f"Prognose ab {self.stichtag.strftime('%d.%m.%Y')} für {self.jahre} Jahre"] = ""
+        return tabelle
+
+
+def maximales_matching(nachbarn:list, anzahl_rechts:int) -> list:
+    """Maximales Matching eines bipartiten Graphen nach Hopcroft-Karp in O(E * sqrt(V)).
+       nachbarn[l] sind die rechten Knoten, die mit dem linken Knoten l verbunden werden können (in der Reihenfolge
+       der Bevorzugung). Liefert je linkem Knoten den zugeordneten rechten Knoten oder -1."""
+    links = [-1] * len(nachbarn)
+    rechts = [-1] * anzahl_rechts
+    # Startlösung: jeder linke Knoten nimmt den ersten freien Nachbarn
+    for l, kanten in enumerate(nachbarn):
+        for r in kanten:
+            if rechts[r] < 0:
+                links[l], rechts[r] = r, l
+                break
+    while True:
+        # Breitensuche: Schichten alternierender Pfade ab allen freien linken Knoten
+        abstand = [0 if r < 0 else -1 for r in links]
+        schlange = collections.deque(l for l, r in enumerate(links) if r < 0)
+        erweiterbar = False
+        while schlange:
+            l = schlange.popleft()
+            for r in nachbarn[l]:
+                partner = rechts[r]
+                if partner < 0:
+                    erweiterbar = True
+                elif abstand[partner] < 0:
+                    abstand[partner] = abstand[l] + 1
+                    schlange.append(partner)
+        if not erweiterbar:
+            return links
+        # Tiefensuche (iterativ) entlang der Schichten; jeder gefundene Pfad vergrößert das Matching um eins
+        naechste = [0] * len(nachbarn)
+        for start in range(len(nachbarn)):
+            if links[start] >= 0:
+                continue
+            pfad, ueber = [start], []
+            while pfad:
+                l = pfad[-1]
+                if naechste[l] == len(nachbarn[l]):
+                    abstand[l] = -1  # Sackgasse, in dieser Runde nicht erneut besuchen
+                    pfad.pop()
+                    if ueber:
+                        ueber.pop()
+                    continue
+                r = nachbarn[l][naechste[l]]
+                naechste[l] += 1
+                partner = rechts[r]
+                if partner < 0:
+                    ueber.append(r)
+                    for l2, r2 in zip(pfad, ueber):
+                        links[l2], rechts[r2] = r2, l2
+                    break
+                if abstand[partner] == abstand[l] + 1:
+                    pfad.append(partner)
+                    ueber.append(r)
+
+
+class Stellenplan():
+    """Soll-Stellen der Dienststellungen/Funktionen je Art der Feuerwehr und die Voraussetzungen je Dienststellung.
+       Format der JSON-Datei (siehe doc/Stellenplan_Beispiel.json):
+         {"standard": "Grundausstattung",
+          "feuerwehren": {"Musterhausen, OF": "Stützpunktfeuerwehr"},
+          "typen": {"Grundausstattung": {"Gruppenführer": 2, ...}, ...},
+          "dienststellungen": {"Gruppenführer": {"mindest_dienstgrad": "LM", "regeln": [{"lehrgaenge": ["GF1", "GF2"]}]}}}
+       'feuerwehren' ordnet die Organisation aus dem Export einer Art zu, alle anderen gelten als 'standard'
+       (ohne 'standard' werden sie nicht geplant). Die Regeln haben das Format von Regelwerk.aus_json(),
+       mehrere Regeln sind ODER-verknüpft; eine Dienststellung ohne Regeln hat keine Voraussetzungen."""
+    def __init__(self, typen:dict, dienststellungen:dict, feuerwehren:dict | None=None, standard:str | None=None):
+        self.typen = typen
+        self.feuerwehren = feuerwehren or {}
+        self.standard = standard
+        for typ in [standard, *self.feuerwehren.values()]:
+            if typ is not None and typ not in typen:
+                raise ValueError(f"Unbekannte Art der Feuerwehr '{typ}' im Stellenplan.")
+        self.anforderungen = {}
+        for name in dict.fromkeys(name for stellen in typen.values() for name in stellen):
+            angaben = dienststellungen.get(name, {})
+            regeln = tuple(Regel.aus_dict(r) for r in angaben.get("regeln", ())) or (Regel(),)
+            self.anforderungen[name] = (tuple(Regelwerk._kompiliere(regel) for regel in regeln),
+                                        angaben.get("mindest_dienstgrad"))
+
+    @classmethod
+    def aus_json(cls, datei:str):
+        with open(datei, encoding="utf-8") as fp:
+            daten = json.load(fp)
+        return cls(daten["typen"], daten.get("dienststellungen", {}), daten.get("feuerwehren"), daten.get("standard"))
+
+    @staticmethod
+    def schluessel(name) -> str:
+        """Vergleichsform einer Dienststellung (Groß-/Kleinschreibung und Leerzeichen egal)."""
+        return " ".join(str(name).split()).casefold()
+
+    def typ(self, organisation) -> str | None:
+        return self.feuerwehren.get(organisation, self.standard)
+
+    def qualifiziert(self, merkmale:Merkmale, regelwerk:Regelwerk) -> dict:
+        """Je Dienststellung eine boolesche Spalte: Person erfüllt die Voraussetzungen."""
+        position = np.array([regelwerk.position.get(dg, -1) for dg in merkmale.dienstgrad])
+        spalten = {}
+        for name, (kompiliert, mindest_dienstgrad) in self.anforderungen.items():
+            ok = Regelwerk._erfuellt_alle(merkmale, kompiliert)
+            if mindest_dienstgrad:
+                if mindest_dienstgrad not in regelwerk.position:
+                    raise ValueError(f"Dienstgrad '{mindest_dienstgrad}' ({name}) ist im Regelwerk '{regelwerk.name}' unbekannt.")
+                ok &= position >= regelwerk.position[mindest_dienstgrad]
+            spalten[name] = ok
+        return spalten
+
+
+def plane_stellen(roster:Roster, kontext:Kontext, stellenplan:Stellenplan, kandidaten:int=3) -> pd.DataFrame:
+    """Besetzung der Soll-Stellen je Organisation (Spalte 'Organisation' des Exports) zum Stichtag.
+       Mitglieder, die die Dienststellung am Stichtag innehaben, behalten ihre Stelle. Die übrigen Stellen werden mit
+       einem maximalen Matching (maximales_matching()) aus den qualifizierten Mitgliedern derselben Organisation
+       ohne eigene Stelle besetzt, bevorzugt mit der längsten Dienstzeit in der Einsatzabteilung.
+       Je Stelle werden zusätzlich die 'kandidaten' besten qualifizierten Mitglieder ausgegeben."""
+    stichtag = kontext.stichtag
+    merkmale = roster.merkmale(stichtag)
+    qualifiziert = stellenplan.qualifiziert(merkmale, kontext.regelwerk)
+    jahreFF = merkmale.jahre[(AbteilungEnum.FF, None)]
+    stamm = roster.stamm
+    organisation = stamm["Organisation"].astype(object).to_numpy()
+    personalnr = stamm["PersonalNr"].to_numpy()
+    namen = [f"{n}, {v}" for n, v in zip(stamm["Nachname"], stamm["Vorname"])]
+    schluessel = {stellenplan.schluessel(name): name for name in stellenplan.anforderungen}
+
+    # Dienststellungen, die am Stichtag besetzt sind
+    ds = roster.tabellen[AbschnittEnum.DIENSTSTELLUNG]
+    tag = _tag(stichtag)
+    aktiv = (_tage(ds["von"], tag) <= tag) & (_tage(ds["bis"], tag) >= tag)
+    inhaber = collections.defaultdict(list)
+    for person, name in zip(ds["person"].to_numpy()[aktiv], ds["name"].astype(object).to_numpy()[aktiv]):
+        name = schluessel.get(stellenplan.schluessel(name))
+        if name is not None:
+            inhaber[(organisation[person], name)].append(int(person))
+
+    # Stellen: (Organisation, Typ, Dienststellung, Nr.) mit Inhaber oder -1
+    stellen = []
+    mit_stelle = set()
+    ohne_typ = set()
+    for org in dict.fromkeys(organisation):
+        typ = stellenplan.typ(org)
+        if typ is None:
+            ohne_typ.add(org)
+            continue
+        for name, anzahl in stellenplan.typen[typ].items():
+            bisher = inhaber.get((org, name), [])[:anzahl]
+            mit_stelle.update(bisher)
+            stellen += [(org, typ, name, nr + 1, bisher[nr] if nr < len(bisher) else -1) for nr in range(anzahl)]
+    if ohne_typ:
+        logger.warning("Keine Art der Feuerwehr im Stellenplan für: %s", ", ".join(map(str, ohne_typ)))
+
+    # Kandidaten je (Organisation, Dienststellung), längste Dienstzeit FF zuerst
+    reihenfolge = np.argsort(-jahreFF, kind="stable")
+    geeignet = collections.defaultdict(list)
+    for name, ok in qualifiziert.items():
+        for person in reihenfolge[ok[reihenfolge]]:
+            geeignet[(organisation[person], name)].append(int(person))
+
+    offen = [i for i, stelle in enumerate(stellen) if stelle[4] < 0]
+    nachbarn = [[p for p in geeignet[(stellen[i][0], stellen[i][2])] if p not in mit_stelle] for i in offen]
+    with profiler.messen("matching"):
+        zuordnung = maximales_matching(nachbarn, len(roster))
+
+    zeilen = []
+    vorgeschlagen = dict(zip(offen, zuordnung))
+    for i, (org, typ, name, nr, person) in enumerate(stellen):
+        if person >= 0:
+            status = "besetzt" if qualifiziert[name][person] else "besetzt, Voraussetzungen nicht erfüllt"
+        else:
+            person = vorgeschlagen[i]
+            status = "vorgeschlagen" if person >= 0 else "offen"
+        liste = [p for p in geeignet[(org, name)] if p != person][:kandidaten]
+        zeilen.append((org, typ, name, nr, status,
+                       personalnr[person] if person >= 0 else None,
+                       namen[person] if person >= 0 else None,
+                       " | ".join(f"{namen[p]} ({personalnr[p]}, {jahreFF[p]:.1f} Jahre)" for p in liste)))
+    tabelle = pd.DataFrame(zeilen, columns=["Organisation", "Art", "Dienststellung", "Nr.", "Status", "Personal-Nr.",
+                                            "Name", "Kandidaten"])
+    anzahl = tabelle["Status"].value_counts()
+    logger.info("Stellenplan: %s Stellen, %s besetzt, %s vorgeschlagen, %s offen", len(tabelle),
+                len(tabelle) - anzahl.get("vorgeschlagen", 0) - anzahl.get("offen", 0),
+                anzahl.get("vorgeschlagen", 0), anzahl.get("offen", 0))
+    return tabelle
+
+def verteile_plaetze(kandidaten:dict, plaetze:dict, reihenfolge:np.ndarray) -> dict:
+    """Verteilt Plätze so, dass möglichst viele Personen einen Platz erhalten: kandidaten[lehrgang] ist je Person wahr,
+       wenn ihr ein Platz in diesem Lehrgang nützt, plaetze[lehrgang] die Anzahl der Plätze; jede Person erhält höchstens
+       einen Platz. Gelöst als maximales Matching (maximales_matching()) mit einem rechten Knoten je Platz, das Ergebnis
+       ist daher optimal. Die Startlösung vergibt die Plätze in der 'reihenfolge' der Personen; wer dort einen Platz
+       erhält, behält einen (ggf. in einem anderen Lehrgang). Liefert {Person: Lehrgang}."""
+    lehrgaenge = [lehrgang for lehrgang, anzahl in plaetze.items() if anzahl > 0]
+    if not lehrgaenge:
+        return {}
+    grenzen = np.cumsum([0] + [plaetze[lehrgang] for lehrgang in lehrgaenge])
+    moeglich = np.logical_or.reduce([kandidaten[lehrgang] for lehrgang in lehrgaenge])
+    personen = [int(person) for person in reihenfolge if moeglich[person]]
+    nachbarn = [[platz for k, lehrgang in enumerate(lehrgaenge) if kandidaten[lehrgang][person]
+                 for platz in range(grenzen[k], grenzen[k + 1])] for person in personen]
+    zuordnung = maximales_matching(nachbarn, int(grenzen[-1]))
+    lehrgang_je_platz = np.repeat(np.arange(len(lehrgaenge)), np.diff(grenzen))
+    return {person: lehrgaenge[lehrgang_je_platz[platz]] for person, platz in zip(personen, zuordnung) if platz >= 0}
+
+
+class Lehrgangsplanung():
+    """Verteilung einer begrenzten Zahl von Lehrgangsplätzen (z.B. GF1, GF2, ZF1, ZF2, TF an der Kreisausbildung), sodass
+       bis zum Ende des Planungszeitraums möglichst viele Ziele erreicht werden:
+         - Beförderung: die Voraussetzungen für den nächsthöheren Dienstgrad sind erfüllt (Regelwerk),
+         - Stelle (nur mit Stellenplan): das Mitglied ist für eine Soll-Stelle seiner Organisation qualifiziert, für die
+           es sonst nicht genug qualifizierte Mitglieder gibt.
+       Annahmen: jedes Mitglied erhält höchstens einen Platz und besteht den Lehrgang zu Beginn des Zeitraums (Stichtag),
+       offene Mitgliedschaften laufen weiter (wie in der Prognose). Einen Platz erhalten nur Mitglieder der
+       Einsatzabteilung, die den Lehrgang noch nicht bestanden haben und seine Voraussetzungen erfüllen (VORAUSSETZUNGEN).
+
+       Je Lehrgang werden die Regeln einmal vektorisiert für alle Personen ausgewertet (Merkmale.mit_lehrgang()), daraus
+       ergibt sich der Gewinn je Person und Lehrgang. Ohne Stellenplan ist das einzige Ziel die Beförderung, die Plätze
+       werden dann optimal als maximales Matching verteilt (verteile_plaetze()). Mit Stellenplan hängt der Gewinn auch von
+       den noch fehlenden Stellen der Organisation ab; die Verteilung ist dann eine Heuristik ohne Garantie, dass sie
+       optimal ist: die Plätze werden nach dem größten Gewinn vergeben (Greedy mit Heap). Nach einer Vergabe ändert sich
+       nur der Stellenanteil der Kandidaten derselben Organisation; er wird erst neu berechnet, wenn ein Kandidat oben im
+       Heap liegt (verzögerte Neubewertung), da Gewinne nur sinken können."""
+    # Übliche Reihenfolge der Ausbildung: Voraussetzungen für die Teilnahme an einem Lehrgang (Format wie im Regelwerk)
+    VORAUSSETZUNGEN = {
+        LehrgangEnum.TF: Regel(einer_von=(LehrgangEnum.TM2, LehrgangEnum.QS2, LehrgangEnum.GA)),
+        LehrgangEnum.QS3: Regel(einer_von=(LehrgangEnum.TM2, LehrgangEnum.QS2, LehrgangEnum.GA)),
+        LehrgangEnum.GF1: Regel(einer_von=(LehrgangEnum.TF, LehrgangEnum.QS3)),
+        LehrgangEnum.GF2: Regel(lehrgaenge=(LehrgangEnum.GF1,)),
+        LehrgangEnum.ZF1: Regel(lehrgaenge=(LehrgangEnum.GF2,)),
+        LehrgangEnum.ZF2: Regel(lehrgaenge=(LehrgangEnum.ZF1,)),
+        LehrgangEnum.LFW: Regel(lehrgaenge=(LehrgangEnum.ZF2,)),
+    }
+
+    def __init__(self, roster:Roster, kontext:Kontext, plaetze:dict, jahre:float, stellenplan:Stellenplan | None=None):
+        """'plaetze': Anzahl Plätze je Lehrgang ({LehrgangEnum: Anzahl}, siehe parse_lehrgangsplaetze()),
+           'jahre': Planungszeitraum ab dem Stichtag."""
+        self.roster = roster
+        self.kontext = kontext
+        self.plaetze = dict(plaetze)
+        self.jahre = jahre
+        regelwerk = kontext.regelwerk
+        beginn = _tag(kontext.stichtag)
+        ende = beginn + round(jahre * 365.25)
+        self.ende = datetime.combine(date.fromordinal(ende + _EPOCHE), datetime.min.time())
+        with profiler.messen("lehrgangsplanung"):
+            # nicht über roster.merkmale(), damit dessen Stand zum Stichtag (z.B. für die Dossiers) erhalten bleibt
+            dienstzeiten = Dienstzeiten(roster, self.ende)
+            merkmale = Merkmale(roster, self.ende, dienstzeiten)
+            self.merkmale = merkmale
+            # Dienstzeit FF im Planungszeitraum = Dienstzeit nach einem zu Beginn bestandenen Lehrgang
+            tage_nach = dienstzeiten.index[AbteilungEnum.FF].tage(beginn, ende)
+            aktiv = tage_nach > 0
+
+            # nächsthöherer Dienstgrad je Person (-1: unbekannter oder höchster Dienstgrad)
+            position = np.array([regelwerk.position.get(dg, -2) for dg in merkmale.dienstgrad]) + 1
+            self.ziel = np.where((position > 0) & (position < len(regelwerk.reihenfolge_m)), position, -1)
+            basis = self._befoerderung(merkmale)
+
+            # Stellen: Soll je Organisation und Dienststellung abzüglich der am Ende qualifizierten Mitglieder
+            self.organisation, organisationen = pd.factorize(roster.stamm["Organisation"].astype(object), use_na_sentinel=False)
+            self.dienststellungen = tuple(stellenplan.anforderungen) if stellenplan else ()
+            basis_qualifiziert = stellenplan.qualifiziert(merkmale, regelwerk) if stellenplan else {}
+            self.fehlend = np.zeros((len(organisationen), len(self.dienststellungen)), dtype=np.int64)
+            for k, name in enumerate(self.dienststellungen):
+                typen = [stellenplan.typ(org) for org in organisationen]
+                soll = np.array([stellenplan.typen[typ].get(name, 0) if typ else 0 for typ in typen], dtype=np.int64)
+                vorhanden = np.bincount(self.organisation[basis_qualifiziert[name]], minlength=len(organisationen))
+                self.fehlend[:, k] = np.maximum(soll - vorhanden, 0)
+
+            # Gewinn je Lehrgang: Beförderung erst mit dem Lehrgang erreichbar bzw. neu qualifizierte Dienststellungen
+            self.befoerderung = {}
+            self.stellen = {}
+            for lehrgang in self.plaetze:
+                alle, eines, regel = Regelwerk._kompiliere(self.VORAUSSETZUNGEN.get(lehrgang, Regel()))
+                geeignet = aktiv & ((merkmale.bestanden & PersonProfile.BIT[lehrgang]) == 0)
+                geeignet &= Regelwerk._statisch(merkmale, alle, eines, regel)
+                mit = merkmale.mit_lehrgang(lehrgang, tage_nach)
+                self.befoerderung[lehrgang] = geeignet & self._befoerderung(mit) & ~basis
+                neu = np.zeros((len(roster), len(self.dienststellungen)), dtype=bool)
+                if stellenplan:
+                    for k, (name, ok) in enumerate(stellenplan.qualifiziert(mit, regelwerk).items()):
+                        neu[:, k] = geeignet & ok & ~basis_qualifiziert[name]
+                self.stellen[lehrgang] = neu
+
+    def _befoerderung(self, merkmale:Merkmale) -> np.ndarray:
+        """Je Person: Voraussetzungen für den nächsthöheren Dienstgrad erfüllt."""
+        regelwerk = self.kontext.regelwerk
+        erfuellt = np.zeros(len(self.ziel), dtype=bool)
+        for k in np.unique(self.ziel[self.ziel >= 0]):
+            personen = self.ziel == k
+            erfuellt[personen] = Regelwerk._erfuellt_alle(merkmale, regelwerk._kompiliert[regelwerk.reihenfolge_m[k]])[personen]
+        return erfuellt
+
+    def _stelle(self, person:int, lehrgang:LehrgangEnum) -> int:
+        """Dienststellung (Index), für die die Person mit dem Lehrgang eine fehlende Stelle besetzen kann (-1: keine).
+           Bevorzugt wird die Dienststellung mit den meisten fehlenden Stellen."""
+        if not len(self.dienststellungen):
+            return -1
+        fehlend = np.where(self.stellen[lehrgang][person], self.fehlend[self.organisation[person]], 0)
+        k = int(np.argmax(fehlend))
+        return k if fehlend[k] > 0 else -1
+
+    def _greedy(self, jahreFF:np.ndarray) -> tuple:
+        """Heuristische Verteilung mit Stellenplan (siehe Klassenbeschreibung), liefert (vergeben, frei)."""
+        # obere Schranke des Gewinns je Person und Lehrgang; Personen mit weniger Möglichkeiten zuerst
+        gewinn = {lehrgang: self.befoerderung[lehrgang].astype(np.int64) + self.stellen[lehrgang].any(axis=1)
+                  for lehrgang in self.plaetze}
+        optionen = sum(((g > 0).astype(np.int64) for g in gewinn.values()), np.zeros(len(self.roster), dtype=np.int64))
+        heap = [(-int(g[person]), int(optionen[person]), -float(jahreFF[person]), int(person), lehrgang)
+                for lehrgang, g in gewinn.items() if self.plaetze[lehrgang] > 0 for person in np.flatnonzero(g)]
+        heapq.heapify(heap)
+        frei = dict(self.plaetze)
+        vergeben = {}
+        while heap and any(frei.values()):
+            eintrag = heapq.heappop(heap)
+            person, lehrgang = eintrag[3], eintrag[4]
+            if person in vergeben or frei[lehrgang] <= 0:
+                continue
+            befoerderung = bool(self.befoerderung[lehrgang][person])
+            stelle = self._stelle(person, lehrgang)
+            aktuell = befoerderung + (stelle >= 0)
+            if aktuell < -eintrag[0]:
+                if aktuell > 0:
+                    heapq.heappush(heap, (-aktuell, *eintrag[1:]))
+                continue
+            vergeben[person] = (lehrgang, befoerderung, stelle)
+            frei[lehrgang] -= 1
+            if stelle >= 0:
+                self.fehlend[self.organisation[person], stelle] -= 1
+        return vergeben, frei
+
+    def planen(self) -> pd.DataFrame:
+        """Vergibt die Plätze; eine Zeile je Platz (vergebene Plätze mit Mitglied und Ziel, sonst 'frei')."""
+        regelwerk = self.kontext.regelwerk
+        jahreFF = self.merkmale.jahre[(AbteilungEnum.FF, None)]
+        stamm = self.roster.stamm
+        with profiler.messen("lehrgangsplanung"):
+            if not self.dienststellungen:
+                # bei mehreren optimalen Verteilungen werden Mitglieder mit längerer Dienstzeit bevorzugt
+                verteilung = verteile_plaetze(self.befoerderung, self.plaetze, np.argsort(-jahreFF, kind="stable"))
+                vergeben = {person: (lehrgang, True, -1) for person, lehrgang in verteilung.items()}
+                frei = {lehrgang: anzahl - sum(ziel == lehrgang for ziel in verteilung.values())
+                        for lehrgang, anzahl in self.plaetze.items()}
+            else:
+                vergeben, frei = self._greedy(jahreFF)
+
+        zeilen = []
+        for person, (lehrgang, befoerderung, stelle) in vergeben.items():
+            ziele = []
+            if befoerderung:
+                ziele.append(f"Beförderung zum {regelwerk.reihenfolge_m[self.ziel[person]]}")
+            if stelle >= 0:
+                ziele.append(f"Stelle {self.dienststellungen[stelle]}")
+            zeilen.append((lehrgang.name, "vorgeschlagen", stamm["PersonalNr"].iat[person], stamm["Nachname"].iat[person],
+                           stamm["Vorname"].iat[person], stamm["Organisation"].iat[person], self.merkmale.dienstgrad[person],
+                           round(float(jahreFF[person]), 1), ", ".join(ziele)))
+        reihenfolge = {lehrgang.name: i for i, lehrgang in enumerate(self.plaetze)}
+        zeilen.sort(key=lambda zeile: (reihenfolge[zeile[0]], str(zeile[5]), str(zeile[3])))
+        for lehrgang, anzahl in frei.items():
+            zeilen += [(lehrgang.name, "frei", None, None, None, None, None, None, None)] * anzahl
+        tabelle = pd.DataFrame(zeilen, columns=["Lehrgang", "Status", "Personal-Nr.", "Nachname", "Vorname", "Organisation",
+                                                "akt. Dienstgrad", "Jahre FF", f"Ziel bis {self.ende.strftime('%d.%m.%Y')}"])
+        logger.info("Lehrgangsplanung: %s von %s Plätzen vergeben, %s Beförderungen und %s Stellen erreichbar",
+                    len(vergeben), sum(self.plaetze.values()), sum(v[1] for v in vergeben.values()),
+                    sum(v[2] >= 0 for v in vergeben.values()))
+        return tabelle
+
+
+def parse_lehrgangsplaetze(text:str) -> dict:
+    """Lehrgangsplätze aus 'GF1=10,GF2=8' (Lehrgänge über die Namen von LehrgangEnum)."""
+    plaetze = {}
+    for angabe in filter(None, (teil.strip() for teil in text.split(","))):
+        name, _, anzahl = angabe.partition("=")
+        if name.strip() not in LehrgangEnum.__members__ or not anzahl.strip().isdigit():
+            raise ValueError(f"Ungültige Angabe '{angabe}' für Lehrgangsplätze, erwartet z.B. 'GF1=10,GF2=8' "
+                             f"mit Lehrgängen aus {', '.join(LehrgangEnum.__members__)}.")
+        plaetze[LehrgangEnum[name.strip()]] = int(anzahl)
+    return plaetze
+
+
+def _summen_je_gruppe(gruppe:np.ndarray, anzahl:int, werte:np.ndarray) -> np.ndarray:
+    """Spaltensummen von 'werte' (Personen x Spalten) je Gruppe 0..anzahl-1 in einem Durchlauf
+       (Sortieren nach Gruppe, dann np.add.reduceat)."""
+    summen = np.zeros((anzahl, werte.shape[1]), dtype=werte.dtype)
+    if len(gruppe):
+        order = np.argsort(gruppe, kind="stable")
+        vorhanden, start = np.unique(gruppe[order], return_index=True)
+        summen[vorhanden] = np.add.reduceat(werte[order], start, axis=0)
+    return summen
+
+
+class Statistik():
+    """Kennzahlen je Organisation (Spalte 'Organisation' des Exports) zum Stichtag, je eine Tabelle:
+         - Befoerderungen: Anzahl Mitglieder, die die Voraussetzungen für einen Dienstgrad oberhalb des aktuellen erfüllen
+         - Dienstgrade:    Verteilung der aktuellen Dienstgrade (weibliche Abkürzungen zählen beim männlichen Dienstgrad)
+         - Dienstzeiten:   Dienstjahre in der Einsatzabteilung in Klassen (KLASSEN) und Mittelwert
+         - Lehrgaenge:     Anzahl Mitglieder mit bestandenem Lehrgang (z.B. GF2, ZF2)
+       Je Person werden alle Kennzahlen als eine Zeile von Indikatoren aufgebaut und in einem Durchlauf je Organisation
+       summiert. Die Summen sind additiv, deshalb kann der Export blockweise hinzugefügt werden (siehe main())."""
+    # Untergrenzen der Dienstzeitklassen in Jahren
+    KLASSEN = (0, 5, 10, 15, 20, 25, 30, 40)
+    OHNE_ORGANISATION = "(ohne Organisation)"
+
+    def __init__(self, kontext:Kontext):
+        self.kontext = kontext
+        regelwerk = kontext.regelwerk
+        klassen = [f"{von} bis unter {bis} Jahre" for von, bis in zip(self.KLASSEN, self.KLASSEN[1:])]
+        self.teile = {"Befoerderungen": list(regelwerk.reihenfolge_m),
+                      "Dienstgrade": list(regelwerk.reihenfolge_m) + ["unbekannt"],
+                      "Dienstzeiten": klassen + [f"ab {self.KLASSEN[-1]} Jahre"],
+                      "Lehrgaenge": [lehrgang.name for lehrgang in LehrgangEnum]}
+        # Summen je Organisation: Mitglieder, Dienstjahre FF, danach die Spalten der Teile
+        self.summen = {}
+
+    def hinzufuegen(self, roster:Roster):
+        """Zählt alle Personen des Rosters (z.B. eines Blocks) zu den Summen ihrer Organisation hinzu."""
+        regelwerk = self.kontext.regelwerk
+        merkmale = roster.merkmale(self.kontext.stichtag)
+        anzahl = len(roster)
+        zeilen = np.arange(anzahl)
+        with profiler.messen("statistik"):
+            matrix = regelwerk.auswerten(merkmale).to_numpy()
+            position = np.array([regelwerk.position.get(dg, -1) for dg in merkmale.dienstgrad], dtype=np.int64)
+            jahreFF = merkmale.jahre[(AbteilungEnum.FF, None)]
+
+            werte = np.zeros((anzahl, 2 + sum(map(len, self.teile.values()))))
+            werte[:, 0] = 1
+            werte[:, 1] = jahreFF
+            spalte = 2
+            werte[:, spalte:spalte + matrix.shape[1]] = matrix & (np.arange(matrix.shape[1])[None, :] > position[:, None])
+            spalte += len(self.teile["Befoerderungen"])
+            werte[zeilen, spalte + np.where(position >= 0, position, len(self.teile["Dienstgrade"]) - 1)] = 1
+            spalte += len(self.teile["Dienstgrade"])
+            werte[zeilen, spalte + np.searchsorted(self.KLASSEN, jahreFF, side="right") - 1] = 1
+            spalte += len(self.teile["Dienstzeiten"])
+            werte[:, spalte:] = (merkmale.bestanden[:, None] >> np.arange(len(self.teile["Lehrgaenge"]))[None, :]) & 1
+
+            # Organisationen als Codes der Kategorien, ohne Angabe als letzte Gruppe
+            kategorien = roster.stamm["Organisation"].cat
+            organisationen = list(kategorien.categories) + [self.OHNE_ORGANISATION]
+            gruppe = kategorien.codes.to_numpy().astype(np.int64)
+            gruppe[gruppe < 0] = len(organisationen) - 1
+            for org, summe in zip(organisationen, _summen_je_gruppe(gruppe, len(organisationen), werte)):
+                if summe[0]:
+                    if org in self.summen:
+                        self.summen[org] += summe
+                    else:
+                        self.summen[org] = summe
+
+    def tabellen(self) -> dict:
+        """Je Teil eine Tabelle mit einer Zeile je Organisation (sortiert) und der Zeile 'Gesamt'.
+           Dienstgrade, die nirgends vorkommen, werden weggelassen."""
+        organisationen = sorted(self.summen)
+        summen = np.array([self.summen[org] for org in organisationen]).reshape(-1, 2 + sum(map(len, self.teile.values())))
+        summen = np.vstack([summen, summen.sum(axis=0, keepdims=True)])
+        index = pd.Index(organisationen + ["Gesamt"], name="Organisation")
+        mitglieder = summen[:, 0].astype(np.int64)
+        tabellen = {}
+        spalte = 2
+        for name, spalten in self.teile.items():
+            tabelle = pd.DataFrame(summen[:, spalte:spalte + len(spalten)].astype(np.int64), index=index, columns=spalten)
+            spalte += len(spalten)
+            tabelle.insert(0, "Mitglieder", mitglieder)
+            tabellen[name] = tabelle
+        dienstgrade = tabellen["Dienstgrade"]
+        tabellen["Dienstgrade"] = dienstgrade.loc[:, (dienstgrade.loc["Gesamt"] > 0) | (dienstgrade.columns == "Mitglieder")]
+        tabellen["Dienstzeiten"]["Mittelwert Jahre"] = np.round(summen[:, 1] / np.maximum(mitglieder, 1), 2)
+        return tabellen
+
+    def schreiben(self, outputfile:Path) -> dict:
+        """Schreibt die Tabellen als <Ausgabe>_Statistik_<Tabelle>.csv."""
+        outputfile = Path(outputfile)
+        tabellen = self.tabellen()
+        for name, tabelle in tabellen.items():
+            tabelle.to_csv(outputfile.with_name(f"{outputfile.stem}_Statistik_{name}.csv"), sep=";", encoding="utf-8-sig")
+        logger.info("Statistik: %s Mitglieder in %s Organisationen", tabellen["Dienstgrade"]["Mitglieder"].iat[-1],
+                    len(tabellen["Dienstgrade"]) - 1)
+        return tabellen
+
+
+class Befund(enum.StrEnum):
+    """Regeln der Datenprüfung (siehe Datenpruefung)"""
+    PERSONALNR_FEHLT = "Personal-Nr. fehlt"
+    PERSONALNR_DOPPELT = "Personal-Nr. mehrfach im Export"
+    KEIN_DIENSTGRAD = "Kein Dienstgrad eingetragen, es wird der niedrigste Dienstgrad angenommen"
+    DIENSTGRAD_UNBEKANNT = "Aktueller Dienstgrad im Regelwerk unbekannt, Person wird nicht geprüft"
+    DIENSTGRAD_RUECKSCHRITT = "Dienstgrad niedriger als der vorherige"
+    BEGINN_FEHLT = "Beginn fehlt, es wird der Stichtag angenommen"
+    BEGINN_NACH_ENDE = "Beginn nach dem Ende"
+    UEBERSCHNEIDUNG = "Zeitraum überschneidet sich mit einem früheren Eintrag"
+    LEHRGANG_OHNE_STATUS = "Lehrgang ohne Status, zählt nicht als bestanden"
+    LEHRGANG_UNBEKANNT = "Lehrgangsbezeichnung keinem Lehrgang zugeordnet, wird nicht gewertet"
+
+
+class Datenpruefung():
+    """Prüfung der Exportdaten vor der Auswertung, spaltenweise für alle Personen eines Rosters (blockweise wie Statistik).
+       Gefunden werden fehlende oder doppelte Personal-Nr., fehlende und im Regelwerk unbekannte Dienstgrade,
+       Dienstgrade, die niedriger als der vorherige sind, fehlende Beginn-Daten, Zeiträume mit Beginn nach dem Ende,
+       Überschneidungen (Abteilungen derselben Art, Dienstgrade, Beurlaubungen) sowie Lehrgänge ohne Status oder mit
+       nicht zugeordneter Bezeichnung. Ergebnis ist eine Tabelle mit einer Zeile je Befund (siehe Befund)."""
+    SPALTEN = ["Zeile", "Personal-Nr.", "Nachname", "Vorname", "Abschnitt", "lfd. Nr.", "Eintrag", "Von", "Bis", "Regel",
+               "Beschreibung"]
+    STAMMDATEN = "Stammdaten"
+    # Abschnitte, in denen sich Zeiträume nicht überschneiden dürfen (Abteilungen nur bei gleicher Art)
+    UEBERSCHNEIDUNG = (AbschnittEnum.ABTEILUNG, AbschnittEnum.DIENSTGRAD, AbschnittEnum.BEURLAUBUNG)
+
+    def __init__(self, kontext:Kontext):
+        self.kontext = kontext
+        self.teile = []
+        self.personalnr = set()
+
+    def hinzufuegen(self, roster:Roster, beginn:int=0):
+        """Prüft die Personen eines Rosters; 'beginn' ist die Position der ersten Person im Export (für die Zeilennummer)."""
+        with profiler.messen("datenpruefung"):
+            befunde = []
+            tag = _tag(self.kontext.stichtag)
+            regelwerk = self.kontext.regelwerk
+
+            def eintraege(befund:Befund, abschnitt:AbschnittEnum, tabelle:pd.DataFrame, auswahl:np.ndarray):
+                auswahl = tabelle.iloc[np.flatnonzero(auswahl)] if auswahl.dtype == bool else tabelle.iloc[auswahl]
+                if len(auswahl):
+                    befunde.append(pd.DataFrame({"person": auswahl["person"].to_numpy(), "Abschnitt": abschnitt.value,
+                                                 "lfd. Nr.": auswahl["slot"].to_numpy(), "Eintrag": auswahl["name"].astype(object).to_numpy(),
+                                                 "Von": auswahl["von"].to_numpy(), "Bis": auswahl["bis"].to_numpy(),
+                                                 "Regel": befund.name, "Beschreibung": befund.value}))
+
+            def personen(befund:Befund, auswahl:np.ndarray, eintrag=None, beschreibung=None):
+                if len(auswahl):
+                    befunde.append(pd.DataFrame({"person": auswahl, "Abschnitt": self.STAMMDATEN, "Eintrag": eintrag,
+                                                 "Regel": befund.name, "Beschreibung": beschreibung or befund.value}))
+
+            # Personal-Nr. fehlt oder kommt mehrfach vor (auch über Blöcke hinweg)
+            personalnr = roster.stamm["PersonalNr"]
+            fehlt = personalnr.isna().to_numpy()
+            personen(Befund.PERSONALNR_FEHLT, np.flatnonzero(fehlt))
+            doppelt = (personalnr.duplicated() | personalnr.isin(self.personalnr)).to_numpy() & ~fehlt
+            personen(Befund.PERSONALNR_DOPPELT, np.flatnonzero(doppelt), personalnr.to_numpy(dtype=object)[doppelt])
+            self.personalnr.update(personalnr.to_numpy(dtype=object)[~fehlt])
+
+            # Dienstgrade: keiner eingetragen, aktueller im Regelwerk unbekannt, niedriger als der vorherige
+            dg = roster.tabellen[AbschnittEnum.DIENSTGRAD]
+            dg_person = dg["person"].to_numpy(dtype=np.int64)
+            personen(Befund.KEIN_DIENSTGRAD, np.flatnonzero(np.bincount(dg_person, minlength=len(roster)) == 0))
+            aktuell = roster.merkmale(self.kontext.stichtag).dienstgrad
+            unbekannt = np.flatnonzero(~pd.Series(aktuell).isin(list(regelwerk.position)).to_numpy())
+            andere = {**{g: "alt" for g in Dienstgrad.Reihenfolge_M_alt + Dienstgrad.Reihenfolge_W_alt},
+                      **{g: "neu" for g in Dienstgrad.Reihenfolge_M_neu + Dienstgrad.Reihenfolge_W_neu}}
+            personen(Befund.DIENSTGRAD_UNBEKANNT, unbekannt, aktuell[unbekannt],
+                     [f"{Befund.DIENSTGRAD_UNBEKANNT.value} ('{regelwerk.name}')"
+                      + (f", Dienstgrad der Reihenfolge '{andere[name]}'" if name in andere else "") for name in aktuell[unbekannt]])
+            position = np.array([regelwerk.position.get(name, -1) for name in dg["name"].cat.categories] + [-1])[dg["name"].cat.codes.to_numpy()]
+            bekannt = np.flatnonzero(position >= 0)
+            reihenfolge = bekannt[np.lexsort((dg["slot"].to_numpy()[bekannt], _tage(dg["von"], tag)[bekannt], dg_person[bekannt]))]
+            rueckschritt = np.zeros(len(reihenfolge), dtype=bool)
+            rueckschritt[1:] = ((dg_person[reihenfolge][1:] == dg_person[reihenfolge][:-1])
+                                & (position[reihenfolge][1:] < position[reihenfolge][:-1]))
+            eintraege(Befund.DIENSTGRAD_RUECKSCHRITT, AbschnittEnum.DIENSTGRAD, dg, reihenfolge[rueckschritt])
+
+            # Zeiträume je Abschnitt: Beginn fehlt, Beginn nach Ende, Überschneidungen (offene Einträge enden am Stichtag)
+            for abschnitt, tabelle in roster.tabellen.items():
+                von_fehlt = tabelle["von"].isna().to_numpy()
+                if abschnitt != AbschnittEnum.LEHRGANG:
+                    eintraege(Befund.BEGINN_FEHLT, abschnitt, tabelle, von_fehlt)
+                von = _tage(tabelle["von"], tag)
+                bis = _tage(tabelle["bis"], tag)
+                umgekehrt = ~von_fehlt & tabelle["bis"].notna().to_numpy() & (von > bis)
+                eintraege(Befund.BEGINN_NACH_ENDE, abschnitt, tabelle, umgekehrt)
+                if abschnitt in self.UEBERSCHNEIDUNG:
+                    gruppe = tabelle["person"].to_numpy(dtype=np.int64)
+                    if abschnitt == AbschnittEnum.ABTEILUNG:
+                        gruppe = gruppe * (len(tabelle["name"].cat.categories) + 1) + tabelle["name"].cat.codes.to_numpy()
+                    gueltig = np.flatnonzero(~umgekehrt)
+                    reihenfolge = gueltig[np.lexsort((bis[gueltig], von[gueltig], gruppe[gueltig]))]
+                    g = gruppe[reihenfolge]
+                    # spätestes Ende der vorherigen Einträge derselben Gruppe
+                    ende = pd.Series(bis[reihenfolge]).groupby(g).cummax().to_numpy()
+                    ueberschneidung = np.zeros(len(reihenfolge), dtype=bool)
+                    ueberschneidung[1:] = (g[1:] == g[:-1]) & (von[reihenfolge][1:] < ende[:-1])
+                    eintraege(Befund.UEBERSCHNEIDUNG, abschnitt, tabelle, reihenfolge[ueberschneidung])
+
+            # Lehrgänge ohne Status bzw. mit nicht zugeordneter Bezeichnung
+            lg = roster.tabellen[AbschnittEnum.LEHRGANG]
+            eintraege(Befund.LEHRGANG_OHNE_STATUS, AbschnittEnum.LEHRGANG, lg, lg["status"].isna().to_numpy())
+            eintraege(Befund.LEHRGANG_UNBEKANNT, AbschnittEnum.LEHRGANG, lg, lg["code"].to_numpy() < 0)
+
+            if befunde:
+                tabelle = pd.concat(befunde, ignore_index=True)
+                person = tabelle.pop("person").to_numpy(dtype=np.int64)
+                tabelle["Zeile"] = beginn + person + 2  # Kopfzeile des Exports ist Zeile 1
+                for spalte, quelle in (("Personal-Nr.", "PersonalNr"), ("Nachname", "Nachname"), ("Vorname", "Vorname")):
+                    tabelle[spalte] = roster.stamm[quelle].to_numpy(dtype=object)[person]
+                self.teile.append(tabelle.reindex(columns=self.SPALTEN))
+
+    def tabelle(self) -> pd.DataFrame:
+        """Alle Befunde, sortiert nach Zeile des Exports, Abschnitt und lfd. Nr.; Datum als dd.mm.yyyy."""
+        if not self.teile:
+            return pd.DataFrame(columns=self.SPALTEN)
+        tabelle = pd.concat(self.teile, ignore_index=True)
+        tabelle = tabelle.sort_values(["Zeile", "Abschnitt", "lfd. Nr.", "Regel"], kind="stable", na_position="first")
+        for spalte in ("Von", "Bis"):
+            tabelle[spalte] = pd.to_datetime(tabelle[spalte]).dt.strftime("%d.%m.%Y")
+        tabelle["lfd. Nr."] = tabelle["lfd. Nr."].astype("Int64")
+        return tabelle.reset_index(drop=True)
+
+    def schreiben(self, outputfile:Path) -> pd.DataFrame:
+        """Schreibt <Ausgabe>_Datenpruefung.csv und meldet die Anzahl der Befunde je Regel im Log."""
+        tabelle = self.tabelle()
+        outputfile = Path(outputfile)
+        tabelle.to_csv(outputfile.with_name(f"{outputfile.stem}_Datenpruefung.csv"), index=False, sep=";", encoding="utf-8-sig")
+        if len(tabelle):
+            anzahl = tabelle["Regel"].value_counts()
+            logger.warning("Datenprüfung: %s Befunde (%s), siehe %s_Datenpruefung.csv", len(tabelle),
+                           ", ".join(f"{regel}: {n}" for regel, n in anzahl.items()), outputfile.stem)
+        return tabelle
+
+
+class Vorlage():
+    """Textvorlage mit Platzhaltern ${name}. Der Text wird einmal in Literale und Feldnamen zerlegt und
+       in einen Formatstring übersetzt, render() setzt danach nur noch die Werte ein (str.format)."""
+    _PLATZHALTER = re.compile(r"\$\{(\w+)\}")
+
+    def __init__(self, text:str):
+        teile = self._PLATZHALTER.split(text)
+        self.felder = teile[1::2]
+        literale = [literal.replace("{", "{{").replace("}", "}}") for literal in teile[0::2]]
+        self.render = "".join(literal + ("{" + feld + "}" if feld else "")
+                              for literal, feld in zip(literale, self.felder + [""])).format
+
+
+class Dossiers():
+    """Beförderungsdossier je Person als HTML- oder Markdown-Datei: Stammdaten, aktueller Dienstgrad,
+       Verlauf der Dienstgrade, Lehrgänge, Dienstzeiten (gesamt, je Abteilung und nach Lehrgängen), Abteilungen,
+       Beurlaubungen und die einzelnen Bedingungen der Regeln je Dienstgrad oberhalb des aktuellen.
+       Die Vorlagen werden einmal beim Laden des Moduls zerlegt (siehe Vorlage). Die Dossiers werden blockweise
+       in einem Thread-Pool erstellt und geschrieben, dazu eine Übersicht mit Verweisen auf alle Dossiers."""
+    FORMATE = ("html", "md")
+    # Personen je Aufgabe im Thread-Pool
+    BLOCK = 50
+    _STIL = ("body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1em}"
+             "th,td{border:1px solid #999;padding:2px 6px;text-align:left}.ja{color:#060}.nein{color:#a00}")
+    VORLAGEN = {
+        "html": {"dokument": Vorlage('<!DOCTYPE html>\n<html lang="de">\n<head><meta charset="utf-8"><title>${titel}</title>'
+                                     f'<style>{_STIL}</style></head>\n<body>\n<h1>${{titel}}</h1>\n${{inhalt}}</body>\n</html>\n'),
+                 "abschnitt": Vorlage("<h2>${titel}</h2>\n${inhalt}"),
+                 "unterabschnitt": Vorlage("<h3>${titel}</h3>\n${inhalt}"),
+                 "absatz": Vorlage("<p>${text}</p>\n"),
+                 "tabelle": Vorlage("<table>\n<tr><th>${kopf}</th></tr>\n${zeilen}</table>\n"),
+                 "zeile": Vorlage("<tr><td>${zellen}</td></tr>\n"),
+                 "verweis": Vorlage('<a href="${ziel}">${text}</a>'),
+                 "erfuellt": Vorlage('<span class="${klasse}">${text}</span>'),
+                 "zellen": "</td><td>", "kopfzellen": "</th><th>"},
+        "md": {"dokument": Vorlage("# ${titel}\n\n${inhalt}"),
+               "abschnitt": Vorlage("## ${titel}\n\n${inhalt}"),
+               "unterabschnitt": Vorlage("### ${titel}\n\n${inhalt}"),
+               "absatz": Vorlage("${text}\n\n"),
+               "tabelle": Vorlage("| ${kopf} |\n${trenner}\n${zeilen}\n"),
+               "zeile": Vorlage("| ${zellen} |\n"),
+               "verweis": Vorlage("[${text}](${ziel})"),
+               "erfuellt": Vorlage("${text}"),
+               "zellen": " | ", "kopfzellen": " | "},
+    }
+
+    def __init__(self, roster:Roster, kontext:Kontext, format:str="html"):
+        if format not in self.FORMATE:
+            raise ValueError(f"Unbekanntes Format '{format}' für die Dossiers, erlaubt: {', '.join(self.FORMATE)}")
+        self.roster = roster
+        self.kontext = kontext
+        self.format = format
+        self.vorlagen = self.VORLAGEN[format]
+        self._texte = {}
+        self._ja_nein = {ok: self.vorlagen["erfuellt"].render(klasse="ja" if ok else "nein", text="ja" if ok else "nein")
+                         for ok in (True, False)}
+        # Vor dem Thread-Pool berechnen, damit die Threads nur noch lesen
+        stichtag = kontext.stichtag
+        merkmale = roster.merkmale(stichtag)
+        self.dienstgrad = merkmale.dienstgrad
+        self.befoerderungen = kontext.regelwerk.befoerderungen(merkmale.dienstgrad, kontext.regelwerk.auswerten(merkmale))
+        self.organisation = roster.stamm["Organisation"].astype(object).to_numpy()
+        self.dateinamen = self._dateinamen()
+
+    def _dateinamen(self) -> list:
+        """Eindeutiger Dateiname je Person aus Personal-Nr. und Name."""
+        namen = []
+        vergeben = set()
+        stamm = self.roster.stamm
+        for i, teile in enumerate(zip(stamm["PersonalNr"], stamm["Nachname"], stamm["Vorname"])):
+            name = re.sub(r"[^\w.-]+", "_", "_".join(str(t) for t in teile if pd.notna(t))).strip("_") or f"Person_{i + 1}"
+            if name in vergeben:
+                name = f"{name}_{i + 1}"
+            vergeben.add(name)
+            namen.append(f"{name}.{self.format}")
+        return namen
+
+    def _text(self, wert) -> str:
+        """Wert für die Ausgabe (Datum als dd.mm.yyyy), in HTML maskiert bzw. ohne Tabellentrenner in Markdown.
+           Bezeichnungen und Datumsangaben wiederholen sich, die Texte werden deshalb je Wert zwischengespeichert."""
+        if wert is None or (isinstance(wert, float) and math.isnan(wert)):
+            return ""
+        text = self._texte.get(wert)
+        if text is None:
+            text = wert.strftime("%d.%m.%Y") if isinstance(wert, date) else str(wert)
+            text = html.escape(text) if self.format == "html" else text.replace("|", "\\|").replace("\n", " ")
+            self._texte[wert] = text
+        return text
+
+    def _erfuellt(self, ok:bool) -> str:
+        return self._ja_nein[ok]
+
+    def _tabelle(self, kopf:tuple, zeilen) -> str:
+        """Tabelle aus bereits umgewandelten Zellen (siehe _text())."""
+        v = self.vorlagen
+        return v["tabelle"].render(kopf=v["kopfzellen"].join(kopf), trenner="|" + "---|" * len(kopf),
+                                   zeilen="".join(v["zeile"].render(zellen=v["zellen"].join(zeile)) for zeile in zeilen))
+
+    def _abschnitte(self, eintraege:list, kopf:tuple, *felder) -> str:
+        if not eintraege:
+            return self.vorlagen["absatz"].render(text="keine Einträge")
+        return self._tabelle(kopf, ([self._text(getattr(e, feld)) for feld in felder] for e in eintraege))
+
+    def render(self, i:int) -> str:
+        """Dossier der i-ten Person."""
+        v = self.vorlagen
+        t = self._text
+        regelwerk = self.kontext.regelwerk
+        stichtag = self.kontext.stichtag
+        tag = stichtag.date()
+        person = self.roster.person(i, stichtag)
+        profil = PersonProfile.von(person, tag)
+        befoerderungen = self.befoerderungen[i]
+
+        stammdaten = self._tabelle(("Angabe", "Wert"), [
+            ("Personal-Nr.", t(person.PersonalNr)), ("Organisation", t(self.organisation[i])),
+            ("Geburtsdatum", t(person.Geburtsdatum)), ("Stichtag", t(tag)),
+            ("akt. Dienstgrad", t(self.dienstgrad[i])),
+            ("Erfüllt Voraussetzungen für", t(", ".join(befoerderungen) if befoerderungen is not None else
+                                              f"Dienstgrad im Regelwerk '{regelwerk.name}' unbekannt"))])
+
+        zeiten = [("Gesamt", DienstJahre(person, None, stichtag=tag)),
+                  ("Einsatzabteilung FF", DienstJahre(person, AbteilungEnum.FF, stichtag=tag)),
+                  ("Jugendfeuerwehr", DienstJahre(person, AbteilungEnum.JF, stichtag=tag))]
+        zeiten += [(f"FF nach {lehrgang.name}", DienstJahre(person, AbteilungEnum.FF, lehrgang, tag))
+                   for lehrgang in PersonProfile.LEHRGAENGE if lehrgang in profil.abschluss]
+        dienstzeiten = self._tabelle(("Dienstzeit", "Jahre"), ((t(name), f"{jahre:.2f}") for name, jahre in zeiten))
+
+        voraussetzungen = []
+        for dg, erfuellt, alternativen in regelwerk.protokoll(profil, self.dienstgrad[i]):
+            teile = [v["absatz"].render(text="keine Regel im Regelwerk")] if not alternativen else []
+            for nr, bedingungen in enumerate(alternativen, 1):
+                teile.append(v["absatz"].render(text=f"Regel {nr}" + (" (mehrere Regeln: eine muss erfüllt sein)"
+                                                                      if nr == 1 and len(alternativen) > 1 else "")))
+                teile.append(self._tabelle(("Bedingung", "Istwert", "erfüllt"),
+                                           ((t(text), t(ist), self._erfuellt(ok)) for text, ist, ok in bedingungen)
+                                           ) if bedingungen else v["absatz"].render(text="keine Bedingungen"))
+            voraussetzungen.append(v["unterabschnitt"].render(titel=f"{t(dg)}: {'erfüllt' if erfuellt else 'nicht erfüllt'}",
+                                                              inhalt="".join(teile)))
+
+        inhalt = "".join((
+            stammdaten,
+            v["abschnitt"].render(titel="Dienstgrade", inhalt=self._abschnitte(person.Dienstgrade, ("Dienstgrad", "von", "bis"),
+                                                                               "name", "von", "bis")),
+            v["abschnitt"].render(titel="Lehrgänge", inhalt=self._abschnitte(person.Lehrgange, ("Lehrgang", "von", "bis", "Status"),
+                                                                             "name", "von", "bis", "bestanden")),
+            v["abschnitt"].render(titel="Dienstzeiten (ohne Beurlaubungen)", inhalt=dienstzeiten),
+            v["abschnitt"].render(titel="Abteilungen", inhalt=self._abschnitte(person.Abteilungen, ("Abteilung", "von", "bis"),
+                                                                               "name", "von", "bis")),
+            v["abschnitt"].render(titel="Beurlaubungen", inhalt=self._abschnitte(person.Beurlaubungen, ("Beurlaubung von", "von", "bis", "Grund"),
+                                                                                 "name", "von", "bis", "grund")),
+            v["abschnitt"].render(titel=f"Voraussetzungen (Regelwerk {t(regelwerk.name)})",
+                                  inhalt="".join(voraussetzungen) or v["absatz"].render(text="keine höheren Dienstgrade")),
+        ))
+        return v["dokument"].render(titel=t(f"Beförderungsdossier {person.Nachname}, {person.Vorname}"), inhalt=inhalt)
+
+    def _block(self, verzeichnis:Path, beginn:int, ende:int) -> int:
+        for i in range(beginn, ende):
+            with open(verzeichnis / self.dateinamen[i], "w", encoding="utf-8", newline="") as fp:
+                fp.write(self.render(i))
+        return ende - beginn
+
+    def schreiben(self, verzeichnis:Path, threads:int | None=None) -> int:
+        """Schreibt alle Dossiers und die Übersicht (Uebersicht.html bzw. Uebersicht.md) in das Verzeichnis.
+           Liefert die Anzahl der Dossiers."""
+        verzeichnis = Path(verzeichnis)
+        verzeichnis.mkdir(parents=True, exist_ok=True)
+        anzahl = 0
+        with profiler.messen("dossiers"):
+            with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+                auftraege = [pool.submit(self._block, verzeichnis, beginn, min(beginn + self.BLOCK, len(self.roster)))
+                             for beginn in range(0, len(self.roster), self.BLOCK)]
+                for auftrag in concurrent.futures.as_completed(auftraege):
+                    anzahl += auftrag.result()
+
+        t = self._text
+        stamm = self.roster.stamm
+        zeilen = ((self.vorlagen["verweis"].render(ziel=urllib.parse.quote(datei), text=t(f"{nachname}, {vorname}")),
+                   t(pnr), t(org), t(dg), t(", ".join(befoerderungen or ())))
+                  for datei, nachname, vorname, pnr, org, dg, befoerderungen
+                  in zip(self.dateinamen, stamm["Nachname"], stamm["Vorname"], stamm["PersonalNr"], self.organisation,
+                         self.dienstgrad, self.befoerderungen))
+        uebersicht = self._tabelle(("Name", "Personal-Nr.", "Organisation", "akt. Dienstgrad", "Erfüllt Voraussetzungen für"), zeilen)
+        titel = f"Beförderungsdossiers zum {self.kontext.stichtag.strftime('%d.%m.%Y')}"
+        with open(verzeichnis / f"Uebersicht.{self.format}", "w", encoding="utf-8", newline="") as fp:
+            fp.write(self.vorlagen["dokument"].render(titel=t(titel), inhalt=uebersicht))
+        logger.info("%s Dossiers in %s geschrieben", anzahl, verzeichnis)
+        return anzahl
+
+
+class EncodingFehler(ValueError):
+    """Die Exportdatei enthält Bytes, die nicht zum erkannten Encoding passen (z.B. gemischte Encodings)."""
+
+
+# Anzahl Bytes ab dem ersten Nicht-ASCII-Zeichen, aus denen UTF-8 oder ein 8-Bit-Encoding bestimmt wird
+ENCODING_PREFIX = 64 * 1024
+# Größe der Abschnitte, in denen eine UTF-8-Datei vollständig geprüft wird
+_PRUEF_BLOCK = 1 << 20
+_NICHT_ASCII = re.compile(rb"[\x80-\xff]")
+# Bytes 0x80-0x9f sind in cp1252 Zeichen wie '€' oder '„', in Latin-1 Steuerzeichen; 0x81, 0x8d, 0x8f, 0x90
+# und 0x9d sind in cp1252 nicht belegt.
+_CP1252_ZEICHEN = re.compile(rb"[\x80-\x9f]")
+_NICHT_CP1252 = re.compile(rb"[\x81\x8d\x8f\x90\x9d]")
+# Mehrbyte-Zeichen in UTF-8, die in einer 8-Bit-Datei auf gemischte Encodings hinweisen (z.B. 'Ã¤' statt 'ä')
+_UTF8_ZEICHEN = re.compile(rb"[\xc2-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}|[\xf0-\xf4][\x80-\xbf]{3}")
+
+def _encoding_fehler(puffer, position:int, encoding:str) -> EncodingFehler:
+    zeile = puffer[:position].count(b"\n") + 1
+    return EncodingFehler(f"Zeile {zeile}: Bytes {puffer[position:position + 4]!r} passen nicht zum erkannten "
+                          f"Encoding '{encoding}' (gemischte Encodings im Export?)")
+
+def erkenne_encoding(puffer) -> str:
+    """Bestimmt das Encoding eines Exports aus den Bytes (z.B. mmap), ohne die Datei als Text zu kopieren:
+       'utf-8-sig' (BOM), 'utf-8', 'cp1252' oder 'latin-1'. Entschieden wird anhand der ersten ENCODING_PREFIX Bytes
+       ab dem ersten Nicht-ASCII-Zeichen. Danach wird die ganze Datei geprüft, damit gemischte Encodings vor dem
+       Einlesen auffallen (EncodingFehler) und nicht erst mitten im Lauf, nachdem schon Blöcke geschrieben wurden."""
+    if puffer[:3] == codecs.BOM_UTF8:
+        encoding = "utf-8-sig"
+    else:
+        treffer = _NICHT_ASCII.search(puffer)
+        if treffer is None:
+            return "utf-8"  # reines ASCII
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(puffer[treffer.start():treffer.start() + ENCODING_PREFIX])
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+
+    if encoding == "latin-1":
+        # Zwischen cp1252 und Latin-1 unterscheiden nur die Bytes 0x80-0x9f, daher die ganze Datei betrachten
+        if _CP1252_ZEICHEN.search(puffer) and not _NICHT_CP1252.search(puffer):
+            encoding = "cp1252"
+        treffer = _UTF8_ZEICHEN.search(puffer)
+        if treffer:
+            raise _encoding_fehler(puffer, treffer.start(), encoding)
+    else:
+        # in Abschnitten dekodieren; ein am Ende abgeschnittenes Zeichen wird im nächsten Abschnitt gelesen
+        beginn = 0
+        while beginn < len(puffer):
+            block = puffer[beginn:beginn + _PRUEF_BLOCK]
+            try:
+                text, gelesen = codecs.utf_8_decode(block, "strict", beginn + len(block) >= len(puffer))
+            except UnicodeDecodeError as e:
+                raise _encoding_fehler(puffer, beginn + e.start, encoding) from None
+            beginn += gelesen
+    return encoding
+
+class _PufferLeser(io.RawIOBase):
+    """Liest ein Speicherabbild wie eine Datei, z.B. für io.TextIOWrapper (siehe export_quelle())."""
+    def __init__(self, puffer):
+        self.puffer = puffer
+
+    def readable(self):
+        return True
+
+    def readinto(self, ziel):
+        daten = self.puffer.read(len(ziel))
+        ziel[:len(daten)] = daten
+        return len(daten)
+
+def export_quelle(puffer, encoding:str):
+    """Quelle für pandas.read_csv() aus dem Speicherabbild eines Exports (siehe oeffne_export()). UTF-8 liest pandas
+       direkt aus dem Puffer, andere Encodings nur als Text; dafür wird der Puffer ohne Kopie als Datei gelesen."""
+    puffer.seek(0)
+    if encoding in ("utf-8", "utf-8-sig"):
+        return puffer
+    return io.TextIOWrapper(io.BufferedReader(_PufferLeser(puffer)), encoding=encoding, newline="")
+
+@contextlib.contextmanager
+def oeffne_export(inputfile):
+    """Öffnet eine Exportdatei als Speicherabbild (mmap, nur lesen) und erkennt das Encoding (siehe erkenne_encoding()).
+       Liefert (puffer, encoding). Große Dateien werden so ohne zusätzliche Kopie im Speicher gelesen; pandas.read_csv()
+       liest direkt aus dem Puffer (siehe export_quelle())."""
+    with open(inputfile, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            raise ExportSchemaFehler(f"Die Datei '{inputfile}' ist leer.")
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as puffer:
+            encoding = erkenne_encoding(puffer)
+            logger.info("Encoding von %s: %s", inputfile, encoding)
+            yield puffer, encoding
+
+class RosterSnapshot():
+    """Binärer, spaltenorientierter Snapshot eines eingelesenen Exports (Stammdaten und lange Tabellen des Rosters)
+       neben der Exportdatei (<Export>.roster). Schlüssel ist der Hash des Dateiinhalts: ändert sich der Export,
+       passt der Snapshot nicht mehr und wird beim nächsten Einlesen neu geschrieben.
+
+       Aufbau: MAGIC, Länge des Kopfs (uint64), Kopf (JSON mit Version, Schlüssel und der Beschreibung aller Spalten),
+       danach die Spalten als rohe numpy Arrays (je auf 64 Bytes ausgerichtet). Zahlen und Datum werden direkt
+       gespeichert, Kategorien und Texte als Codes (int32) mit einem Wörterbuch der Werte (UTF-8 und Grenzen je Wert).
+       Beim Lesen werden die Arrays aus dem Speicherabbild (mmap) verwendet, der Export wird nicht geparst.
+       Die Lehrgangscodes hängen von den Lehrgangsnamen ab und werden nicht gespeichert (siehe Roster.aus_tabellen())."""
+    MAGIC = b"FFROSTER"
+    # Erhöhen, wenn sich das Format oder das Umformen des Exports (Roster.from_dataframe()) ändert
+    VERSION = 1
+    AUSRICHTUNG = 64
+
+    @staticmethod
+    def datei(inputfile) -> Path:
+        inputfile = Path(inputfile)
+        return inputfile.with_name(inputfile.name + ".roster")
+
+    @classmethod
+    def schluessel(cls, inputfile) -> str:
+        """Hash des Dateiinhalts (SHA-256), gelesen über ein Speicherabbild."""
+        with open(inputfile, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return hashlib.sha256(b"").hexdigest()
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as puffer:
+                return hashlib.sha256(puffer).hexdigest()
+
+    @classmethod
+    def schreiben(cls, roster:Roster, datei:Path, schluessel:str):
+        """Schreibt den Snapshot (erst in eine temporäre Datei, die dann umbenannt wird)."""
+        bloecke = []
+        groesse = 0
+
+        def array(werte:np.ndarray) -> dict:
+            nonlocal groesse
+            werte = np.ascontiguousarray(werte)
+            beschreibung = {"dtype": werte.dtype.str, "offset": groesse, "anzahl": len(werte)}
+            bloecke.append(werte.tobytes())
+            groesse += -(-werte.nbytes // cls.AUSRICHTUNG) * cls.AUSRICHTUNG
+            return beschreibung
+
+        def woerterbuch(werte) -> dict:
+            texte = [str(wert) for wert in werte]
+            return {"text": array(np.frombuffer("".join(texte).encode("utf-8"), dtype=np.uint8)),
+                    "grenzen": array(np.cumsum([0] + [len(text) for text in texte], dtype=np.int64))}
+
+        def spalten(tabelle:pd.DataFrame) -> dict:
+            beschreibung = {}
+            for name, spalte in tabelle.items():
+                if isinstance(spalte.dtype, pd.CategoricalDtype):
+                    beschreibung[name] = {"art": "kategorie", "codes": array(spalte.cat.codes.to_numpy(dtype=np.int32)),
+                                          "werte": woerterbuch(spalte.cat.categories)}
+                elif pd.api.types.is_numeric_dtype(spalte.dtype) or pd.api.types.is_datetime64_dtype(spalte.dtype):
+                    beschreibung[name] = {"art": "array", "daten": array(spalte.to_numpy())}
+                else:
+                    codes, werte = pd.factorize(spalte)
+                    beschreibung[name] = {"art": "text", "codes": array(codes.astype(np.int32)), "werte": woerterbuch(werte)}
+            return beschreibung
+
+        kopf = {"version": cls.VERSION, "schluessel": schluessel, "personen": len(roster),
+                "stamm": spalten(roster.stamm),
+                "tabellen": {abschnitt.name: spalten(tabelle.drop(columns=["code"], errors="ignore"))
+                             for abschnitt, tabelle in roster.tabellen.items()}}
+        kopf = json.dumps(kopf, ensure_ascii=False).encode("utf-8")
+        beginn = len(cls.MAGIC) + 8 + len(kopf)
+        beginn = -(-beginn // cls.AUSRICHTUNG) * cls.AUSRICHTUNG
+        temporaer = datei.with_name(datei.name + f".{os.getpid()}.tmp")
+        try:
+            with open(temporaer, "wb") as fp:
+                fp.write(cls.MAGIC + len(kopf).to_bytes(8, "little") + kopf)
+                for block in bloecke:
+                    fp.write(b"\0" * (beginn - fp.tell()))
+                    fp.write(block)
+                    beginn += -(-len(block) // cls.AUSRICHTUNG) * cls.AUSRICHTUNG
+            os.replace(temporaer, datei)
+            logger.info("Snapshot %s geschrieben", datei)
+        except OSError as e:
+            # z.B. Verzeichnis ohne Schreibrecht: ohne Snapshot weiterarbeiten
+            logger.warning("Snapshot %s konnte nicht geschrieben werden: %s", datei, e)
+            temporaer.unlink(missing_ok=True)
+
+    @classmethod
+    def lesen(cls, datei:Path, schluessel:str, lehrgangsnamen:Lehrgangsnamen | None=None) -> Roster | None:
+        """Roster aus dem Snapshot, falls er zum Schlüssel passt (sonst None)."""
+        try:
+            with open(datei, "rb") as fp:
+                puffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        laenge = int.from_bytes(puffer[len(cls.MAGIC):len(cls.MAGIC) + 8], "little")
+        kopf = None
+        if puffer[:len(cls.MAGIC)] == cls.MAGIC:
+            try:
+                kopf = json.loads(puffer[len(cls.MAGIC) + 8:len(cls.MAGIC) + 8 + laenge])
+            except ValueError:
+                pass
+        if kopf is None or kopf.get("version") != cls.VERSION or kopf.get("schluessel") != schluessel:
+            logger.info("Snapshot %s passt nicht zum Export und wird neu erstellt", datei)
+            puffer.close()
+            return None
+        beginn = len(cls.MAGIC) + 8 + laenge
+        beginn = -(-beginn // cls.AUSRICHTUNG) * cls.AUSRICHTUNG
+
+        # Die Arrays verweisen direkt in das Speicherabbild, es bleibt geöffnet, solange sie verwendet werden.
+        def array(beschreibung:dict) -> np.ndarray:
+            return np.frombuffer(puffer, dtype=np.dtype(beschreibung["dtype"]), count=beschreibung["anzahl"],
+                                 offset=beginn + beschreibung["offset"])
+
+        def woerterbuch(beschreibung:dict) -> list:
+            text = array(beschreibung["text"]).tobytes().decode("utf-8")
+            grenzen = array(beschreibung["grenzen"]).tolist()
+            return [text[a:b] for a, b in zip(grenzen, grenzen[1:])]
+
+        def spalten(beschreibung:dict) -> dict:
+            werte = {}
+            for name, spalte in beschreibung.items():
+                if spalte["art"] == "kategorie":
+                    werte[name] = pd.Categorical.from_codes(array(spalte["codes"]), categories=woerterbuch(spalte["werte"]))
+                elif spalte["art"] == "text":
+                    codes = array(spalte["codes"])
+                    texte = np.array(woerterbuch(spalte["werte"]) + [np.nan], dtype=object)
+                    werte[name] = texte[codes]  # Code -1 (fehlend) ergibt den letzten Eintrag (nan)
+                else:
+                    werte[name] = array(spalte["daten"])
+            return werte
+
+        with profiler.messen("snapshot"):
+            try:
+                stamm = pd.DataFrame(spalten(kopf["stamm"]))
+                tabellen = {abschnitt: pd.DataFrame(spalten(kopf["tabellen"][abschnitt.name])) for abschnitt in AbschnittEnum}
+            except (KeyError, ValueError) as e:
+                # z.B. abgeschnittene Datei
+                logger.warning("Snapshot %s ist beschädigt (%s) und wird neu erstellt", datei, e)
+                return None
+        logger.info("Snapshot %s gelesen (%s Personen)", datei, kopf["personen"])
+        return Roster.aus_tabellen(stamm, tabellen, lehrgangsnamen or Lehrgangsnamen.standard())
+
+
+def lese_roster(inputfile, lehrgangsnamen:Lehrgangsnamen | None=None, snapshot:bool=False) -> Roster:
+    """CSV Datei aus FeuerON einlesen und in spaltenorientierte Tabellen umformen.
+       Mit 'snapshot' wird ein passender Snapshot neben der Datei gelesen bzw. nach dem Einlesen geschrieben
+       (siehe RosterSnapshot)."""
+    if snapshot:
+        datei = RosterSnapshot.datei(inputfile)
+        schluessel = RosterSnapshot.schluessel(inputfile)
+        roster = RosterSnapshot.lesen(datei, schluessel, lehrgangsnamen)
+        if roster is not None:
+            return roster
     try:
         logger.debug("Lese Daten von: " + str(inputfile))
-        with open(inputfile, "r") as fp:
-            df = pd.read_csv(fp, sep=";", encoding="utf-8")
+        with oeffne_export(inputfile) as (puffer, encoding):
+            df = pd.read_csv(export_quelle(puffer, encoding), sep=";", encoding=encoding, dtype=str)
     except:
-        logger.error("Fehler beim Einlesen der Daten", sys.exc_info()[0])
-        parser.print_usage()
+        logger.error(f"Fehler beim Einlesen der Daten: {sys.exc_info()[0]}")
+        raise
+    roster = Roster.from_dataframe(df, lehrgangsnamen=lehrgangsnamen)
+    if snapshot:
+        RosterSnapshot.schreiben(roster, datei, schluessel)
+    return roster
+
+def lese_bloecke(inputfile, chunkgroesse:int):
+    """CSV Datei aus FeuerON in Blöcken von 'chunkgroesse' Zeilen einlesen.
+       Das Spaltenlayout wird einmal kompiliert. Liefert je Block (DataFrame, ExportSchema).
+       Das Encoding wird vorab erkannt, pandas liest aus dem Speicherabbild der Datei (siehe oeffne_export())."""
+    logger.debug("Lese Daten in Blöcken von: " + str(inputfile))
+    schema = None
+    try:
+        with oeffne_export(inputfile) as (puffer, encoding), \
+             pd.read_csv(export_quelle(puffer, encoding), sep=";", encoding=encoding, dtype=str,
+                         chunksize=chunkgroesse) as reader:
+            while True:
+                with profiler.messen("einlesen"):
+                    df = next(reader, None)
+                if df is None:
+                    break
+                if schema is None:
+                    schema = ExportSchema(df.columns.values)
+                yield df, schema
+    except:
+        logger.error(f"Fehler beim Einlesen der Daten: {sys.exc_info()[0]}")
         raise
-    persons = []
-    columnNames = df.columns.values
-
-    for i, row in df.iterrows():
-        p = Person(Vorname=row['Vorname'],
-                   Nachname=row['Nachname'],
-                   Geburtsdatum=datetime.strptime(row['Geburtsdatum'],"%d.%m.%Y"),
-                   Geschlecht=row['Geschlecht'],
-                   PersonalNr=row['Personal-Nr.'],)
-
-        if isinstance(row['Einstellungsdatum'],str):
-            p.Einstellungsdatum = datetime.strptime(row['Einstellungsdatum'],"%d.%m.%Y")
-        logger.debug(f"Lese Datensatz: {p.PersonalNr}")
-        # Keine persönlichen Daten ausgeben.
-        # logger.debug(f"Lese Datensatz: {p.Nachname}, {p.Vorname}, (Geb. {row['Geburtsdatum']})")
-
-        # Abteilungen herausfiltern
-        idx_name=0
-        logger.debug(f"  Abteilung_<n>[<Spalte>]: <Wert>;  von[<Spalte>]: <Wert>>;  bis[<Spalte>]: <Wert>")
-        while True:
-            idx,groups_art = get_index_match(columnNames[idx_name:], r'(Art/Abteilung) ([0-9]+)')
-            idx_name+=idx
-            if groups_art and isinstance(row.iloc[idx_name], str):
-                #group_0 = groups_art[0] # 'Art/Abteilung'
-                lfd_nr = groups_art[1]   # '1'
-                idx_von, groups_von = get_index_match(columnNames[idx_name:], fr'Von {lfd_nr}')
-                idx_bis, groups_bis = get_index_match(columnNames[idx_name:], fr'Bis {lfd_nr}')
-                start = datetime.strptime(row.iloc[idx_name+idx_von],"%d.%m.%Y")
-                if isinstance(row.iloc[idx_name+idx_bis],str):
-                    ende = datetime.strptime(row.iloc[idx_name+idx_bis],"%d.%m.%Y")
-                else:
-                    ende = now
-                logger.debug(f"  Abteilung_{lfd_nr}[{idx_name}]: {row.iloc[idx_name]};  von[{idx_name+idx_von}]: {row.iloc[idx_name+idx_von]};  bis[{idx_name+idx_bis}]: {row.iloc[idx_name+idx_bis]}")
-                Abt = Abteilung(name=row.iloc[idx_name], von=start, bis=ende)
-                p.Abteilungen.append(Abt)
-                idx_name += 1
-            else: break
-        p.Abteilungen = sorted(p.Abteilungen, key=lambda abt: abt.bis)
-
-        # Dienstgrad herausfiltern
-        idx_name=0
-        while True:
-            idx,groups_art = get_index_match(columnNames[idx_name:], r'(Abk. Dienstgrad) ([0-9]+)')
-            idx_name+=idx
-            if groups_art and isinstance(row.iloc[idx_name], str):
-                #group_0 = groups_art[0] # 'Abk. Dienstgrad'
-                lfd_nr = groups_art[1]   # '1'
-                idx_von, groups_von = get_index_match(columnNames[idx_name:], fr'Von {lfd_nr}')
-                idx_bis, groups_bis = get_index_match(columnNames[idx_name:], fr'Bis {lfd_nr}')
-                start = datetime.strptime(row.iloc[idx_name+idx_von],"%d.%m.%Y")
-                if isinstance(row.iloc[idx_name+idx_bis],str):
-                    ende = datetime.strptime(row.iloc[idx_name+idx_bis],"%d.%m.%Y")
-                else:
-                    ende = now
-                logger.debug(f"  Dienstgrad_{lfd_nr}[{idx_name}]: {row.iloc[idx_name]};  von[{idx_name + idx_von}]: {row.iloc[idx_name + idx_von]};  bis[{idx_name + idx_bis}]: {row.iloc[idx_name + idx_bis]}")
-                dienstgrad = Dienstgrad(name=row.iloc[idx_name], von=start, bis=ende)
-                p.Dienstgrade.append(dienstgrad)
-                idx_name += 1
-            else: break
-        if len(p.Dienstgrade)==0:
-            logger.warning(f"Kein Dienstgrad eingetragen für {p.Nachname},{p.Vorname}. Schreibe {Dienstgrad.Reihenfolge_M_neu[0]} von {now.strftime("%d.%m.%Y")} bis {now.strftime("%d.%m.%Y")}")
-            p.Dienstgrade.append(Dienstgrad(name=Dienstgrad.Reihenfolge_M_neu[0], von=now, bis=now))
-        p.Dienstgrade = sorted(p.Dienstgrade, key=lambda dg: dg.bis)
 
-        # Dienststellung herausfiltern
-        idx_name=0
-        while True:
-            idx,groups_art = get_index_match(columnNames[idx_name:], r'(Dienststellung) ([0-9]+)')
-            idx_name+=idx
-            if groups_art and isinstance(row.iloc[idx_name], str):
-                #group_0 = groups_art[0] # 'Dienststellung'
-                lfd_nr = groups_art[1]   # '1'
-                idx_von, groups_von = get_index_match(columnNames[idx_name:], fr'Von {lfd_nr}')
-                idx_bis, groups_bis = get_index_match(columnNames[idx_name:], fr'Bis {lfd_nr}')
-                start = datetime.strptime(row.iloc[idx_name+idx_von],"%d.%m.%Y")
-                if isinstance(row.iloc[idx_name+idx_bis],str):
-                    ende = datetime.strptime(row.iloc[idx_name+idx_bis],"%d.%m.%Y")
-                else:
-                    ende = now
-                logger.debug( f"  Dienststellung_{lfd_nr}[{idx_name}]: {row.iloc[idx_name]};  von[{idx_name + idx_von}]: {row.iloc[idx_name + idx_von]};  bis[{idx_name + idx_bis}]: {row.iloc[idx_name + idx_bis]}")
-                amt = Amt(name=row.iloc[idx_name], von=start, bis=ende)
-                p.Amter.append(amt)
-                idx_name += 1
-            else: break
-
-        # Lehrgang herausfiltern
-        idx_name = 0
-        while True:
-            idx, groups_art = get_index_match(columnNames[idx_name:], r'(Lehrgangsbezeichnung) ([0-9]+)')
-            idx_name += idx
-            if groups_art and isinstance(row.iloc[idx_name], str):
-                # group_0 = groups_art[0] # 'Lehrgangsbezeichnung'
-                lfd_nr = groups_art[1]  # '1'
-                idx_von, groups_von = get_index_match(columnNames[idx_name:], fr'Von {lfd_nr}')
-                idx_bis, groups_bis = get_index_match(columnNames[idx_name:], fr'Bis {lfd_nr}')
-                idx_status, groups_status = get_index_match(columnNames[idx_name:], fr'Status {lfd_nr}')
-                start = datetime.strptime(row.iloc[idx_name + idx_von], "%d.%m.%Y")
-                if isinstance(row.iloc[idx_name + idx_bis], str):
-                    ende = datetime.strptime(row.iloc[idx_name + idx_bis], "%d.%m.%Y")
-                else:
-                    ende = now
-                if isinstance(row.iloc[idx_name+idx_status],float):
-                    logger.warning(f"{p.PersonalNr}: Lehrgang {lfd_nr} ist ohne Status (bestanden).")
-                    #logger.warning(f"{p.Vorname}, {p.Nachname} Lehrgang {lfd_nr} ist ohne Status (bestanden).") #Keine persönlichen Daten loggen
-                logger.debug( f"  Lehrgang_{lfd_nr}[{idx_name}]: {row.iloc[idx_name]};  von[{idx_name + idx_von}]: {row.iloc[idx_name + idx_von]};  bis[{idx_name + idx_bis}]: {row.iloc[idx_name + idx_bis]}")
-                lehrgang = Lehrgang(name=row.iloc[idx_name], von=start, bis=ende, bestanden=row.iloc[idx_name+idx_status])
-                p.Lehrgange.append(lehrgang)
-                idx_name += 1
-            else:
+def build_table_fom_csv(inputfile, stichtag:datetime):
+    """Personendaten aus CSV Datei auslesen.
+       Die CSV Datei ist kompatibel zu dem Datenexport aus FeuerON.
+       Auslesen von Grundlegenden Personendaten, Lehrgängen, Ämtern, Dienstgraden und Abteilungszugehörigkeiten,
+       die Dienstzeiten werden zum Stichtag berechnet."""
+    return list(lese_roster(inputfile).personen(stichtag))
+
+
+# Engines zum Einlesen und Prüfen, siehe verwende_csv_engine()
+ENGINES = ("auto", "csv", "pandas")
+# Exporte bis zu dieser Größe (Bytes) prüft 'auto' mit der CSV-Engine. Bei größeren Dateien ist die spaltenweise
+# Auswertung mit pandas trotz der Importzeit schneller.
+CSV_ENGINE_MAX_BYTES = 2_000_000
+# Werte, die pandas.read_csv als fehlend einliest. Die CSV-Engine behandelt sie ebenso.
+_FEHLEND = frozenset({"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+                      "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"})
+
+@functools.lru_cache(maxsize=None)
+def _datum(text:str) -> date | None:
+    """Datums-String (dd.mm.yyyy oder dd.mm.yy) ohne pandas umwandeln (None, falls ungültig).
+       Jeder verschiedene Wert wird nur einmal geparst."""
+    text = text.strip()
+    for format in ("%d.%m.%Y", "%d.%m.%y"):
+        try:
+            return datetime.strptime(text, format).date()
+        except ValueError:
+            pass
+    return None
+
+def verwende_csv_engine(inputfile, kontext:Kontext) -> bool:
+    """Entscheidet, ob die Exportdatei mit der CSV-Engine (ohne pandas) geprüft wird.
+       'auto' wählt sie für kleine Dateien ohne Datenprüfung, solange pandas noch nicht geladen ist (sonst entfällt
+       der Vorteil). Prognose, Ergebniscache, Statistik und Snapshot benötigen immer pandas. Die Datenprüfung ist
+       ebenfalls nur mit pandas möglich und entfällt, wenn die CSV-Engine ausdrücklich gewählt wird."""
+    if kontext.prognose_jahre or kontext.cache or kontext.statistik or kontext.snapshot:
+        if kontext.engine == "csv":
+            logger.warning("Prognose, Ergebniscache, Statistik und Snapshot benötigen pandas, die CSV-Engine wird nicht verwendet.")
+        return False
+    if kontext.engine != "auto":
+        return kontext.engine == "csv"
+    return (not kontext.datenpruefung and "pandas" not in sys.modules
+            and Path(inputfile).stat().st_size <= CSV_ENGINE_MAX_BYTES)
+
+def _person_aus_zeile(werte:list, schema:ExportSchema, zeile:int, tag:date, lehrgangsnamen:Lehrgangsnamen,
+                      fundstellen:list, befunde:collections.Counter) -> Person:
+    """Erzeugt das `Person` Objekt einer Zeile des Exports wie Roster.person(), nur mit der Standardbibliothek.
+       Offene Einträge enden am Stichtag 'tag'. Ungültige Datumsangaben werden in 'fundstellen' gesammelt,
+       fehlende Dienstgrade und Lehrgänge ohne Status in 'befunde' gezählt (siehe Befund);
+       'zeile' ist die Zeilennummer der CSV-Datei."""
+    def wert(index):
+        text = werte[index]
+        return None if text in _FEHLEND else text
+
+    def datum(index):
+        text = werte[index]
+        if text in _FEHLEND:
+            return None
+        ergebnis = _datum(text)
+        if ergebnis is None:
+            fundstellen.append((zeile, schema.columnNames[index], text))
+        return ergebnis
+
+    def eintraege(abschnitt):
+        # Wie im Export endet ein Abschnitt beim ersten leeren Eintrag.
+        for lfd_nr, slot in schema.slots(abschnitt):
+            name = wert(slot.name)
+            if name is None:
                 break
-        persons.append(p)
-    return persons
-
-def main(inputfile:Path, outputfile:Path):
-    """main function"""
-    persons = build_table_fom_csv(inputfile)
-
-    #Der Key entspricht den Elementen von Dienstgrad.Reihenfolge_M
-    dg_checkfunktions = {"FM": check_FM,
-                         "OFM": check_OFM,
-                         "HFM": check_HFM,
-                         "EHFM": check_EHFM,
-                         "BM": check_BM,
-                         "OBM": check_OBM,
-                         "HBM": check_HBM,
-                         "EHBM": check_EHBM,
-                         "BrI": check_BrI,
-                         "OBrI": check_OBrI,
-                         "HBrI": check_HBrI,
-                         "EHBrI": check_EHBrI,
-                         "GemBrI": check_GemBrI,}
-
-    # Ausgabetabelle der Daten vorbereiten:
-    outputframe = pd.DataFrame(columns=["Nachname", "Vorname", "akt. Dienstgrad", "Erfüllt Voraussetzungen für", "Dienstzeit insg.", f"Stichtag:{now.strftime('%d.%m.%Y')}"])
+            status = None if slot.status is None else wert(slot.status)
+            yield lfd_nr, name, datum(slot.von), datum(slot.bis) or tag, status
+
+    stamm = schema.stammdaten
+    p = Person(Vorname=wert(stamm["Vorname"]),
+               Nachname=wert(stamm["Nachname"]),
+               Geburtsdatum=datum(stamm["Geburtsdatum"]),
+               Geschlecht=wert(stamm["Geschlecht"]),
+               PersonalNr=wert(stamm["Personal-Nr."]),)
+    einstellungsdatum = datum(stamm["Einstellungsdatum"])
+    if einstellungsdatum is not None:
+        p.Einstellungsdatum = einstellungsdatum
+    logger.debug("Lese Datensatz: %s", p.PersonalNr)
+
+    p.Abteilungen = sorted((Abteilung(name=name, von=von, bis=bis)
+                            for lfd_nr, name, von, bis, status in eintraege(AbschnittEnum.ABTEILUNG)),
+                           key=lambda abt: abt.bis)
+    p.Dienstgrade = [Dienstgrad(name=name, von=von, bis=bis)
+                     for lfd_nr, name, von, bis, status in eintraege(AbschnittEnum.DIENSTGRAD)]
+    if len(p.Dienstgrade)==0:
+        befunde[Befund.KEIN_DIENSTGRAD] += 1
+        p.Dienstgrade.append(Dienstgrad(name=Dienstgrad.Reihenfolge_M_neu[0], von=tag, bis=tag))
+    p.Dienstgrade = sorted(p.Dienstgrade, key=lambda dg: dg.bis)
+    p.Amter = [Amt(name=name, von=von, bis=bis)
+               for lfd_nr, name, von, bis, status in eintraege(AbschnittEnum.DIENSTSTELLUNG)]
+    for lfd_nr, name, von, bis, status in eintraege(AbschnittEnum.LEHRGANG):
+        lehrgang = Lehrgang(name=name, von=von, bis=bis, bestanden=status, code=lehrgangsnamen.code(name))
+        if lehrgang.code < 0:
+            lehrgangsnamen.unbekannt[name] += 1
+        if status is None:
+            befunde[Befund.LEHRGANG_OHNE_STATUS] += 1
+        p.Lehrgange.append(lehrgang)
+    for lfd_nr, slot in schema.slots(AbschnittEnum.BEURLAUBUNG):
+        # Eine Beurlaubung ist durch ihren Beginn bestimmt (vgl. _wide_to_long()).
+        von = datum(slot.von)
+        if von is not None:
+            p.Beurlaubungen.append(Beurlaubung(name=wert(slot.name), von=von, bis=datum(slot.bis) or tag,
+                                               grund=wert(slot.status)))
+    p.Dienstzeiten = _dienstzeiten_person(p, tag)
+    return p
+
+def _dienstzeiten_person(person:Person, tag:date) -> dict:
+    """Dienstzeiten (in Tagen) einer Person zum Stichtag, gleiche Schlüssel und Werte wie Dienstzeiten.fuer()."""
+    stichtag = tag.toordinal()
+    abschnitte = [(abt.code, stichtag if abt.von is None else abt.von.toordinal(), min(abt.bis.toordinal(), stichtag))
+                  for abt in person.Abteilungen]
+    urlaub = [(u.von.toordinal(), u.bis.toordinal()) for u in person.Beurlaubungen]
+    tage = {(None, None): _vereinigte_tage_liste([(von, bis) for code, von, bis in abschnitte], urlaub=urlaub)}
+    for abteilung in (AbteilungEnum.FF, AbteilungEnum.JF):
+        code = Abteilung.CODES[abteilung.value]
+        tage[(abteilung, None)] = _vereinigte_tage_liste([(von, bis) for c, von, bis in abschnitte if c == code],
+                                                         urlaub=urlaub)
+
+    # Spätestes Ende je bestandenem Lehrgang, vgl. _lehrgang_ende()
+    ende = {}
+    for lg in person.Lehrgange:
+        if lg.code >= 0 and lg.bestanden == Lehrgang.status.BESTANDEN:
+            ende[lg.code] = max(ende.get(lg.code, KEIN_ABSCHLUSS), lg.bis.toordinal())
+    ff = Abteilung.CODES[AbteilungEnum.FF.value]
+    ff_abschnitte = [(von, bis) for code, von, bis in abschnitte if code == ff]
+    for lehrgang in LehrgangEnum:
+        code = Lehrgang.CODES[lehrgang.value]
+        tage[(AbteilungEnum.FF, lehrgang)] = _vereinigte_tage_liste(ff_abschnitte, ende[code], urlaub) if code in ende else 0
+    return tage
+
+def pruefe_csv(inputfile, fp, kontext:Kontext, lehrgangsnamen:Lehrgangsnamen) -> int:
+    """CSV-Engine für kleine Exporte: liest die Datei mit dem csv Modul, prüft jede Person mit den Regeln des
+       Regelwerks (skalar über PersonProfile, siehe Regelwerk.befoerderung()) und schreibt die Ausgabe direkt
+       nach 'fp'. Benötigt weder pandas noch numpy, die Ausgabe entspricht pruefe().
+       Liefert die Anzahl der geprüften Personen."""
+    regelwerk = kontext.regelwerk
+    stichtag = kontext.stichtag
+    tag = stichtag.date() if isinstance(stichtag, datetime) else stichtag
+    logger.debug("Lese Daten mit der CSV-Engine von: %s", inputfile)
+    with profiler.messen("einlesen"):
+        with oeffne_export(inputfile) as (puffer, encoding):
+            if encoding == "utf-8-sig":
+                puffer.seek(len(codecs.BOM_UTF8))
+                encoding = "utf-8"
+            # zeilenweise aus dem Speicherabbild dekodieren, ohne die ganze Datei als Text zu kopieren
+            reader = csv.reader((zeile.decode(encoding) for zeile in iter(puffer.readline, b"")), delimiter=";")
+            kopf = next(reader, None)
+            if kopf is None:
+                raise ExportSchemaFehler(f"Die Datei '{inputfile}' enthält keinen Spaltenkopf.")
+            # leere Zeilen überspringen und kurze Zeilen auffüllen (wie pandas.read_csv)
+            zeilen = [werte + [""] * (len(kopf) - len(werte)) for werte in reader if werte]
+        schema = ExportSchema(kopf)
+
+    with profiler.messen("pruefung"):
+        fundstellen = []
+        befunde = collections.Counter()
+        # +2: Kopfzeile und Zählung ab 1
+        personen = [_person_aus_zeile(werte, schema, nr + 2, tag, lehrgangsnamen, fundstellen, befunde)
+                    for nr, werte in enumerate(zeilen)]
+        if fundstellen:
+            raise DatumsFehler(sorted(fundstellen))
+        if befunde:
+            # die Datenprüfung benötigt pandas, die CSV-Engine meldet nur die Anzahl
+            logger.warning("CSV-Engine ohne Datenprüfung: %s Befunde (%s), Einzelheiten mit --engine pandas",
+                           befunde.total(), ", ".join(f"{regel.name}: {n}" for regel, n in befunde.items()))
+
+        ausgabe = []
+        for person in personen:
+            akt_DG = person.Dienstgrade[-1].name
+            logger.info("Prüfe Bedingungen für %s %s", akt_DG, person.PersonalNr)
+            erfuelltBedingung = regelwerk.befoerderung(PersonProfile.von(person, tag), akt_DG)
+            if erfuelltBedingung is None:
+                logger.warning("%s: Dienstgrad '%s' ist im Regelwerk '%s' unbekannt.", person.PersonalNr, akt_DG, regelwerk.name)
+                erfuelltBedingung = []
+            logger.info("  erfüllt Bedingungen für %s", erfuelltBedingung)
+            ausgabe.append((person.Nachname, person.Vorname, akt_DG, ", ".join(erfuelltBedingung),
+                            f"{person.Dienstzeiten[(None, None)] / 365:.2f} Jahre", ""))
+
+    with profiler.messen("ausgabe"):
+        # gleiche Spalten und Zeilenenden wie DataFrame.to_csv() in main()
+        writer = csv.writer(fp, delimiter=";", lineterminator=os.linesep)
+        writer.writerow(("Nachname", "Vorname", "akt. Dienstgrad", "Erfüllt Voraussetzungen für", "Dienstzeit insg.",
+                         f"Stichtag:{stichtag.strftime('%d.%m.%Y')}"))
+        writer.writerows(ausgabe)
+    logger.info(f"{len(ausgabe)} Personen geprüft")
+    return len(ausgabe)
+
+
+class Kontext(NamedTuple):
+    """Alle Angaben für eine Auswertung. Wird explizit übergeben, damit mehrere Auswertungen
+       (auch parallel in mehreren Prozessen) unabhängig voneinander laufen können."""
+    stichtag: datetime
+    regelwerk: Regelwerk
+    prognose_jahre: int | None = None
+    chunkgroesse: int = 10000
+    cache: str | None = None
+    lehrgangsnamen: Lehrgangsnamen | None = None
+    profil: bool = False
+    engine: str = "auto"
+    statistik: bool = False
+    snapshot: bool = False
+    datenpruefung: bool = True
+
+    @classmethod
+    def erstellen(cls, stichtag:datetime | None=None, regelwerk:str="alt", prognose_jahre:int | None=None,
+                  chunkgroesse:int=10000, cache:str | None=None, lehrgaenge:str | None=None, profil:bool=False,
+                  engine:str="auto", statistik:bool=False, snapshot:bool=False, datenpruefung:bool=True):
+        """Kontext mit Stichtag (Standard: heute) und Regelwerk ('alt', 'neu' oder JSON-Datei).
+           'cache' ist optional der Pfad zu einer SQLite-Datei für den Ergebniscache (siehe ErgebnisCache),
+           'lehrgaenge' eine JSON-Datei mit zusätzlichen Lehrgangsbezeichnungen (siehe Lehrgangsnamen.aus_json()),
+           'profil' schreibt einen Laufzeitbericht neben die Ausgabedatei (siehe Profiler),
+           'engine' wählt das Einlesen: 'auto', 'csv' (ohne pandas, siehe pruefe_csv()) oder 'pandas',
+           'statistik' schreibt Kennzahlen je Organisation neben die Ausgabedatei (siehe Statistik),
+           'snapshot' liest den Export aus einem binären Snapshot neben der Exportdatei (siehe RosterSnapshot),
+           'datenpruefung' schreibt die Befunde der Datenprüfung neben die Ausgabedatei (siehe Datenpruefung, mit der
+           CSV-Engine entfällt sie)."""
+        if stichtag is None:
+            stichtag = datetime.combine(datetime.now().date(), datetime.min.time())
+        lehrgangsnamen = Lehrgangsnamen.aus_json(lehrgaenge) if lehrgaenge else Lehrgangsnamen.standard()
+        if engine not in ENGINES:
+            raise ValueError(f"Unbekannte Engine '{engine}', erlaubt: {', '.join(ENGINES)}")
+        return cls(stichtag, Regelwerk.laden(regelwerk), prognose_jahre, chunkgroesse, cache, lehrgangsnamen, profil,
+                   engine, statistik, snapshot, datenpruefung)
+
+
+class ErgebnisCache():
+    """Persistenter Ergebniscache (SQLite) für wiederholte Prüfungen desselben Exports.
+       Schlüssel je Person: Personal-Nr., Hash der unveränderten Exportzeile, Stichtag und Version der Auswertung
+       (Regelwerk, Lehrgangsnamen und Prognosezeitraum). Nur geänderte oder neue Zeilen werden geprüft.
+       Zusätzlich wird je Exportdatei ('quelle') das Ergebnis des letzten Laufs gespeichert, um Änderungen zu melden."""
+    # Erhöhen, wenn sich die Auswertung ändert, damit alte Ergebnisse nicht mehr verwendet werden.
+    CACHE_VERSION = 3
+    # Spalten, die sich bei jedem Lauf ändern (z.B. mit dem Stichtag) und nicht als Änderung gemeldet werden
+    VERGLEICH_IGNORIERT = ("Nachname", "Vorname", "Dienstzeit insg.")
+    # Spalten, deren Überschrift den Stichtag enthält (ohne Werte), z.B. 'Stichtag:01.01.2026'
+    VERGLEICH_IGNORIERT_PRAEFIX = ("Stichtag:", "Prognose ab ")
+
+    def __init__(self, datei:Path, kontext:Kontext, quelle:str):
+        self.kontext = kontext
+        self.quelle = quelle
+        self.stichtag = kontext.stichtag.strftime("%Y-%m-%d")
+        lehrgangsnamen = kontext.lehrgangsnamen or Lehrgangsnamen.standard()
+        self.version = f"{self.CACHE_VERSION}:{kontext.regelwerk.version}:{lehrgangsnamen.version}:{kontext.prognose_jahre or 0}"
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.aenderungen = []
+        self.db = sqlite3.connect(datei, timeout=60)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS ergebnisse (personalnr TEXT, zeilenhash TEXT, stichtag TEXT, version TEXT, ergebnis TEXT,
+                                                   PRIMARY KEY (personalnr, zeilenhash, stichtag, version));
+            CREATE TABLE IF NOT EXISTS letzter_lauf (quelle TEXT, personalnr TEXT, nachname TEXT, vorname TEXT, ergebnis TEXT, lauf INTEGER,
+                                                     PRIMARY KEY (quelle, personalnr));
+            CREATE TEMP TABLE block (zeile INTEGER, personalnr TEXT, zeilenhash TEXT);
+        """)
+        self.lauf = self.db.execute("SELECT COALESCE(MAX(lauf), 0) + 1 FROM letzter_lauf WHERE quelle = ?", (quelle,)).fetchone()[0]
+
+    def pruefe(self, df:pd.DataFrame, schema:ExportSchema, roster:Roster | None=None) -> pd.DataFrame:
+        """Ausgabetabelle für einen Block des Exports; unveränderte Personen werden aus dem Cache gelesen.
+           Ist der Block bereits als Roster umgeformt (z.B. für die Statistik), werden die geänderten Personen daraus
+           gewählt, statt die Zeilen erneut zu parsen."""
+        personalnr = df.iloc[:, schema.stammdaten["Personal-Nr."]].fillna("").astype(str).to_numpy()
+        hashes = [format(h, "016x") for h in pd.util.hash_pandas_object(df, index=False).to_numpy()]
+
+        self.db.execute("DELETE FROM temp.block")
+        self.db.executemany("INSERT INTO temp.block VALUES (?, ?, ?)", zip(range(len(df)), personalnr, hashes))
+        gespeichert = dict(self.db.execute("""
+            SELECT b.zeile, e.ergebnis FROM temp.block b JOIN ergebnisse e
+              ON e.personalnr = b.personalnr AND e.zeilenhash = b.zeilenhash AND e.stichtag = ? AND e.version = ?""",
+            (self.stichtag, self.version)))
+        treffer = np.zeros(len(df), dtype=bool)
+        treffer[list(gespeichert)] = True
+        self.treffer += int(treffer.sum())
+        self.fehlschlaege += int((~treffer).sum())
+
+        # Nur geänderte und neue Zeilen prüfen
+        if roster is None:
+            roster = Roster.from_dataframe(df.iloc[np.flatnonzero(~treffer)], schema, self.kontext.lehrgangsnamen)
+        else:
+            roster = roster.auswahl(np.flatnonzero(~treffer))
+        geprueft = pruefe(roster, self.kontext)
+        tabelle = pd.DataFrame(index=range(len(df)), columns=geprueft.columns, dtype=object)
+        tabelle.iloc[np.flatnonzero(~treffer)] = geprueft.to_numpy(dtype=object)
+        if treffer.any():
+            zeilen = sorted(gespeichert)
+            tabelle.iloc[zeilen] = np.array([json.loads(gespeichert[z]) for z in zeilen], dtype=object)
+        neu = np.flatnonzero(~treffer)
+        self.db.executemany("INSERT OR REPLACE INTO ergebnisse VALUES (?, ?, ?, ?, ?)",
+                            ((personalnr[z], hashes[z], self.stichtag, self.version, json.dumps(werte))
+                             for z, werte in zip(neu, geprueft.to_numpy(dtype=object).tolist())))
+        self._vergleiche(personalnr, tabelle)
+        self.db.commit()
+        return tabelle
+
+    def _vergleiche(self, personalnr:np.ndarray, tabelle:pd.DataFrame):
+        """Vergleicht die Ergebnisse mit dem letzten Lauf derselben Exportdatei und merkt sich das aktuelle Ergebnis."""
+        spalten = [c for c in tabelle.columns
+                   if c not in self.VERGLEICH_IGNORIERT and not c.startswith(self.VERGLEICH_IGNORIERT_PRAEFIX)]
+        vergleich = tabelle[spalten].to_numpy(dtype=object).tolist()
+        vorher = dict(self.db.execute("""
+            SELECT l.personalnr, l.ergebnis FROM letzter_lauf l JOIN (SELECT DISTINCT personalnr FROM temp.block) b
+              ON l.personalnr = b.personalnr WHERE l.quelle = ? AND l.lauf < ?""", (self.quelle, self.lauf)))
+        jetzt = []
+        for pnr, nachname, vorname, werte in zip(personalnr, tabelle["Nachname"], tabelle["Vorname"], vergleich):
+            ergebnis = json.dumps(dict(zip(spalten, werte)), ensure_ascii=False)
+            if pnr not in vorher:
+                self.aenderungen.append((pnr, nachname, vorname, "neu", "", ergebnis))
+            elif vorher[pnr] != ergebnis:
+                self.aenderungen.append((pnr, nachname, vorname, "geändert", vorher[pnr], ergebnis))
+            jetzt.append((self.quelle, pnr, nachname, vorname, ergebnis, self.lauf))
+        self.db.executemany("INSERT OR REPLACE INTO letzter_lauf VALUES (?, ?, ?, ?, ?, ?)", jetzt)
+
+    def abschliessen(self, datei:Path) -> pd.DataFrame:
+        """Meldet nicht mehr enthaltene Personen, schreibt die Änderungen seit dem letzten Lauf und schließt den Cache."""
+        for pnr, nachname, vorname, ergebnis in self.db.execute(
+                "SELECT personalnr, nachname, vorname, ergebnis FROM letzter_lauf WHERE quelle = ? AND lauf < ?",
+                (self.quelle, self.lauf)):
+            self.aenderungen.append((pnr, nachname, vorname, "entfernt", ergebnis, ""))
+        self.db.execute("DELETE FROM letzter_lauf WHERE quelle = ? AND lauf < ?", (self.quelle, self.lauf))
+        self.db.commit()
+        self.db.close()
+
+        aenderungen = pd.DataFrame(self.aenderungen, columns=["Personal-Nr.", "Nachname", "Vorname", "Änderung", "vorher", "jetzt"])
+        aenderungen.to_csv(datei, index=False, sep=";", encoding="utf-8-sig", mode="w")
+        zaehler = aenderungen["Änderung"].value_counts()
+        logger.info(f"Cache: {self.treffer} Treffer, {self.fehlschlaege} Personen neu geprüft. "
+                    f"Änderungen seit dem letzten Lauf: {zaehler.get('neu', 0)} neu, {zaehler.get('geändert', 0)} geändert, "
+                    f"{zaehler.get('entfernt', 0)} entfernt (siehe {datei})")
+        return aenderungen
+
+
+def pruefe(roster:Roster, kontext:Kontext) -> pd.DataFrame:
+    """Ausgabetabelle für alle Personen des Rosters mit den Angaben aus dem Kontext."""
+    regelwerk = kontext.regelwerk
+    stichtag = kontext.stichtag
+
+    if kontext.prognose_jahre:
+        # Frühester Termin je Person und Dienstgrad statt Prüfung zum Stichtag
+        with profiler.messen("prognose"):
+            return Prognose(roster, regelwerk, stichtag, kontext.prognose_jahre).tabelle()
 
     # Prüfen der Beförderungsbedingungen für alle Personen
-    for p in persons:
-        erfuelltBedingung = []
-        akt_DG = p.Dienstgrade[-1].name
-        logger.info(f"Prüfe Bedingungen für {akt_DG} {p.PersonalNr}")
-        #logger.info(f"Prüfe Bedingungen für {akt_DG} {p.Nachname}, {p.Vorname}") # Keine persönlichen Daten loggen
-
-        # Aktuellen Dienstgrad in der Liste der alten Bezeichnungen suchen.
-        if akt_DG in Dienstgrad.Reihenfolge_M_alt:
-            idx = Dienstgrad.Reihenfolge_M_alt.index(akt_DG)
-        if akt_DG in Dienstgrad.Reihenfolge_W_alt:
-            idx = Dienstgrad.Reihenfolge_W_alt.index(akt_DG)
-        # Bedingungen für alle Dienstgrade oberhalb des aktuellen durchführen.
-        for dg in Dienstgrad.Reihenfolge_M[idx+1:]:
-            if dg_checkfunktions[dg](p):
-                # Hack um auf alte Dienstgrade zurück zustellen. Kann mit den neuen Dienstgraden entfallen.
-                # Dann die betreffenden Zeilen einfach löschen.
-                # ----------------------------------------------------------------------------------
-                idx = Dienstgrad.Reihenfolge_M.index(dg)
-                dg = Dienstgrad.Reihenfolge_M_alt[idx]
-                # Hack ende ------------------------------------------------------------------------
-                erfuelltBedingung.append(dg)
-        logger.info(f"  erfüllt Bedingungen für {erfuelltBedingung}")
-
-        dienstzeit_gesamt = AnzJahre(p.Abteilungen)
-
-        # Ausgabetabelle füllen:
-        s = ", ".join(erfuelltBedingung)
-        outputframe.loc[len(outputframe)] = [p.Nachname, p.Vorname, akt_DG, s, f"{dienstzeit_gesamt:.2f} Jahre", ""]
-
-    # Ausgabe in Datei schreiben
-    outputframe.to_csv(outputfile, index=False, sep=";", encoding="utf-8-sig", mode="w")
+    merkmale = roster.merkmale(stichtag)
+    matrix = regelwerk.auswerten(merkmale)
+    with profiler.messen("befoerderungen"):
+        befoerderungen = regelwerk.befoerderungen(merkmale.dienstgrad, matrix)
+
+    erfuellt = []
+    personalnr = roster.stamm["PersonalNr"].to_numpy()
+    for i, (akt_DG, erfuelltBedingung) in enumerate(zip(merkmale.dienstgrad, befoerderungen)):
+        logger.info("Prüfe Bedingungen für %s %s", akt_DG, personalnr[i])
+        if erfuelltBedingung is None:
+            logger.warning("%s: Dienstgrad '%s' ist im Regelwerk '%s' unbekannt.", personalnr[i], akt_DG, regelwerk.name)
+            erfuelltBedingung = []
+        logger.info("  erfüllt Bedingungen für %s", erfuelltBedingung)
+        erfuellt.append(", ".join(erfuelltBedingung))
+
+    # Ausgabetabelle füllen:
+    dienstzeit_gesamt = merkmale.jahre[(None, None)]
+    outputframe = pd.DataFrame({"Nachname": roster.stamm["Nachname"],
+                                "Vorname": roster.stamm["Vorname"],
+                                "akt. Dienstgrad": merkmale.dienstgrad,
+                                "Erfüllt Voraussetzungen für": erfuellt,
+                                "Dienstzeit insg.": [f"{jahre:.2f} Jahre" for jahre in dienstzeit_gesamt],
+                                f"Stichtag:{stichtag.strftime('%d.%m.%Y')}": ""})
+    return outputframe
+
+def main(inputfile:Path, outputfile:Path, kontext:Kontext | None=None) -> int:
+    """main function
+       Prüft eine Exportdatei blockweise mit den Angaben aus dem Kontext. Die Ergebnisse jedes Blocks werden
+       sofort an die Ausgabedatei angehängt, der Speicherbedarf hängt daher nur von der Blockgröße ab.
+       Kleine Exporte werden ohne pandas mit der CSV-Engine geprüft (siehe verwende_csv_engine()).
+       Mit kontext.profil wird zusätzlich <Ausgabe>_Profil.json mit Laufzeiten je Phase geschrieben,
+       mit kontext.statistik die Kennzahlen je Organisation (siehe Statistik) aus denselben Blöcken,
+       mit kontext.datenpruefung (Standard, nicht mit der CSV-Engine) die Befunde der Datenprüfung (siehe Datenpruefung)
+       vor der Prüfung jedes Blocks.
+       Mit kontext.snapshot (ohne Ergebniscache, der die Zeilen des Exports benötigt) wird der Export als Ganzes
+       aus dem Snapshot gelesen (siehe RosterSnapshot) und in einem Block geprüft.
+       Liefert die Anzahl der geprüften Personen."""
+    if kontext is None:
+        kontext = Kontext.erstellen()
+    if not kontext.profil:
+        return _pruefe_export(inputfile, outputfile, kontext)
+
+    profiler.starten()
+    anzahl = None
+    try:
+        anzahl = _pruefe_export(inputfile, outputfile, kontext)
+    finally:
+        # auch nach einem Fehler beenden, z.B. im Auskunftsdienst oder in einem Batch-Prozess
+        bericht = profiler.beenden(eingabe=str(inputfile), ausgabe=str(outputfile), personen=anzahl,
+                                   stichtag=kontext.stichtag.strftime("%d.%m.%Y"), chunkgroesse=kontext.chunkgroesse)
+    outputfile = Path(outputfile)
+    with open(outputfile.with_name(f"{outputfile.stem}_Profil.json"), "w", encoding="utf-8") as fp:
+        json.dump(bericht, fp, ensure_ascii=False, indent=2)
+    logger.info(f"Laufzeit {bericht['gesamt_s']} s, Speicher max. {bericht['speicher_spitze_mb']} MB")
+    return anzahl
+
+def _pruefe_export(inputfile:Path, outputfile:Path, kontext:Kontext) -> int:
+    """Prüfung einer Exportdatei ohne Profiler (siehe main())."""
+    cache = ErgebnisCache(Path(kontext.cache), kontext, quelle=Path(inputfile).name) if kontext.cache else None
+    statistik = Statistik(kontext) if kontext.statistik else None
+    csv_engine = verwende_csv_engine(inputfile, kontext)
+    datenpruefung = Datenpruefung(kontext) if kontext.datenpruefung and not csv_engine else None
+    lehrgangsnamen = kontext.lehrgangsnamen or Lehrgangsnamen.standard()
+    lehrgangsnamen.unbekannt.clear()
+    anzahl = 0
+    kopfzeile = True
+    with open(outputfile, "w", encoding="utf-8-sig", newline="") as fp:
+        if csv_engine:
+            anzahl = pruefe_csv(inputfile, fp, kontext, lehrgangsnamen)
+        else:
+            if kontext.snapshot and cache is None:
+                with profiler.messen("einlesen"):
+                    bloecke = [(None, None, lese_roster(inputfile, lehrgangsnamen, snapshot=True))]
+            else:
+                bloecke = ((df, schema, None) for df, schema in lese_bloecke(inputfile, kontext.chunkgroesse))
+            for df, schema, roster in bloecke:
+                with profiler.messen("pruefung"):
+                    if roster is None and (cache is None or statistik or datenpruefung):
+                        roster = Roster.from_dataframe(df, schema, lehrgangsnamen)
+                    if datenpruefung is not None:
+                        datenpruefung.hinzufuegen(roster, anzahl)
+                    if cache is None:
+                        tabelle = pruefe(roster, kontext)
+                    else:
+                        tabelle = cache.pruefe(df, schema, roster)
+                if statistik is not None:
+                    statistik.hinzufuegen(roster)
+                with profiler.messen("ausgabe"):
+                    tabelle.to_csv(fp, index=False, sep=";", header=kopfzeile)
+                    fp.flush()
+                kopfzeile = False
+                anzahl += len(tabelle)
+                logger.info(f"{anzahl} Personen geprüft")
+    lehrgangsnamen.melde_unbekannte()
+    if statistik is not None:
+        statistik.schreiben(outputfile)
+    if datenpruefung is not None:
+        datenpruefung.schreiben(outputfile)
+    if cache is not None:
+        outputfile = Path(outputfile)
+        cache.abschliessen(outputfile.with_name(f"{outputfile.stem}_Aenderungen.csv"))
+    return anzahl
+
+
+def stellenplan_ausgeben(roster:Roster, outputfile:Path, kontext:Kontext, stellenplan:Stellenplan) -> pd.DataFrame:
+    """Plant die Stellen für alle Organisationen des Exports (siehe plane_stellen()) und schreibt
+       <Ausgabe>_Stellenplan.csv."""
+    tabelle = plane_stellen(roster, kontext, stellenplan)
+    outputfile = Path(outputfile)
+    tabelle.to_csv(outputfile.with_name(f"{outputfile.stem}_Stellenplan.csv"), index=False, sep=";", encoding="utf-8-sig")
+    return tabelle
+
+
+def lehrgangsplanung_ausgeben(roster:Roster, outputfile:Path, kontext:Kontext, plaetze:dict, jahre:float,
+                              stellenplan:Stellenplan | None=None) -> pd.DataFrame:
+    """Verteilt die Lehrgangsplätze (siehe Lehrgangsplanung) und schreibt <Ausgabe>_Lehrgangsplanung.csv."""
+    tabelle = Lehrgangsplanung(roster, kontext, plaetze, jahre, stellenplan).planen()
+    outputfile = Path(outputfile)
+    tabelle.to_csv(outputfile.with_name(f"{outputfile.stem}_Lehrgangsplanung.csv"), index=False, sep=";", encoding="utf-8-sig")
+    return tabelle
+
+
+def _batch_start(level:int):
+    """Übernimmt das Log-Level des Hauptprozesses in einen Batch-Prozess. Der Logger wird im Prozess selbst
+       bestimmt: bei spawn und forkserver heißt das Modul dort '__mp_main__' statt '__main__'."""
+    logging.getLogger(__name__).setLevel(level)
+
+def _batch_datei(auftrag:tuple) -> dict:
+    """Prüft eine Datei im Batch. Fehler werden als Ergebnis gemeldet und brechen den Batch nicht ab."""
+    inputfile, outputfile, kontext = auftrag
+    ergebnis = {"Datei": str(inputfile), "Ausgabe": str(outputfile), "Personen": 0, "Status": "OK"}
+    try:
+        ergebnis["Personen"] = main(inputfile, outputfile, kontext)
+    except Exception as e:
+        ergebnis["Status"] = f"Fehler: {type(e).__name__}: {e}"
+    return ergebnis
+
+def batch_dateien(eingabe:str) -> list:
+    """Exportdateien eines Verzeichnisses (*.csv) oder eines Suchmusters (z.B. 'Exporte/*.csv')."""
+    pfad = Path(eingabe)
+    if pfad.is_dir():
+        return sorted(pfad.glob("*.csv"))
+    return sorted(Path(p) for p in glob.glob(eingabe))
+
+def batch(inputfiles:list, ausgabeordner:Path, kontext:Kontext, prozesse:int | None=None) -> pd.DataFrame:
+    """Prüft mehrere Exportdateien (z.B. je Ortsfeuerwehr) parallel in einem Prozesspool.
+       Je Datei wird 'Output_<Datei>.csv' geschrieben, dazu 'Zusammenfassung.csv' mit allen Personen
+       und 'Batch_Status.csv' mit dem Ergebnis je Datei. Liefert die Statustabelle."""
+    ausgabeordner = Path(ausgabeordner)
+    ausgabeordner.mkdir(parents=True, exist_ok=True)
+    auftraege = [(Path(f), ausgabeordner / f"Output_{Path(f).stem}.csv", kontext) for f in inputfiles]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=prozesse, initializer=_batch_start,
+                                                initargs=(logger.getEffectiveLevel(),)) as pool:
+        ergebnisse = list(pool.map(_batch_datei, auftraege))
+
+    # Ausgaben blockweise in der Zusammenfassung zusammenführen
+    kopfzeile = True
+    with open(ausgabeordner / "Zusammenfassung.csv", "w", encoding="utf-8-sig", newline="") as fp:
+        for ergebnis in ergebnisse:
+            if ergebnis["Status"] != "OK":
+                logger.error(f"{ergebnis['Datei']}: {ergebnis['Status']}")
+                continue
+            logger.info(f"{ergebnis['Datei']}: {ergebnis['Personen']} Personen geprüft")
+            with pd.read_csv(ergebnis["Ausgabe"], sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False,
+                             chunksize=kontext.chunkgroesse) as reader:
+                for tabelle in reader:
+                    tabelle.insert(0, "Datei", Path(ergebnis["Datei"]).name)
+                    tabelle.to_csv(fp, index=False, sep=";", header=kopfzeile)
+                    kopfzeile = False
+    status = pd.DataFrame(ergebnisse, columns=["Datei", "Ausgabe", "Personen", "Status"])
+    status.to_csv(ausgabeordner / "Batch_Status.csv", index=False, sep=";", encoding="utf-8-sig", mode="w")
+    return status
+
+
+class Auskunft():
+    """Auskunftsdienst für einzelne Mitglieder (z.B. aus einem Intranet-Formular), siehe starte_dienst().
+       Der Export wird einmal mit pandas eingelesen. Roster, Dienstzeiten und kompiliertes Regelwerk bleiben im
+       Speicher, die Ergebnistabelle wird je Stichtag einmal berechnet (die letzten STICHTAGE Stichtage bleiben
+       erhalten). Ändert sich die Exportdatei, wird sie bei der nächsten Anfrage neu eingelesen; bis dahin und bei
+       fehlerhaften Dateien werden weiter die bisherigen Daten verwendet."""
+    # Anzahl Stichtage, deren Ergebnisse im Speicher bleiben
+    STICHTAGE = 8
+    # Abstand in Sekunden, in dem die Exportdatei auf Änderungen geprüft wird
+    PRUEF_INTERVALL = 1.0
+    # Anzahl der letzten Anfragen je Art für die Latenzwerte
+    LATENZ_FENSTER = 1000
+
+    def __init__(self, inputfile:Path, kontext:Kontext):
+        self.inputfile = Path(inputfile)
+        self.kontext = kontext
+        self.gestartet = datetime.now()
+        self.neu_geladen = 0
+        self.ladefehler = None
+        self._fehlersignatur = None
+        self._lock = threading.RLock()
+        self._geprueft = 0.0
+        self._latenzen = collections.defaultdict(lambda: collections.deque(maxlen=self.LATENZ_FENSTER))
+        self._anfragen = collections.Counter()
+        self._fehler = collections.Counter()
+        self._laden()
+
+    def _signatur(self) -> tuple:
+        stat = self.inputfile.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _laden(self):
+        """Liest den Export ein und ersetzt den bisherigen Datenstand erst, wenn das Einlesen erfolgreich war."""
+        signatur = self._signatur()
+        start = time.perf_counter()
+        roster = lese_roster(self.inputfile, self.kontext.lehrgangsnamen, snapshot=self.kontext.snapshot)
+        index = collections.defaultdict(list)
+        for i, personalnr in enumerate(roster.stamm["PersonalNr"]):
+            index[personalnr].append(i)
+        # ein Datenstand wird nach dem Laden nicht mehr verändert, Anfragen lesen ihn ohne Sperre
+        self._stand = (signatur, roster, dict(index), collections.OrderedDict(), datetime.now())
+        self.ladefehler = None
+        self.tabelle(self.kontext.stichtag)
+        logger.info("Export %s geladen: %s Personen in %.3f s", self.inputfile, len(roster), time.perf_counter() - start)
+
+    def aktualisieren(self):
+        """Liest den Export neu ein, falls sich die Datei seit dem Laden geändert hat (höchstens alle PRUEF_INTERVALL s)."""
+        if time.perf_counter() - self._geprueft < self.PRUEF_INTERVALL:
+            return
+        with self._lock:
+            if time.perf_counter() - self._geprueft < self.PRUEF_INTERVALL:
+                return
+            self._geprueft = time.perf_counter()
+            try:
+                signatur = self._signatur()
+                # eine fehlerhafte Datei erst nach der nächsten Änderung erneut einlesen
+                if signatur in (self._stand[0], self._fehlersignatur):
+                    return
+                self._laden()
+                self.neu_geladen += 1
+            except Exception as e:
+                self._fehlersignatur = signatur
+                self.ladefehler = f"{type(e).__name__}: {e}"
+                logger.error("Export %s konnte nicht neu geladen werden, verwende bisherigen Stand: %s", self.inputfile, e)
+
+    def tabelle(self, stichtag:datetime) -> list:
+        """Ergebniszeilen aller Personen zum Stichtag (wie in der Ausgabedatei) als Liste von dicts."""
+        signatur, roster, index, tabellen, geladen = self._stand
+        return self._zeilen(roster, tabellen, stichtag)
+
+    def _zeilen(self, roster:Roster, tabellen:collections.OrderedDict, stichtag:datetime) -> list:
+        """Ergebniszeilen zum Stichtag aus Roster und Ergebnistabellen eines Datenstands (siehe _laden())."""
+        zeilen = tabellen.get(stichtag)
+        if zeilen is None:
+            with self._lock:
+                zeilen = tabellen.get(stichtag)
+                if zeilen is None:
+                    tabelle = pruefe(roster, self.kontext._replace(stichtag=stichtag)).astype(object)
+                    zeilen = tabelle.where(pd.notna(tabelle), None).to_dict("records")
+                    tabellen[stichtag] = zeilen
+                    while len(tabellen) > self.STICHTAGE:
+                        tabellen.popitem(last=False)
+        return zeilen
+
+    def person(self, personalnr:str, stichtag:datetime) -> list:
+        """Ergebniszeilen zur Personal-Nr. (leer, falls unbekannt)."""
+        # Zeilen und Index aus demselben Datenstand, auch wenn der Export zwischendurch neu geladen wird
+        signatur, roster, index, tabellen, geladen = self._stand
+        zeilen = self._zeilen(roster, tabellen, stichtag)
+        return [zeilen[i] for i in index.get(personalnr, ())]
+
+    def erfassen(self, art:str, sekunden:float, fehler:bool=False):
+        """Latenz einer beantworteten Anfrage."""
+        self._anfragen[art] += 1
+        self._fehler[art] += fehler
+        self._latenzen[art].append(sekunden * 1000)
+
+    def metriken(self) -> dict:
+        """Datenstand und Latenzen (ms) je Art der Anfrage über die letzten LATENZ_FENSTER Anfragen."""
+        signatur, roster, index, tabellen, geladen = self._stand
+        anfragen = {}
+        for art, latenzen in list(self._latenzen.items()):
+            werte = sorted(latenzen)
+            anfragen[art] = {"anzahl": self._anfragen[art], "fehler": self._fehler[art],
+                             "ms_mittel": round(sum(werte) / len(werte), 3),
+                             **{f"ms_p{p}": round(werte[min(len(werte) - 1, len(werte) * p // 100)], 3) for p in (50, 95, 99)},
+                             "ms_max": round(werte[-1], 3)}
+        return {"export": str(self.inputfile), "gestartet": self.gestartet.isoformat(timespec="seconds"),
+                "geladen": geladen.isoformat(timespec="seconds"), "personen": len(roster), "neu_geladen": self.neu_geladen,
+                "ladefehler": self.ladefehler, "regelwerk": self.kontext.regelwerk.name,
+                "stichtage": [stichtag.strftime("%d.%m.%Y") for stichtag in list(tabellen)], "anfragen": anfragen}
+
+
+class _AuskunftHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP-Schnittstelle der Auskunft (nur GET, Antworten als JSON):
+         /person/<Personal-Nr.>[?stichtag=tt.mm.jjjj]  Ergebnis eines Mitglieds
+         /stichtag/<tt.mm.jjjj>                         Ergebnisse aller Mitglieder zum Stichtag
+         /metriken                                      Datenstand und Latenzen"""
+    def do_GET(self):
+        auskunft = self.server.auskunft
+        start = time.perf_counter()
+        url = urllib.parse.urlsplit(self.path)
+        teile = [urllib.parse.unquote(t) for t in url.path.split("/") if t]
+        art = teile[0] if teile and teile[0] in ("person", "stichtag", "metriken") else "unbekannt"
+        try:
+            auskunft.aktualisieren()
+            status, antwort = self._beantworten(auskunft, art, teile, urllib.parse.parse_qs(url.query))
+        except Exception as e:
+            logger.error("Anfrage %s fehlgeschlagen: %s", self.path, e)
+            status, antwort = 500, {"fehler": f"{type(e).__name__}: {e}"}
+        daten = json.dumps(antwort, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(daten)))
+        self.end_headers()
+        self.wfile.write(daten)
+        auskunft.erfassen(art, time.perf_counter() - start, fehler=status >= 400)
+
+    def _beantworten(self, auskunft:Auskunft, art:str, teile:list, parameter:dict) -> tuple:
+        stichtag = auskunft.kontext.stichtag
+        try:
+            if art == "person" and "stichtag" in parameter:
+                stichtag = parse_date(parameter["stichtag"][0])
+            elif art == "stichtag" and len(teile) == 2:
+                stichtag = parse_date(teile[1])
+        except ValueError as e:
+            return 400, {"fehler": str(e)}
+        match art, len(teile):
+            case "person", 2:
+                zeilen = auskunft.person(teile[1], stichtag)
+                if not zeilen:
+                    return 404, {"fehler": f"Personal-Nr. '{teile[1]}' ist im Export nicht enthalten."}
+                return 200, {"stichtag": stichtag.strftime("%d.%m.%Y"), "personen": zeilen}
+            case "stichtag", 2:
+                return 200, {"stichtag": stichtag.strftime("%d.%m.%Y"), "personen": auskunft.tabelle(stichtag)}
+            case "metriken", 1:
+                return 200, auskunft.metriken()
+        return 404, {"fehler": "Unbekannte Anfrage. Möglich sind /person/<Personal-Nr.>[?stichtag=tt.mm.jjjj], "
+                               "/stichtag/<tt.mm.jjjj> und /metriken."}
+
+    def log_message(self, format, *args):
+        logger.info("%s - " + format, self.address_string(), *args)
+
+def starte_dienst(inputfile:Path, kontext:Kontext, port:int, host:str="127.0.0.1"):
+    """Startet den Auskunftsdienst (siehe Auskunft) auf host:port und beantwortet Anfragen bis zum Abbruch (Strg+C)."""
+    server = http.server.ThreadingHTTPServer((host, port), _AuskunftHandler)
+    server.auskunft = Auskunft(inputfile, kontext)
+    logger.warning("Auskunftsdienst für %s auf http://%s:%s/ gestartet", inputfile, host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 def parse_date(s:str) -> datetime:
     """ Parse Datums string für dd.mm.yy oder dd.mm.yyyy """
-    # Datumsformatierung prüfen mit dd.mm.yy oder dd.mm.yyyy
-    for fmt in ("%d.%m.%Y", "%d.%m.%y"):
-        try:
-            return datetime.strptime(s, fmt)
-        except ValueError:
-            continue
-    raise ValueError(f"Unbekanntes Datumsformat: {s}")
+    # Gleiche Umwandlung wie in der CSV-Engine, damit für den Stichtag pandas nicht geladen werden muss
+    datum = _datum(s)
+    if datum is None:
+        raise ValueError(f"Unbekanntes Datumsformat: {s}")
+    return datetime.combine(datum, datetime.min.time())
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
-    parser.add_argument('-i', '--input', type=str, default='./Datenbereitstellung_Dienstgrade.csv', help="Eingangsdatensatz [CSV]")
-    parser.add_argument('-o', '--output', type=str, default='./Output.csv', help="Ausgangstabelle [CSV]")
+    parser.add_argument('-i', '--input', type=str, default='./Datenbereitstellung_Dienstgrade.csv', help="Eingangsdatensatz [CSV]. Bei einem Verzeichnis oder Suchmuster (z.B. 'Exporte/*.csv') werden alle Dateien parallel geprüft.")
+    parser.add_argument('-o', '--output', type=str, default='./Output.csv', help="Ausgangstabelle [CSV], bei mehreren Eingangsdateien das Ausgabeverzeichnis")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Anzahl paralleler Prozesse bei mehreren Eingangsdateien bzw. Threads für die Dossiers (Standard: Anzahl CPUs)")
     parser.add_argument('-d', '--date', default=datetime.now().strftime("%d.%m.%Y"), type=str, help="Stichtag, zu dem die Bedingungen geprüft werden sollen. [dd.mm.yyyy]")
+    parser.add_argument("-r", "--regelwerk", default="alt", type=str, help="Regelwerk für die Prüfung: 'alt' (alte Dienstgrade), 'neu' (neue Dienstgrade) oder Pfad zu einer JSON-Datei")
+    parser.add_argument("-p", "--prognose", default=None, type=int, metavar="JAHRE", help="Statt der Prüfung zum Stichtag den frühesten Termin je Dienstgrad für die nächsten JAHRE Jahre ausgeben")
+    parser.add_argument("--chunk", default=10000, type=int, help="Anzahl Zeilen, die je Block eingelesen, geprüft und ausgegeben werden")
+    parser.add_argument("--cache", default=None, type=str, metavar="DATEI", help="SQLite-Datei für den Ergebniscache. Unveränderte Personen werden nicht erneut geprüft, Änderungen seit dem letzten Lauf werden in <Ausgabe>_Aenderungen.csv geschrieben")
+    parser.add_argument("--lehrgaenge", default=None, type=str, metavar="DATEI", help="JSON-Datei mit zusätzlichen Schreibweisen der Lehrgänge (Aliase und Muster)")
+    parser.add_argument("--engine", default="auto", choices=ENGINES, help="Einlesen und Prüfen: 'csv' ohne pandas (schneller Start), 'pandas' spaltenweise (große Exporte), 'auto' wählt nach Dateigröße")
+    parser.add_argument("--profile", action="store_true", help="Laufzeit und Aufrufe je Phase sowie den Speicherbedarf messen und in <Ausgabe>_Profil.json schreiben")
+    parser.add_argument("--stellenplan", default=None, type=str, metavar="DATEI", help="JSON-Datei mit den Soll-Stellen je Art der Feuerwehr. Schreibt zusätzlich <Ausgabe>_Stellenplan.csv mit Besetzung, Vorschlägen und offenen Stellen")
+    parser.add_argument("--lehrgangsplaetze", default=None, type=str, metavar="PLAETZE", help="Verfügbare Lehrgangsplätze, z.B. 'GF1=10,GF2=8,ZF1=4', so verteilen, dass möglichst viele Beförderungen (und mit --stellenplan Stellen) im Planungszeitraum erreichbar werden; ohne --stellenplan optimal (maximales Matching), mit --stellenplan heuristisch (nicht garantiert optimal); Ergebnis in <Ausgabe>_Lehrgangsplanung.csv")
+    parser.add_argument("--planungsjahre", default=2, type=float, metavar="JAHRE", help="Planungszeitraum der Lehrgangsplanung (--lehrgangsplaetze)")
+    parser.add_argument("--snapshot", action="store_true", help="Eingelesenen Export als binären Snapshot <Export>.roster neben der Exportdatei speichern und bei weiteren Läufen mit unveränderter Datei statt der CSV lesen")
+    parser.add_argument("--keine-datenpruefung", dest="datenpruefung", action="store_false", help="Exportdaten nicht vor der Auswertung prüfen. Ohne diese Option werden fehlende/doppelte Personal-Nr., unbekannte oder rückläufige Dienstgrade, fehlerhafte oder überschneidende Zeiträume und Lehrgänge ohne Status in <Ausgabe>_Datenpruefung.csv geschrieben (nur mit pandas)")
+    parser.add_argument("--statistik", action="store_true", help="Kennzahlen je Organisation (Beförderungen, Dienstgrade, Dienstzeiten, Lehrgänge) in <Ausgabe>_Statistik_<Tabelle>.csv schreiben")
+    parser.add_argument("--dossiers", default=None, type=str, metavar="VERZEICHNIS", help="Beförderungsdossier je Person (Dienstgrade, Lehrgänge, Dienstzeiten, Bedingungen der Regeln) und eine Übersicht in das Verzeichnis schreiben")
+    parser.add_argument("--dossier-format", default="html", choices=Dossiers.FORMATE, help="Format der Dossiers (--dossiers)")
+    parser.add_argument("--serve", default=None, type=int, metavar="PORT", help="Auskunftsdienst starten: Export einmal laden und Anfragen je Personal-Nr. oder Stichtag über HTTP beantworten")
+    parser.add_argument("--host", default="127.0.0.1", type=str, help="Adresse für den Auskunftsdienst (--serve)")
     parser.add_argument("--trace", default="warning", choices=["warning", "info", "debug"], help="Logging level")
     args = parser.parse_args()
 
@@ -588,13 +3413,41 @@ if __name__ == '__main__':
 
 
     try: # wer weiß, was hier eingegeben wird... wir fangen einmal alles ab.
-        if not Path(args.input).is_file():
+        kontext = Kontext.erstellen(stichtag=parse_date(args.date), regelwerk=args.regelwerk, prognose_jahre=args.prognose,
+                                    chunkgroesse=args.chunk, cache=args.cache,
+                                    lehrgaenge=args.lehrgaenge, profil=args.profile, engine=args.engine,
+                                    statistik=args.statistik, snapshot=args.snapshot, datenpruefung=args.datenpruefung)
+        logger.info(f"Stichtag: {kontext.stichtag.strftime('%d.%m.%Y')}")
+        plaetze = parse_lehrgangsplaetze(args.lehrgangsplaetze) if args.lehrgangsplaetze else None
+        if args.serve is not None:
+            if not Path(args.input).is_file():
+                raise FileNotFoundError(f"Datei '{args.input}' nicht gefunden.")
+            starte_dienst(Path(args.input), kontext, args.serve, args.host)
+        elif Path(args.input).is_dir() or any(c in args.input for c in "*?["):
+            # Mehrere Exporte: Ausgabeverzeichnis ist -o (bzw. dessen Ordner, falls eine Datei angegeben ist)
+            inputfiles = batch_dateien(args.input)
+            if not inputfiles:
+                raise FileNotFoundError(f"Keine Dateien gefunden für '{args.input}'.")
+            ausgabe = Path(args.output)
+            status = batch(inputfiles, ausgabe.parent if ausgabe.suffix else ausgabe, kontext, prozesse=args.jobs)
+            fehler = status[status["Status"] != "OK"]
+            if len(fehler):
+                logger.warning(f"{len(fehler)} von {len(status)} Dateien mit Fehlern, siehe Batch_Status.csv")
+        elif not Path(args.input).is_file():
             parser.print_help(None)
             raise FileNotFoundError(f"Datei '{args.input}' nicht gefunden.")
         else:
-            now=parse_date(args.date)
-            logger.info(f"Stichtag: {now.strftime('%d.%m.%Y')}")
-            main(inputfile=Path(args.input), outputfile=Path(args.output))
+            main(inputfile=Path(args.input), outputfile=Path(args.output), kontext=kontext)
+            if args.stellenplan or args.dossiers or plaetze:
+                # Stellenplan, Lehrgangsplanung und Dossiers benötigen den vollständigen Export, er wird dafür einmal eingelesen
+                roster = lese_roster(Path(args.input), kontext.lehrgangsnamen, snapshot=kontext.snapshot)
+                stellenplan = Stellenplan.aus_json(args.stellenplan) if args.stellenplan else None
+                if stellenplan:
+                    stellenplan_ausgeben(roster, Path(args.output), kontext, stellenplan)
+                if plaetze:
+                    lehrgangsplanung_ausgeben(roster, Path(args.output), kontext, plaetze, args.planungsjahre, stellenplan)
+                if args.dossiers:
+                    Dossiers(roster, kontext, args.dossier_format).schreiben(Path(args.dossiers), threads=args.jobs)
     except Exception as e:
         logger.error(e)
         parser.print_help(None)
@@ -0,0 +1,142 @@
+""" Benchmark der einzelnen Phasen von befoerderungs_vorschlag.py mit synthetischen Exporten (siehe erzeuge_export.py).
+
+    Je Anzahl Mitglieder werden gemessen:
+      - einlesen:             CSV lesen und Roster aufbauen (lese_roster)
+      - build_table_fom_csv:  Person Objekte für alle Mitglieder erzeugen
+      - pruefung:             Regelauswertung wie in main() (pruefe)
+      - ausgabe:              Schreiben der Ausgabedatei
+      - main:                 gesamter Lauf (main) inkl. blockweisem Einlesen
+      - main_csv:             gesamter Lauf mit der CSV-Engine (ohne pandas, siehe pruefe_csv())
+    Die Ergebnisse der Regelauswertung werden für eine Stichprobe mit den check_* Funktionen (skalare Referenz,
+    ohne vorberechnete Dienstzeiten) verglichen. Jeder Lauf wird in 'ergebnisse.jsonl' gespeichert und mit dem
+    bisher besten Lauf gleicher Größe verglichen; deutlich langsamere Phasen werden als Regression gemeldet.
+
+    Aufruf: python benchmark/benchmark.py -n 1000 10000 100000
+
+    Copyright: © 2025 jstiete
+    License: MIT
+"""
+
+from datetime import datetime
+from pathlib import Path
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+VERZEICHNIS = Path(__file__).resolve().parent
+sys.path.insert(0, str(VERZEICHNIS.parent))
+import befoerderungs_vorschlag as bv
+from erzeuge_export import Generator
+
+
+def messen(zeiten:dict, phase:str, funktion, *args):
+    """Führt funktion(*args) aus und speichert die Laufzeit in Sekunden unter 'phase'."""
+    start = time.perf_counter()
+    ergebnis = funktion(*args)
+    zeiten[phase] = round(time.perf_counter() - start, 4)
+    return ergebnis
+
+
+def referenz_vergleich(roster:bv.Roster, personen:list, stichtag:datetime, stichprobe:int, seed:int=1) -> int:
+    """Vergleicht die Regelmatrix (Regelwerk 'neu') mit den check_* Funktionen für eine Stichprobe.
+       Die skalare Referenz rechnet die Dienstzeiten aus den Zeitabschnitten der Person bis zum Stichtag neu.
+       Liefert die Anzahl der Abweichungen."""
+    regelwerk = bv.Regelwerk.neu()
+    matrix = regelwerk.auswerten(roster.merkmale(stichtag))
+    auswahl = range(len(personen))
+    if stichprobe < len(personen):
+        auswahl = sorted(random.Random(seed).sample(auswahl, stichprobe))
+    abweichungen = 0
+    for i in auswahl:
+        person = personen[i]
+        person.Dienstzeiten = {}
+        person.Profil = None
+        for dg in matrix.columns:
+            check = bv.dg_checkfunktions.get(dg)  # ohne check_* Funktion nie erfüllt
+            referenz = bool(check(person, stichtag.date())) if check else False
+            if referenz != bool(matrix[dg].iat[i]):
+                abweichungen += 1
+                if abweichungen <= 10:
+                    print(f"  Abweichung {person.PersonalNr} {dg}: Referenz {referenz}, Regelwerk {bool(matrix[dg].iat[i])}")
+    return abweichungen
+
+
+def lauf(groesse:int, daten:Path, stichtag:datetime, stichprobe:int) -> dict:
+    """Misst alle Phasen für einen Export mit 'groesse' Mitgliedern."""
+    datei = daten / f"export_{groesse}.csv"
+    if not datei.exists():
+        print(f"Erzeuge {datei} ...")
+        Generator(stand=stichtag.date()).schreiben(datei, groesse)
+
+    kontext = bv.Kontext.erstellen(stichtag=stichtag)
+    zeiten = {}
+    roster = messen(zeiten, "einlesen", bv.lese_roster, datei)
+    personen = messen(zeiten, "build_table_fom_csv", bv.build_table_fom_csv, datei, stichtag)
+    tabelle = messen(zeiten, "pruefung", bv.pruefe, roster, kontext)
+    with tempfile.TemporaryDirectory() as tmp:
+        ausgabe = Path(tmp) / "Output.csv"
+        messen(zeiten, "ausgabe", lambda: tabelle.to_csv(ausgabe, index=False, sep=";", encoding="utf-8-sig"))
+        messen(zeiten, "main", bv.main, datei, Path(tmp) / "Output_main.csv", kontext)
+        messen(zeiten, "main_csv", bv.main, datei, Path(tmp) / "Output_csv.csv", kontext._replace(engine="csv"))
+        erwartet = pd.read_csv(ausgabe, sep=";", dtype=str)
+        gleich = all(erwartet.equals(pd.read_csv(Path(tmp) / name, sep=";", dtype=str)) for name in ("Output_main.csv", "Output_csv.csv"))
+
+    abweichungen = referenz_vergleich(roster, personen, stichtag, stichprobe)
+    return {"groesse": groesse, "zeiten": zeiten, "referenz_geprueft": min(stichprobe, groesse),
+            "referenz_abweichungen": abweichungen, "main_gleich_pruefung": gleich}
+
+
+def vergleiche(ergebnis:dict, bisher:list, schwelle:float) -> list:
+    """Phasen, die um mehr als den Faktor 'schwelle' langsamer sind als der beste bisherige Lauf gleicher Größe."""
+    regressionen = []
+    for phase, zeit in ergebnis["zeiten"].items():
+        vorher = [b["zeiten"][phase] for b in bisher if b["groesse"] == ergebnis["groesse"] and phase in b["zeiten"]]
+        if vorher and zeit > min(vorher) * schwelle and zeit - min(vorher) > 0.05:
+            regressionen.append(f"{ergebnis['groesse']} Mitglieder, {phase}: {zeit:.3f} s (bisher bester Lauf {min(vorher):.3f} s)")
+    return regressionen
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--groessen", type=int, nargs="+", default=[1000, 10000, 100000], help="Anzahl Mitglieder je Lauf")
+    parser.add_argument("-d", "--date", type=str, default="01.01.2026", help="Stichtag [dd.mm.yyyy]")
+    parser.add_argument("--stichprobe", type=int, default=1000, help="Anzahl Personen für den Vergleich mit der skalaren Referenz")
+    parser.add_argument("--daten", type=str, default=str(VERZEICHNIS / "daten"), help="Verzeichnis für die erzeugten Exporte")
+    parser.add_argument("--ergebnisse", type=str, default=str(VERZEICHNIS / "ergebnisse.jsonl"), help="Datei mit den gespeicherten Läufen")
+    parser.add_argument("--schwelle", type=float, default=1.25, help="Faktor, ab dem eine langsamere Phase als Regression gilt")
+    args = parser.parse_args()
+
+    bv.logger.setLevel(logging.ERROR)
+    stichtag = bv.parse_date(args.date)
+    daten = Path(args.daten)
+    daten.mkdir(parents=True, exist_ok=True)
+    ergebnisdatei = Path(args.ergebnisse)
+    bisher = []
+    if ergebnisdatei.exists():
+        with open(ergebnisdatei, encoding="utf-8") as fp:
+            bisher = [json.loads(zeile) for zeile in fp if zeile.strip()]
+
+    umgebung = {"zeitpunkt": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                "pandas": pd.__version__, "numpy": np.__version__, "rechner": platform.node()}
+    regressionen = []
+    fehler = False
+    with open(ergebnisdatei, "a", encoding="utf-8") as fp:
+        for groesse in args.groessen:
+            ergebnis = {**umgebung, **lauf(groesse, daten, stichtag, args.stichprobe)}
+            phasen = ", ".join(f"{phase} {zeit:.3f} s" for phase, zeit in ergebnis["zeiten"].items())
+            print(f"{groesse:>7} Mitglieder: {phasen}; Referenz: {ergebnis['referenz_abweichungen']} Abweichungen")
+            fehler |= ergebnis["referenz_abweichungen"] > 0 or not ergebnis["main_gleich_pruefung"]
+            regressionen += vergleiche(ergebnis, [b for b in bisher if b.get("rechner") == umgebung["rechner"]], args.schwelle)
+            fp.write(json.dumps(ergebnis, ensure_ascii=False) + "\n")
+
+    for regression in regressionen:
+        print(f"REGRESSION: {regression}")
+    sys.exit(1 if fehler or regressionen else 0)
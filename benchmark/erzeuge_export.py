@@ -0,0 +1,232 @@
+""" Erzeugt synthetische Datenexporte im Spaltenlayout von FeuerON (siehe doc/Muster_Datenbereitstellung_Dienstgrade.csv),
+    z.B. für Benchmarks mit vielen Mitgliedern. Die Lebensläufe sind zufällig, aber plausibel:
+    Kinder-/Jugendfeuerwehr, Einsatzabteilung, Altersabteilung, Beförderungen und Lehrgänge in zeitlicher Folge.
+
+    Aufruf: python benchmark/erzeuge_export.py -n 10000 -o Export_10000.csv
+
+    Copyright: © 2025 jstiete
+    License: MIT
+"""
+
+from datetime import date, timedelta
+import argparse
+import random
+
+
+# Dienststellungen für die Spalten 'Dienststellung n'
+DIENSTSTELLUNGEN = ("Gruppenführer", "Zugführer", "Gerätewart", "Atemschutzgerätewart", "Jugendfeuerwehrwart",
+                    "Sicherheitsbeauftragter", "Ortsbrandmeister", "Stellv. Ortsbrandmeister")
+DIENSTGRADE_M = ("FMA", "FM", "OFM", "HFM", "1.HFM", "LM", "OLM", "HLM", "1.HLM", "BM", "OBM", "HBM", "1.HBM")
+DIENSTGRADE_W = ("FFA", "FF", "OFF", "HFF", "1.HFF", "LM", "OLM", "HLM", "1.HLM", "BM", "OBM", "HBM", "1.HBM")
+DIENSTGRAD_NAMEN = {"FMA": "Feuerwehrmannanwärter", "FFA": "Feuerwehrfrauanwärterin", "FM": "Feuerwehrmann",
+                    "FF": "Feuerwehrfrau", "OFM": "Oberfeuerwehrmann", "OFF": "Oberfeuerwehrfrau",
+                    "HFM": "Hauptfeuerwehrmann", "HFF": "Hauptfeuerwehrfrau", "1.HFM": "Erster Hauptfeuerwehrmann",
+                    "1.HFF": "Erste Hauptfeuerwehrfrau", "LM": "Löschmeister", "OLM": "Oberlöschmeister",
+                    "HLM": "Hauptlöschmeister", "1.HLM": "Erster Hauptlöschmeister", "BM": "Brandmeister",
+                    "OBM": "Oberbrandmeister", "HBM": "Hauptbrandmeister", "1.HBM": "Erster Hauptbrandmeister"}
+TECHNISCHE_LEHRGAENGE = ("Atemschutzgeräteträgerlehrgang", "Sprechfunkerlehrgang", "Maschinistenlehrgang",
+                         "Technische Hilfeleistung")
+GRUENDE_BEURLAUBUNG = ("Beruflich", "Elternzeit", "Studium", "Gesundheitlich")
+
+
+def kopfzeile(abteilungen:int=5, dienstgrade:int=6, dienststellungen:int=3, lehrgaenge:int=16) -> list:
+    """Spaltennamen wie im FeuerON-Export, mit der angegebenen Anzahl Einträge je Abschnitt."""
+    def nummeriert(name, anzahl):
+        return [f"{name} {k}" for k in range(1, anzahl + 1)]
+    return (["Organisation", "Anrede", "Vorname", "Nachname", "Geburtsdatum", "Geschlecht", "Einstellungsdatum", "Personal-Nr."]
+            + nummeriert("Art/Abteilung", abteilungen) + nummeriert("Von", abteilungen) + nummeriert("Bis", abteilungen)
+            + nummeriert("Abk. Dienstgrad", dienstgrade) + nummeriert("Dienstgrad", dienstgrade)
+            + nummeriert("Von", dienstgrade) + nummeriert("Bis", dienstgrade)
+            + nummeriert("Dienststellung", dienststellungen) + nummeriert("Funktion 1", dienststellungen)
+            + nummeriert("Von", dienststellungen) + nummeriert("Bis", dienststellungen)
+            + nummeriert("Lehrgangsbezeichnung", lehrgaenge) + nummeriert("Von", lehrgaenge)
+            + nummeriert("Bis", lehrgaenge) + nummeriert("Status", lehrgaenge)
+            + ["Beurlaubung von", "Von", "Bis", "Grund", "Bezeichnung"])
+
+
+class Generator():
+    """Erzeugt zufällige Mitglieder. Einstellbar sind die Anzahl der Einträge je Abschnitt, der Anteil
+       überlappender Abteilungszugehörigkeiten ('ueberlappung'), der Anteil Lehrgänge ohne Status ('ohne_status')
+       und der Anteil beurlaubter Mitglieder ('beurlaubung')."""
+    def __init__(self, abteilungen:int=5, dienstgrade:int=6, dienststellungen:int=3, lehrgaenge:int=16,
+                 ueberlappung:float=0.1, ohne_status:float=0.02, stand:date | None=None, seed:int=1,
+                 beurlaubung:float=0.05):
+        self.abteilungen = abteilungen
+        self.dienstgrade = dienstgrade
+        self.dienststellungen = dienststellungen
+        self.lehrgaenge = lehrgaenge
+        self.ueberlappung = ueberlappung
+        self.ohne_status = ohne_status
+        self.stand = stand or date.today()
+        self.zufall = random.Random(seed)
+        self.beurlaubung = beurlaubung
+        # eigener Zufallsgenerator, damit die übrigen Daten bei gleichem seed unverändert bleiben
+        self.zufall_urlaub = random.Random(-seed)
+
+    def _tag(self, beginn:date, min_jahre:float, max_jahre:float) -> date:
+        return beginn + timedelta(days=self.zufall.randint(int(min_jahre * 365), int(max_jahre * 365)))
+
+    @staticmethod
+    def _datum(d:date | None) -> str:
+        return "" if d is None else d.strftime("%d.%m.%Y")
+
+    def _abschnitt(self, eintraege:list, anzahl:int, spalten:int) -> list:
+        """Einträge (Tupel gleicher Länge) auf 'anzahl' Plätze auffüllen und spaltenweise ausgeben."""
+        eintraege = eintraege[:anzahl] + [("",) * spalten] * (anzahl - min(anzahl, len(eintraege)))
+        return [wert for spalte in zip(*eintraege) for wert in spalte] if eintraege else []
+
+    def abteilungen_von(self, geburt:date) -> list:
+        """Zugehörigkeiten (Abteilung, von, bis) als Lebenslauf; bis None = noch Mitglied."""
+        z = self.zufall
+        eintraege = []
+        beginn = self._tag(geburt, 16, 40)
+        if z.random() < 0.5:
+            jf = self._tag(geburt, 10, 14)
+            if z.random() < 0.2:
+                kf = self._tag(geburt, 6, 8)
+                eintraege.append(("Kinderfeuerwehr", kf, jf - timedelta(days=1)))
+            beginn = self._tag(geburt, 16, 18)
+            eintraege.append(("Jugendfeuerwehr", jf, beginn - timedelta(days=1)))
+        if beginn >= self.stand:
+            # noch zu jung für die Einsatzabteilung
+            return [(abt, von, bis if bis < self.stand else None) for abt, von, bis in eintraege if von < self.stand]
+        ende = None
+        if z.random() < 0.15:
+            ende = self._tag(beginn, 1, 30)
+            ende = ende if ende < self.stand else None
+        eintraege.append(("Einsatzabteilung FF", beginn, ende))
+        if ende is not None and geburt.replace(year=geburt.year + 60) < self.stand and z.random() < 0.5:
+            eintraege.append(("Altersabteilung, Ehrenabteilung", ende + timedelta(days=1), None))
+        if z.random() < self.ueberlappung:
+            # doppelt erfasste oder überlappende Zeiträume (z.B. Wechsel der Ortsfeuerwehr)
+            von = self._tag(beginn, -1, 3)
+            eintraege.append(("Einsatzabteilung FF", min(von, self.stand - timedelta(days=1)), self._tag(von, 0.5, 5)))
+        return [(abt, von, bis if bis is None or bis < self.stand else None) for abt, von, bis in eintraege]
+
+    def lehrgaenge_von(self, ff_beginn:date) -> list:
+        """Lehrgänge (Bezeichnung, von, bis, Status) in zeitlicher Folge ab Eintritt in die Einsatzabteilung."""
+        z = self.zufall
+        if ff_beginn.year >= 2020:
+            grund = ["Qualifikationsstufe Einsatzfähigkeit", "Qualifikationsstufe Truppmitglied"]
+            truppfuehrer = "Qualifikationsstufe Truppführende/Truppführender"
+        elif ff_beginn.year < 1995 and z.random() < 0.5:
+            grund = ["Grundausbildung (alte Form)"]
+            truppfuehrer = "Truppführer"
+        else:
+            grund = ["Truppmannausbildung Teil 1", "Truppmannausbildung Teil 2"]
+            truppfuehrer = "Truppführer"
+        folge = list(grund)
+        for name in TECHNISCHE_LEHRGAENGE:
+            if z.random() < 0.45:
+                folge.append(name)
+        if z.random() < 0.6:
+            folge.append(truppfuehrer)
+            if z.random() < 0.4:
+                folge += ["Gruppenführer Teil 1", "Gruppenführer Teil 2"]
+                if z.random() < 0.25:
+                    folge += ["Zugführer Teil 1", "Zugführer Teil 2"]
+                    if z.random() < 0.2:
+                        folge.append("Leiter einer Feuerwehr")
+
+        eintraege = []
+        t = ff_beginn
+        for name in folge:
+            t = self._tag(t, 0.1, 2.5)
+            if t >= self.stand:
+                break
+            bis = t + timedelta(days=z.randint(0, 14))
+            r = z.random()
+            status = "" if r < self.ohne_status else ("Nicht Bestanden" if r < self.ohne_status + 0.03 else "Bestanden")
+            eintraege.append((name, t, bis, status))
+            t = bis
+        return eintraege
+
+    def dienstgrade_von(self, ff_beginn:date, ende:date | None, weiblich:bool) -> list:
+        """Dienstgrade (Abkürzung, von, bis) mit Beförderungen alle 2-6 Jahre; der letzte ist noch aktuell."""
+        z = self.zufall
+        reihenfolge = DIENSTGRADE_W if weiblich else DIENSTGRADE_M
+        ende = ende or self.stand
+        eintraege = []
+        t = ff_beginn
+        maximal = z.choice((3, 5, 5, 8, 12))
+        for dg in reihenfolge[:maximal]:
+            if t >= ende:
+                break
+            eintraege.append([dg, t, None])
+            t = self._tag(t, 2, 6)
+        for vorher, nachher in zip(eintraege, eintraege[1:]):
+            vorher[2] = nachher[1] - timedelta(days=1)
+        return [tuple(e) for e in eintraege]
+
+    def beurlaubung_von(self, ff_beginn:date, ff_ende:date | None) -> list:
+        """Beurlaubung aus der Einsatzabteilung ('Beurlaubung von', 'Von', 'Bis', 'Grund'); bis None = noch beurlaubt."""
+        z = self.zufall_urlaub
+        ende = min(ff_ende or self.stand, self.stand)
+        if z.random() >= self.beurlaubung or ende <= ff_beginn:
+            return ["", "", "", ""]
+        von = ff_beginn + timedelta(days=z.randint(0, (ende - ff_beginn).days))
+        bis = self._tag(von, 0.25, 3)
+        return ["Einsatzabteilung FF", self._datum(von), self._datum(bis if bis < self.stand else None),
+                z.choice(GRUENDE_BEURLAUBUNG)]
+
+    def person(self, i:int, organisation:str) -> list:
+        """Eine Zeile des Exports."""
+        z = self.zufall
+        weiblich = z.random() < 0.15
+        geburt = self._tag(date(self.stand.year - 70, 1, 1), 0, 62)
+        abteilungen = self.abteilungen_von(geburt)
+        ff = [(von, bis) for abt, von, bis in abteilungen if abt == "Einsatzabteilung FF"]
+        dienstgrade, lehrgaenge = [], []
+        beurlaubung = ["", "", "", ""]
+        if ff:
+            ff_beginn, ff_ende = ff[0]
+            dienstgrade = self.dienstgrade_von(ff_beginn, ff_ende, weiblich)
+            lehrgaenge = self.lehrgaenge_von(ff_beginn)
+            beurlaubung = self.beurlaubung_von(ff_beginn, ff_ende)
+        dienststellungen = []
+        for k in range(z.randint(0, self.dienststellungen) if dienstgrade else 0):
+            von = self._tag(dienstgrade[0][1], 2, 20)
+            if von < self.stand:
+                bis = self._tag(von, 3, 12)
+                dienststellungen.append((z.choice(DIENSTSTELLUNGEN), "", self._datum(von),
+                                         self._datum(bis if bis < self.stand else None)))
+
+        zeile = [organisation, "Frau" if weiblich else "Herr", f"Vorname{i}", f"Nachname{i}", self._datum(geburt),
+                 "Weiblich" if weiblich else "Männlich",
+                 self._datum(abteilungen[0][1]) if abteilungen and z.random() < 0.3 else "", f"P{i:07d}"]
+        zeile += self._abschnitt([(abt, self._datum(von), self._datum(bis)) for abt, von, bis in abteilungen],
+                                 self.abteilungen, 3)
+        zeile += self._abschnitt([(dg, DIENSTGRAD_NAMEN[dg], self._datum(von), self._datum(bis)) for dg, von, bis in dienstgrade],
+                                 self.dienstgrade, 4)
+        zeile += self._abschnitt(dienststellungen, self.dienststellungen, 4)
+        zeile += self._abschnitt([(name, self._datum(von), self._datum(bis), status) for name, von, bis, status in lehrgaenge],
+                                 self.lehrgaenge, 4)
+        zeile += beurlaubung + [""]
+        return zeile
+
+    def schreiben(self, datei:str, anzahl:int, encoding:str="utf-8"):
+        """Export mit 'anzahl' Mitgliedern schreiben (Zeilenende CRLF wie beim Export aus FeuerON)."""
+        organisationen = [f"Ortsfeuerwehr {k}, OF" for k in range(1, max(1, anzahl // 60) + 1)]
+        with open(datei, "w", encoding=encoding, newline="") as fp:
+            fp.write(";".join(kopfzeile(self.abteilungen, self.dienstgrade, self.dienststellungen, self.lehrgaenge)) + "\r\n")
+            for i in range(anzahl):
+                fp.write(";".join(self.person(i, self.zufall.choice(organisationen))) + "\r\n")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("-n", "--anzahl", type=int, default=1000, help="Anzahl Mitglieder")
+    parser.add_argument("-o", "--output", type=str, default="./Export_synthetisch.csv", help="Ausgabedatei [CSV]")
+    parser.add_argument("--abteilungen", type=int, default=5, help="Anzahl Einträge 'Art/Abteilung n'")
+    parser.add_argument("--dienstgrade", type=int, default=6, help="Anzahl Einträge 'Abk. Dienstgrad n'")
+    parser.add_argument("--dienststellungen", type=int, default=3, help="Anzahl Einträge 'Dienststellung n'")
+    parser.add_argument("--lehrgaenge", type=int, default=16, help="Anzahl Einträge 'Lehrgangsbezeichnung n'")
+    parser.add_argument("--ueberlappung", type=float, default=0.1, help="Anteil Mitglieder mit überlappenden Abteilungszeiten")
+    parser.add_argument("--ohne-status", type=float, default=0.02, help="Anteil Lehrgänge ohne Status")
+    parser.add_argument("--beurlaubung", type=float, default=0.05, help="Anteil Mitglieder mit einer Beurlaubung")
+    parser.add_argument("--encoding", type=str, default="utf-8", help="Zeichenkodierung der Ausgabedatei")
+    parser.add_argument("--seed", type=int, default=1, help="Startwert des Zufallsgenerators")
+    args = parser.parse_args()
+
+    Generator(args.abteilungen, args.dienstgrade, args.dienststellungen, args.lehrgaenge,
+              args.ueberlappung, args.ohne_status, seed=args.seed, beurlaubung=args.beurlaubung).schreiben(args.output, args.anzahl, args.encoding)
@@ -0,0 +1,34 @@
+""" Gemeinsame Fixtures der Tests: synthetische Exporte (siehe benchmark/erzeuge_export.py).
+
+    Aufruf: python -m pytest tests
+
+    Copyright: © 2025 jstiete
+    License: MIT
+"""
+
+from datetime import date
+from pathlib import Path
+import logging
+import sys
+
+import pytest
+
+VERZEICHNIS = Path(__file__).resolve().parent
+sys.path.insert(0, str(VERZEICHNIS.parent))
+sys.path.insert(0, str(VERZEICHNIS.parent / "benchmark"))
+import befoerderungs_vorschlag as bv
+from erzeuge_export import Generator
+
+bv.logger.setLevel(logging.ERROR)
+
+STAND = date(2026, 1, 1)
+
+
+@pytest.fixture
+def export(tmp_path):
+    """Erzeugt einen Export mit 'anzahl' Mitgliedern im temporären Verzeichnis und liefert den Pfad."""
+    def erzeugen(anzahl:int=200, name:str="Export.csv", encoding:str="utf-8") -> Path:
+        datei = tmp_path / name
+        Generator(stand=STAND).schreiben(datei, anzahl, encoding)
+        return datei
+    return erzeugen
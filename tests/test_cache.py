@@ -0,0 +1,26 @@
+""" Tests für den Ergebniscache (--cache) und die Änderungen seit dem letzten Lauf. """
+
+import pandas as pd
+
+from conftest import bv
+
+
+def test_neuer_stichtag_meldet_nur_geaenderte_ergebnisse(export, tmp_path):
+    """Ein erneuter Lauf mit anderem Stichtag auf demselben Export meldet nur Personen, deren Ergebnis sich ändert,
+       nicht die Überschrift 'Stichtag:...'."""
+    datei = export(300)
+    cache = tmp_path / "cache.db"
+    ausgaben = []
+    for stichtag in ("18.09.2026", "18.10.2026"):
+        kontext = bv.Kontext.erstellen(stichtag=bv.parse_date(stichtag), cache=str(cache), engine="pandas")
+        ausgabe = tmp_path / f"Output_{stichtag}.csv"
+        bv.main(datei, ausgabe, kontext)
+        ausgaben.append(pd.read_csv(ausgabe, sep=";", encoding="utf-8-sig", dtype=str, keep_default_na=False))
+
+    aenderungen = pd.read_csv(tmp_path / "Output_18.10.2026_Aenderungen.csv", sep=";", encoding="utf-8-sig",
+                              dtype=str, keep_default_na=False)
+    spalten = ["akt. Dienstgrad", "Erfüllt Voraussetzungen für"]
+    erwartet = (ausgaben[0][spalten] != ausgaben[1][spalten]).any(axis=1).sum()
+    assert set(aenderungen["Änderung"]) <= {"geändert"}
+    assert len(aenderungen) == erwartet
+    assert not aenderungen["jetzt"].str.contains("Stichtag:").any()
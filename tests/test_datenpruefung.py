@@ -0,0 +1,64 @@
+""" Tests für die Datenprüfung (siehe Datenpruefung und Befund). """
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from conftest import bv
+
+A = bv.AbschnittEnum
+
+
+def tabelle(eintraege:list) -> pd.DataFrame:
+    """Lange Tabelle wie in Roster.tabellen aus (person, slot, name, von, bis[, status])."""
+    return pd.DataFrame({"person": np.array([e[0] for e in eintraege], dtype=np.int32),
+                         "slot": np.array([e[1] for e in eintraege], dtype=np.int16),
+                         "name": pd.Categorical([e[2] for e in eintraege]),
+                         "von": pd.to_datetime([e[3] for e in eintraege]),
+                         "bis": pd.to_datetime([e[4] for e in eintraege]),
+                         "status": pd.Categorical([e[5] if len(e) > 5 else None for e in eintraege])})
+
+
+def test_befunde(export):
+    roster = bv.lese_roster(export(3))
+    tabellen = {
+        A.ABTEILUNG: tabelle([(0, 1, "Einsatzabteilung FF", "2000-01-01", "2005-01-01"),
+                              (0, 2, "Einsatzabteilung FF", "2005-01-01", None),        # schließt an, keine Überschneidung
+                              (0, 3, "Jugendfeuerwehr", "1995-01-01", "2001-01-01"),    # andere Art
+                              (1, 1, "Einsatzabteilung FF", "2000-01-01", "2010-01-01"),
+                              (1, 2, "Einsatzabteilung FF", "2009-01-01", "2011-01-01"),
+                              (2, 1, "Einsatzabteilung FF", "2012-01-01", "2011-01-01")]),
+        A.DIENSTGRAD: tabelle([(0, 1, "FM", "2001-01-01", "2005-01-01"), (0, 2, "OFM", "2005-01-01", None),
+                               (1, 1, "HFM", "2000-01-01", "2003-01-01"), (1, 2, "FM", "2003-01-01", None)]),
+        A.DIENSTSTELLUNG: tabelle([]),
+        A.LEHRGANG: tabelle([(0, 1, "Truppführer", "2001-01-01", "2001-02-01", "Bestanden"),
+                             (0, 2, "Unbekannter Lehrgang", "2002-01-01", "2002-01-01", "Bestanden"),
+                             (1, 1, "Truppführer", "2001-01-01", "2001-01-01")]),
+        A.BEURLAUBUNG: tabelle([]),
+    }
+    roster = bv.Roster.aus_tabellen(roster.stamm, tabellen, bv.Lehrgangsnamen.standard())
+    pruefung = bv.Datenpruefung(bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026")))
+    pruefung.hinzufuegen(roster)
+    befunde = {(zeile - 2, regel) for zeile, regel in pruefung.tabelle()[["Zeile", "Regel"]].itertuples(index=False)}
+    assert befunde == {(0, "LEHRGANG_UNBEKANNT"), (1, "UEBERSCHNEIDUNG"), (1, "DIENSTGRAD_RUECKSCHRITT"),
+                       (1, "LEHRGANG_OHNE_STATUS"), (2, "BEGINN_NACH_ENDE"), (2, "KEIN_DIENSTGRAD")}
+
+
+def test_standardmaessig_mit_zusammenfassung(export, tmp_path, caplog):
+    """Die Datenprüfung läuft ohne Option und meldet die Befunde in einer Zeile statt je Eintrag."""
+    caplog.set_level(logging.WARNING, logger=bv.logger.name)
+    datei = export(300)
+    bv.main(datei, tmp_path / "Output.csv", bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026")))
+    befunde = pd.read_csv(tmp_path / "Output_Datenpruefung.csv", sep=";", encoding="utf-8-sig", dtype=str)
+    assert (befunde["Regel"] == "LEHRGANG_OHNE_STATUS").any()
+    meldungen = [r.getMessage() for r in caplog.records]
+    assert not any("ohne Status" in m for m in meldungen)
+    assert sum(m.startswith("Datenprüfung:") for m in meldungen) == 1
+
+
+def test_abschaltbar(export, tmp_path):
+    datei = export(50)
+    kontext = bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026"), datenpruefung=False, engine="pandas")
+    bv.main(datei, tmp_path / "Output.csv", kontext)
+    assert not (tmp_path / "Output_Datenpruefung.csv").exists()
@@ -0,0 +1,50 @@
+""" Tests für das Umwandeln der Datumsangaben mit pandas (parse_dates) und in der CSV-Engine (_datum). """
+
+import csv
+
+import numpy as np
+import pytest
+
+from conftest import bv
+
+
+@pytest.mark.parametrize("text", ["31.12.9999", "01.01.2300", "05.05.1600", "01.02.03", "29.02.2024"])
+def test_parse_dates_wie_csv_engine(text):
+    """Auch Daten außerhalb des Bereichs von datetime64[ns] werden gültig und ohne Überlauf umgewandelt."""
+    daten, ungueltig = bv.parse_dates([text])
+    assert not ungueltig[0]
+    assert daten[0].astype("datetime64[D]").item() == bv._datum(text)
+
+
+@pytest.mark.parametrize("text", ["32.01.2020", "29.02.2023", "1.1.", "01.01.10000"])
+def test_ungueltige_daten_in_beiden_engines(text):
+    daten, ungueltig = bv.parse_dates([text])
+    assert ungueltig[0] and np.isnat(daten[0])
+    assert bv._datum(text) is None
+
+
+def offenes_ende(datei, ende:str):
+    """Setzt in allen offenen Abteilungszugehörigkeiten des Exports das Ende auf 'ende'."""
+    with open(datei, encoding="utf-8", newline="") as fp:
+        zeilen = list(csv.reader(fp, delimiter=";"))
+    kopf = zeilen[0]
+    paare = [(kopf.index(f"Art/Abteilung {k}"), kopf.index(f"Bis {k}")) for k in range(1, 6)]
+    for werte in zeilen[1:]:
+        for art, bis in paare:
+            if werte[art] and not werte[bis]:
+                werte[bis] = ende
+    with open(datei, "w", encoding="utf-8", newline="") as fp:
+        csv.writer(fp, delimiter=";", lineterminator="\r\n").writerows(zeilen)
+
+
+@pytest.mark.parametrize("ende", ["31.12.9999", "01.01.2300"])
+def test_fernes_ende_in_beiden_engines(export, tmp_path, ende):
+    """Ein fernes Ende (z.B. 31.12.9999 als offenes Ende) ergibt in beiden Engines dasselbe wie ein leeres Ende."""
+    referenz = export(200, "Referenz.csv")
+    datei = export(200)
+    offenes_ende(datei, ende)
+    kontext = bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026"))
+    bv.main(referenz, tmp_path / "Referenz_Output.csv", kontext._replace(engine="pandas"))
+    for engine in ("csv", "pandas"):
+        bv.main(datei, tmp_path / f"Output_{engine}.csv", kontext._replace(engine=engine))
+        assert (tmp_path / f"Output_{engine}.csv").read_bytes() == (tmp_path / "Referenz_Output.csv").read_bytes()
@@ -0,0 +1,40 @@
+""" Tests für die Erkennung des Encodings und gemischte Encodings im Export. """
+
+import pytest
+
+from conftest import bv
+
+
+def gemischt(datei, zeile:int):
+    """Ersetzt in einer UTF-8-Datei den Nachnamen in 'zeile' durch einen Namen mit Latin-1 'ü'."""
+    zeilen = datei.read_bytes().split(b"\r\n")
+    werte = zeilen[zeile - 1].split(b";")
+    werte[3] = "Müller".encode("latin-1")
+    zeilen[zeile - 1] = b";".join(werte)
+    datei.write_bytes(b"\r\n".join(zeilen))
+
+
+@pytest.mark.parametrize("engine", ["csv", "pandas"])
+def test_gemischtes_encoding_vor_der_pruefung(export, tmp_path, engine):
+    """Ein einzelnes Latin-1 Zeichen spät in einer UTF-8-Datei wird vor dem ersten geschriebenen Block gemeldet."""
+    datei = export(500)
+    gemischt(datei, 451)
+    ausgabe = tmp_path / "Output.csv"
+    kontext = bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026"), chunkgroesse=50, engine=engine)
+    with pytest.raises(bv.EncodingFehler, match="Zeile 451"):
+        bv.main(datei, ausgabe, kontext)
+    assert not ausgabe.exists() or ausgabe.read_bytes().strip(b"\xef\xbb\xbf") == b""
+
+
+@pytest.mark.parametrize("encoding, erwartet", [("utf-8", "utf-8"), ("utf-8-sig", "utf-8-sig"), ("cp1252", "latin-1")])
+def test_encoding_erkannt_und_gleiches_ergebnis(export, tmp_path, encoding, erwartet):
+    """Derselbe Export in verschiedenen Encodings ergibt dieselbe Ausgabe (cp1252 ohne Zeichen 0x80-0x9f ist
+       von Latin-1 nicht zu unterscheiden)."""
+    referenz = export(200, "Referenz.csv")
+    datei = export(200, f"Export_{encoding}.csv", encoding)
+    with bv.oeffne_export(datei) as (puffer, gefunden):
+        assert gefunden == erwartet
+    kontext = bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026"), engine="pandas")
+    bv.main(referenz, tmp_path / "Referenz_Output.csv", kontext)
+    bv.main(datei, tmp_path / "Output.csv", kontext)
+    assert (tmp_path / "Output.csv").read_bytes() == (tmp_path / "Referenz_Output.csv").read_bytes()
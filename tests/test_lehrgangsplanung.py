@@ -0,0 +1,52 @@
+""" Tests für die Verteilung der Lehrgangsplätze (verteile_plaetze) gegen eine vollständige Suche. """
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from conftest import bv
+
+
+def beste_anzahl(kandidaten:dict, plaetze:dict, personen:int) -> int:
+    """Größte Anzahl vergebener Plätze durch Ausprobieren aller Zuordnungen (je Person kein oder ein Lehrgang)."""
+    optionen = [[None] + [lehrgang for lehrgang in plaetze if kandidaten[lehrgang][person]] for person in range(personen)]
+    beste = 0
+    for auswahl in itertools.product(*optionen):
+        belegt = [lehrgang for lehrgang in auswahl if lehrgang is not None]
+        if all(belegt.count(lehrgang) <= anzahl for lehrgang, anzahl in plaetze.items()):
+            beste = max(beste, len(belegt))
+    return beste
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_verteile_plaetze_optimal(seed):
+    zufall = random.Random(seed)
+    personen = zufall.randint(1, 7)
+    lehrgaenge = zufall.sample(list(bv.LehrgangEnum), zufall.randint(1, 3))
+    plaetze = {lehrgang: zufall.randint(0, 3) for lehrgang in lehrgaenge}
+    kandidaten = {lehrgang: np.array([zufall.random() < 0.4 for _ in range(personen)]) for lehrgang in lehrgaenge}
+    reihenfolge = np.array(zufall.sample(range(personen), personen))
+
+    verteilung = bv.verteile_plaetze(kandidaten, plaetze, reihenfolge)
+    assert len(verteilung) == beste_anzahl(kandidaten, plaetze, personen)
+    for person, lehrgang in verteilung.items():
+        assert kandidaten[lehrgang][person]
+    for lehrgang, anzahl in plaetze.items():
+        assert sum(ziel == lehrgang for ziel in verteilung.values()) <= anzahl
+
+
+def test_verteile_plaetze_umverteilen():
+    """Person 0 passt zu beiden Lehrgängen und kommt zuerst, Person 1 passt nur zu GF1: Person 0 wechselt zu GF2."""
+    kandidaten = {bv.LehrgangEnum.GF1: np.array([True, True]), bv.LehrgangEnum.GF2: np.array([True, False])}
+    plaetze = {bv.LehrgangEnum.GF1: 1, bv.LehrgangEnum.GF2: 1}
+    verteilung = bv.verteile_plaetze(kandidaten, plaetze, np.array([0, 1]))
+    assert verteilung == {0: bv.LehrgangEnum.GF2, 1: bv.LehrgangEnum.GF1}
+
+
+def test_verteile_plaetze_reihenfolge():
+    """Bei zu wenigen Plätzen erhalten die Personen am Anfang der Reihenfolge den Platz."""
+    kandidaten = {bv.LehrgangEnum.TF: np.array([True, True, True])}
+    verteilung = bv.verteile_plaetze(kandidaten, {bv.LehrgangEnum.TF: 2}, np.array([2, 0, 1]))
+    assert sorted(verteilung) == [0, 2]
@@ -0,0 +1,46 @@
+""" Tests für das maximale Matching (Hopcroft-Karp) gegen eine vollständige Suche. """
+
+import functools
+import random
+
+import pytest
+
+from conftest import bv
+
+
+def groesstes_matching(nachbarn:list) -> int:
+    """Größe eines maximalen Matchings durch Ausprobieren (je linker Knoten kein oder ein freier Nachbar)."""
+    @functools.cache
+    def beste(l:int, belegt:frozenset) -> int:
+        if l == len(nachbarn):
+            return 0
+        ergebnis = beste(l + 1, belegt)
+        for r in nachbarn[l]:
+            if r not in belegt:
+                ergebnis = max(ergebnis, 1 + beste(l + 1, belegt | {r}))
+        return ergebnis
+    return beste(0, frozenset())
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_maximales_matching_wie_vollstaendige_suche(seed):
+    zufall = random.Random(seed)
+    anzahl_links, anzahl_rechts = zufall.randint(0, 8), zufall.randint(0, 8)
+    dichte = zufall.random()
+    nachbarn = [zufall.sample(range(anzahl_rechts), sum(zufall.random() < dichte for _ in range(anzahl_rechts)))
+                for _ in range(anzahl_links)]
+
+    zuordnung = bv.maximales_matching(nachbarn, anzahl_rechts)
+    assert len(zuordnung) == anzahl_links
+    belegt = [r for r in zuordnung if r >= 0]
+    assert len(belegt) == len(set(belegt))
+    assert all(r in nachbarn[l] for l, r in enumerate(zuordnung) if r >= 0)
+    assert len(belegt) == groesstes_matching(nachbarn)
+
+    # wer in der Startlösung (erster freier Nachbar in der Reihenfolge der linken Knoten) einen Partner hat, behält einen
+    frei = set(range(anzahl_rechts))
+    for l, kanten in enumerate(nachbarn):
+        r = next((r for r in kanten if r in frei), None)
+        if r is not None:
+            frei.discard(r)
+            assert zuordnung[l] >= 0
@@ -0,0 +1,27 @@
+""" Tests für den Modus --profile. """
+
+import json
+
+import pytest
+
+from conftest import bv
+
+
+def test_profil_bericht(export, tmp_path):
+    datei = export(100)
+    kontext = bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026"), profil=True, engine="pandas")
+    assert bv.main(datei, tmp_path / "Output.csv", kontext) == 100
+    bericht = json.loads((tmp_path / "Output_Profil.json").read_text(encoding="utf-8"))
+    assert bericht["personen"] == 100
+    assert "pruefung" in bericht["phasen"]
+    assert not bv.profiler.aktiv
+
+
+def test_profiler_nach_fehler_beendet(tmp_path):
+    """Nach einem Fehler bleibt der Profiler nicht aktiv (z.B. im Auskunftsdienst oder in Batch-Prozessen)."""
+    datei = tmp_path / "Leer.csv"
+    datei.write_bytes(b"")
+    kontext = bv.Kontext.erstellen(stichtag=bv.parse_date("01.01.2026"), profil=True, engine="pandas")
+    with pytest.raises(bv.ExportSchemaFehler):
+        bv.main(datei, tmp_path / "Output.csv", kontext)
+    assert not bv.profiler.aktiv
@@ -0,0 +1,32 @@
+""" Tests der skalaren Referenz (check_* Funktionen) gegen das vektorisierte Regelwerk zu verschiedenen Stichtagen. """
+
+from datetime import date, datetime
+
+import pytest
+
+from conftest import bv
+
+
+@pytest.mark.parametrize("stichtag", [datetime(2026, 1, 1), datetime(2040, 6, 30)])
+def test_check_funktionen_wie_regelwerk(export, stichtag):
+    """Ohne vorberechnete Dienstzeiten rechnen die check_* Funktionen bis zum übergebenen Stichtag."""
+    datei = export(300)
+    roster = bv.lese_roster(datei)
+    matrix = bv.Regelwerk.neu().auswerten(roster.merkmale(stichtag))
+    for i, person in enumerate(bv.build_table_fom_csv(datei, stichtag)):
+        person.Dienstzeiten = {}
+        person.Profil = None
+        for dg in matrix.columns:
+            check = bv.dg_checkfunktions.get(dg)
+            referenz = bool(check(person, stichtag.date())) if check else False
+            assert referenz == bool(matrix[dg].iat[i]), (person.PersonalNr, dg)
+
+
+def test_dienstjahre_ohne_stichtag(export):
+    person = bv.build_table_fom_csv(export(5), datetime(2026, 1, 1))[0]
+    tage = person.Dienstzeiten[(bv.AbteilungEnum.FF, None)]
+    assert bv.DienstJahre(person, bv.AbteilungEnum.FF) == tage / 365
+    person.Dienstzeiten = {}
+    with pytest.raises(ValueError):
+        bv.DienstJahre(person, bv.AbteilungEnum.FF)
+    assert bv.DienstJahre(person, bv.AbteilungEnum.FF, stichtag=date(2026, 1, 1)) * 365 == pytest.approx(tage)
@@ -0,0 +1,55 @@
+""" Tests für den binären Snapshot des Exports (RosterSnapshot): Lesen wie aus der CSV und Neuaufbau bei Änderungen. """
+
+from datetime import datetime
+
+import pandas as pd
+
+from conftest import bv
+
+
+def gleiche_roster(a:bv.Roster, b:bv.Roster):
+    pd.testing.assert_frame_equal(a.stamm, b.stamm)
+    assert a.tabellen.keys() == b.tabellen.keys()
+    for abschnitt in a.tabellen:
+        pd.testing.assert_frame_equal(a.tabellen[abschnitt], b.tabellen[abschnitt])
+
+
+def test_snapshot_wie_csv(export, monkeypatch):
+    datei = export(300)
+    roster = bv.lese_roster(datei)
+    bv.lese_roster(datei, snapshot=True)
+    assert bv.RosterSnapshot.datei(datei).exists()
+
+    # zweiter Lauf: der Snapshot wird gelesen, die CSV nicht mehr geparst
+    monkeypatch.setattr(bv.pd, "read_csv", None)
+    gleich = bv.lese_roster(datei, snapshot=True)
+    gleiche_roster(roster, gleich)
+    stichtag = datetime(2026, 1, 1)
+    kontext = bv.Kontext.erstellen(stichtag=stichtag)
+    pd.testing.assert_frame_equal(bv.pruefe(roster, kontext), bv.pruefe(gleich, kontext))
+
+
+def test_snapshot_nach_aenderung_neu(export):
+    datei = export(100)
+    bv.lese_roster(datei, snapshot=True)
+    snapshot = bv.RosterSnapshot.datei(datei)
+    alt = snapshot.read_bytes()
+
+    inhalt = datei.read_bytes()
+    kopf, _, rest = inhalt.partition(b"\r\n")
+    datei.write_bytes(kopf + b"\r\n" + rest.split(b"\r\n", 1)[1])  # erste Person entfernen
+    assert bv.RosterSnapshot.lesen(snapshot, bv.RosterSnapshot.schluessel(datei)) is None
+
+    roster = bv.lese_roster(datei, snapshot=True)
+    assert len(roster) == 99
+    assert snapshot.read_bytes() != alt
+    gleiche_roster(roster, bv.lese_roster(datei))
+
+
+def test_beschaedigter_snapshot(export):
+    datei = export(50)
+    bv.lese_roster(datei, snapshot=True)
+    snapshot = bv.RosterSnapshot.datei(datei)
+    snapshot.write_bytes(snapshot.read_bytes()[:200])
+    assert bv.RosterSnapshot.lesen(snapshot, bv.RosterSnapshot.schluessel(datei)) is None
+    gleiche_roster(bv.lese_roster(datei, snapshot=True), bv.lese_roster(datei))